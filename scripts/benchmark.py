@@ -0,0 +1,46 @@
+# benchmark.py
+# date: 2026-10-18
+
+import click
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.benchmark import STAGES, run_benchmark, environment, save_results, load_results, compare_results
+
+@click.command()
+@click.option("--rows", type=int, multiple=True, default=[10_000, 100_000, 1_000_000], help="Size of a synthetic dataset to benchmark, can be given several times")
+@click.option("--stage", "stages", type=click.Choice(STAGES), multiple=True, help="Stage to time, can be given several times (default: all)")
+@click.option("--work_dir", type=str, default="data/synthetic", help="Directory the synthetic datasets are written to")
+@click.option("--results_dir", type=str, default="results/benchmarks", help="Directory of the results, one JSON lines file per commit")
+@click.option("--chunksize", type=int, default=1_000_000, help="Rows generated, and streamed for datasets larger than --in_memory_rows, at a time")
+@click.option("--in_memory_rows", type=int, default=10_000_000, help="Largest dataset read into memory at once, larger ones are streamed")
+@click.option("--model_rows", type=int, default=10_000, help="Rows the random search is run on")
+@click.option("--predict_rows", type=int, default=100_000, help="Rows predicted with the best model")
+@click.option("--compare_to", type=str, default=None, help="Commit whose saved results the new ones are compared with")
+@click.option("--keep_data", is_flag=True, help="Keep the synthetic datasets instead of deleting them after each run")
+
+def main(rows, stages, work_dir, results_dir, chunksize, in_memory_rows, model_rows, predict_rows, compare_to, keep_data):
+    """Times the pipeline stages on synthetic datasets and saves the results for the current commit."""
+    env = environment()
+    records = []
+    for n_rows in rows:
+        print(f"Benchmarking {n_rows} rows")
+        run = run_benchmark(n_rows, work_dir, stages=list(stages) or None, chunksize=chunksize,
+                            in_memory_rows=in_memory_rows, model_rows=model_rows, predict_rows=predict_rows)
+        for record in run:
+            print(f"  {record['stage']:<35} {record['wall_time_s']:10.3f} s {record['peak_rss_mb'] or 0:10.1f} MB")
+        records += run
+        if not keep_data:
+            os.remove(os.path.join(work_dir, f"synthetic_{n_rows}.csv"))
+
+    path = save_results(records, results_dir, env=env)
+    print(f"Results saved to {path}")
+
+    if compare_to is not None:
+        baseline = load_results(os.path.join(results_dir, f"{compare_to}.jsonl"))
+        current = load_results(path)
+        current = current[current['date'] == env['date']]
+        print(compare_results(baseline, current).to_string(float_format="{:.3f}".format))
+
+if __name__ == "__main__":
+    main()
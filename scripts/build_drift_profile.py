@@ -0,0 +1,24 @@
+# build_drift_profile.py
+# date: 2026-10-18
+
+import click
+import os
+import sys
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.drift_monitor import build_profile, save_profile
+
+@click.command()
+@click.option("--data_path", type=str, default="data/processed/train_data.csv", help="Reference data, e.g. the training data")
+@click.option("--profile_to", type=str, default="results/models/drift_profile.json", help="Path of the profile JSON file")
+@click.option("--chunksize", type=int, default=100_000, help="Number of rows read at a time")
+@click.option("--n_bins", type=int, default=10, help="Number of bins of each numeric column")
+
+def main(data_path, profile_to, chunksize, n_bins):
+    """Builds the reference profile the scoring server's drift monitor compares traffic with."""
+    profile = build_profile(pd.read_csv(data_path, index_col=0, chunksize=chunksize), n_bins=n_bins)
+    save_profile(profile, profile_to)
+    print(f"Profiled {len(profile['columns'])} columns over {profile['n_rows']} rows, saved to {profile_to}")
+
+if __name__ == "__main__":
+    main()
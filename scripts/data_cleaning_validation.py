@@ -5,47 +5,194 @@
 import click
 import sys
 import os
+import glob
+import json
+import tempfile
+from functools import partial
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.check_csv import check_csv
-from src.validate_correlation import validate_correlation
-from src.validate_distribution import validate_distribution
+from src.check_csv import sniff_csv
+from src.columnar_cache import write_processed, convert_to_columnar
+from src.eda_summary import CATEGORICAL_FEATURES, NUMERIC_FEATURES, summarize_eda, merge_eda_summaries, save_eda_summary
+from src.ingest import clean_columns, read_raw, find_raw_files, ingest_shards
+from src.instrumentation import configure, stage
+from src.row_fingerprint import FingerprintIndex, row_fingerprints, validate_duplicates
+from src.run_validators import DEFAULT_VALIDATORS, run_checks, run_validators, format_report
+from src.validate_correlation import summarize_correlation, merge_correlation_summaries, validate_correlation_summary
+from src.validate_distribution import summarize_distribution, merge_distribution_summaries, validate_distribution_summary
+from src.validate_quantiles import summarize_quantiles, merge_quantile_summaries, validate_quantile_summary
 from src.validate_schema import validate_schema
 
+def stream_clean_validate(file_path, chunksize, member=None, descriptor=None, index_dir=None):
+    """
+    Cleans, validates and splits the raw data one chunk at a time.
+
+    Only one chunk of `chunksize` rows is held in memory at once. The schema is
+    validated on every chunk, while the distribution, quantile and correlation checks
+    run on running summaries once the whole file has been read. Duplicate rows across
+    chunks are found with the row fingerprints of a `FingerprintIndex`: a temporary one,
+    or the persistent one in `index_dir`, which also finds rows that duplicate rows of
+    previously ingested files. Train and test rows are appended to temporary files,
+    and new fingerprints added to the index, only once all checks pass.
+    The counts the EDA charts need are gathered from the train rows on the way and
+    saved to 'data/processed/train_eda_summary.csv' (see `scripts/eda.py --summary_path`).
+
+    Returns:
+        dict: The validation report of the distribution and correlation checks.
+    """
+    rng = np.random.RandomState(123)
+    distribution = None
+    quantiles = None
+    correlation = None
+    eda = None
+    train_tmp = "data/processed/train_data.csv.tmp"
+    test_tmp = "data/processed/test_data.csv.tmp"
+    report = None
+    tmp_dir = tempfile.TemporaryDirectory() if index_dir is None else None
+    index = FingerprintIndex(index_dir or tmp_dir.name)
+    duplicates = []
+
+    try:
+        reader = read_raw(file_path, chunksize=chunksize, member=member, descriptor=descriptor)
+        for i, chunk in enumerate(reader):
+            clean_columns(chunk)
+            mode, header = ('w', True) if i == 0 else ('a', False)
+
+            # Save cleaned data
+            chunk.to_csv("data/processed/clean_data.csv", mode=mode, header=header)
+
+            # Run data validation on this chunk and update the running summaries
+            validate_schema(chunk)
+            duplicates.append(index.check_and_add(row_fingerprints(chunk, bits=index.bits), file_path, chunk.index))
+            chunk_distribution = summarize_distribution(chunk)
+            chunk_quantiles = summarize_quantiles(chunk)
+            chunk_correlation = summarize_correlation(chunk)
+            if i == 0:
+                distribution, quantiles, correlation = chunk_distribution, chunk_quantiles, chunk_correlation
+            else:
+                distribution = merge_distribution_summaries(distribution, chunk_distribution)
+                quantiles = merge_quantile_summaries(quantiles, chunk_quantiles)
+                correlation = merge_correlation_summaries(correlation, chunk_correlation)
+
+            # Split train and test data set
+            in_train = rng.random_sample(len(chunk)) < 0.8
+            chunk[in_train].to_csv(train_tmp, mode=mode, header=header)
+            chunk[~in_train].to_csv(test_tmp, mode=mode, header=header)
+            chunk_eda = summarize_eda(chunk[in_train], CATEGORICAL_FEATURES + NUMERIC_FEATURES)
+            eda = chunk_eda if i == 0 else merge_eda_summaries(eda, chunk_eda)
+
+        with stage('stream_summary_checks'):
+            report = run_checks({
+                "validate_distribution": partial(validate_distribution_summary, distribution),
+                "validate_quantiles": partial(validate_quantile_summary, quantiles),
+                "validate_correlation": partial(validate_correlation_summary, correlation),
+                "validate_duplicates": partial(validate_duplicates, pd.concat(duplicates), file_path)
+            })
+    finally:
+        if report is None or not report["passed"]:
+            index.rollback()
+            for path in [train_tmp, test_tmp]:
+                if os.path.exists(path):
+                    os.remove(path)
+        else:
+            index.commit()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    if report["passed"]:
+        os.replace(train_tmp, "data/processed/train_data.csv")
+        os.replace(test_tmp, "data/processed/test_data.csv")
+        save_eda_summary(eda, "data/processed/train_eda_summary.csv")
+        for path in ["data/processed/clean_data.csv", "data/processed/train_data.csv", "data/processed/test_data.csv"]:
+            convert_to_columnar(path, chunksize=chunksize)
+    return report
+
 @click.command()
 @click.option('--file_path', type=str, help="path of datafile")
-def main(file_path):
+@click.option('--chunksize', type=int, default=None, help="Number of rows to read at a time. Streams the file in chunks when given")
+@click.option('--member', type=str, default=None, help="CSV member to read when file_path is a zip file (default: its only CSV member)")
+@click.option('--workers', type=int, default=None, help="Number of worker processes when file_path is a directory or glob of raw files (default: one per CPU)")
+@click.option('--partition_pattern', type=str, default=None, help="Regular expression whose named groups, e.g. (?P<institution>[a-z]+)_(?P<term>[0-9]{4}-[12]), partition the outputs of multiple raw files (default: one partition per file)")
+@click.option('--output_dir', type=str, default="data/processed/partitioned", help="Directory of the partitioned outputs of multiple raw files")
+@click.option('--fingerprint_index', type=str, default=None, help="Directory of the persistent row fingerprint index, to also find rows that duplicate previously ingested files")
+@click.option('--metrics_path', type=str, default=None, help="File the timing, CPU and memory records of each stage are appended to as JSON lines ('-' for stderr)")
+@click.option('--profile_dir', type=str, default=None, help="Directory a cProfile dump is written to for each stage")
+def main(file_path, chunksize, member, workers, partition_pattern, output_dir, fingerprint_index, metrics_path, profile_dir):
 
     """Downloads data zip data from the web to a local filepath and extracts it."""
+    configure(metrics_path, profile_dir)
+
+    # A directory or glob of raw files is ingested by a pool of workers, one file per shard
+    if os.path.isdir(file_path) or glob.escape(file_path) != file_path:
+        file_paths = find_raw_files(file_path)
+        if not file_paths:
+            print(f"No raw files found in {file_path}.")
+            sys.exit(1)
+        report = ingest_shards(file_paths, output_dir, workers=workers, partition_pattern=partition_pattern,
+                               chunksize=chunksize or 100_000, index_dir=fingerprint_index)
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "validation_report.json"), "w") as f:
+            json.dump(report, f, indent=2)
+        print(format_report(report))
+        print(f"{sum(shard['rows'] for shard in report['shards'])} rows in {len(file_paths)} files.")
+        if not report["passed"]:
+            sys.exit(1)
+        print("Data validation success.")
+        return
+
+    # Sniff the format from the first rows only, the file is parsed once below
+    descriptor = None
     try:
-        if not check_csv(file_path):
-            print(f"{file_path} is not a CSV file.")
+        if not file_path.endswith(".zip"):
+            descriptor = sniff_csv(file_path)
+            if descriptor is None:
+                print(f"{file_path} is not a CSV file.")
     except Exception as e:
         print("Error with data validation. Please check source data file.", e)
 
-    df = pd.read_csv(file_path, delimiter=';')
-
-    # Remove extra '\t' from the column name
-    df.rename(columns = {"Daytime/evening attendance\t" : "Daytime/evening attendance"}, inplace = True)
+    if chunksize:
+        with stage('stream_clean_validate', chunksize=chunksize):
+            report = stream_clean_validate(file_path, chunksize, member=member, descriptor=descriptor,
+                                           index_dir=fingerprint_index)
+        print(format_report(report))
+        if not report["passed"]:
+            sys.exit(1)
+        print("Data validation success.")
+        return
 
-    # Remove ' from column name to prevent issues with Altair plots
-    df.columns = df.columns.str.replace("'s", "", regex=False)
+    with stage('read_raw') as record:
+        df = read_raw(file_path, member=member, descriptor=descriptor)
+        clean_columns(df)
+        record['rows'] = len(df)
 
-    # Save cleanred data
-    df.to_csv("data/processed/clean_data.csv")
+    # Save cleanred data, with a typed Parquet copy when pyarrow is available
+    with stage('write_clean_data', rows=len(df)):
+        write_processed(df, "data/processed/clean_data.csv")
 
-    # Run data validation
-    validate_schema(df)
-    validate_distribution(df)
-    validate_correlation(df)
+    # Run data validation, all validators run concurrently and are reported together
+    validators = None
+    if fingerprint_index is not None:
+        index = FingerprintIndex(fingerprint_index)
+        duplicates = index.check_and_add(row_fingerprints(df, bits=index.bits), file_path, df.index)
+        validators = dict(DEFAULT_VALIDATORS, validate_duplicates=lambda df: validate_duplicates(duplicates, file_path))
+    report = run_validators(df, validators=validators)
+    print(format_report(report))
+    if fingerprint_index is not None and report["passed"]:
+        index.commit()
+    elif fingerprint_index is not None:
+        index.rollback()
+    if not report["passed"]:
+        sys.exit(1)
     print("Data validation success.")
 
     # Split train and test data set
     train, test = train_test_split(df, train_size = 0.8, random_state = 123)
 
-    train.to_csv("data/processed/train_data.csv")
-    test.to_csv("data/processed/test_data.csv")
+    with stage('write_train_test_data', rows=len(df)):
+        write_processed(train, "data/processed/train_data.csv")
+        write_processed(test, "data/processed/test_data.csv")
 
 if __name__ == '__main__':
     main()
@@ -6,20 +6,26 @@ import click
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.instrumentation import configure, stage
 from src.read_zip import read_zip
 
 
 @click.command()
 @click.option('--url', type=str, help="URL of dataset to be downloaded")
 @click.option('--write_to', type=str, help="Path to directory where raw data will be written to")
-def main(url, write_to):
+@click.option('--extract/--no-extract', default=True, help="Extract the zip file, or keep it for data_cleaning_validation.py to read directly")
+@click.option('--metrics_path', type=str, default=None, help="File the timing, CPU and memory records of each stage are appended to as JSON lines ('-' for stderr)")
+@click.option('--profile_dir', type=str, default=None, help="Directory a cProfile dump is written to for each stage")
+def main(url, write_to, extract, metrics_path, profile_dir):
     """Downloads data zip data from the web to a local filepath and extracts it."""
-    try:
-        read_zip(url, write_to)
-    except Exception as e:
-        print("Failed to read zip: ", e)
-        os.makedirs(write_to)
-        read_zip(url, write_to)
+    configure(metrics_path, profile_dir)
+    with stage('download_data', url=url):
+        try:
+            read_zip(url, write_to, extract=extract)
+        except Exception as e:
+            print("Failed to read zip: ", e)
+            os.makedirs(write_to)
+            read_zip(url, write_to, extract=extract)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -7,46 +7,46 @@ import os
 import sys
 import altair as alt
 import numpy as np
-import pandas as pd
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.eda_plots import plot_categorical_features
-from src.eda_plots import plot_numerical_features
+from src.columnar_cache import read_processed
+from src.instrumentation import configure, stage
+from src.eda_render import eda_charts, render_charts
+from src.eda_summary import CATEGORICAL_FEATURES, NUMERIC_FEATURES, summarize_eda, load_eda_summary
 
 # main function
 
 @click.command()
 @click.option("--data_path", type=str)
 @click.option("--figure_path", type=str)
+@click.option("--summary_path", type=str, default=None, help="EDA summary written during streaming ingestion; the data is not read when given")
+@click.option("--jobs", type=int, default=None, help="Number of processes rendering charts (default: number of CPUs)")
+@click.option("--metrics_path", type=str, default=None, help="File the timing, CPU and memory records of each stage are appended to as JSON lines ('-' for stderr)")
+@click.option("--profile_dir", type=str, default=None, help="Directory a cProfile dump is written to for each stage")
 
-def main(data_path, figure_path):
-    # Read in cleaned data
-    df = pd.read_csv(data_path)
-
-    df.rename(columns = {"Daytime/evening attendance\t" : "Daytime/evening attendance"}, inplace = True)
-    df.columns = df.columns.str.replace("'s", "", regex=False)
+def main(data_path, figure_path, summary_path, jobs, metrics_path, profile_dir):
+    configure(metrics_path, profile_dir)
 
     # Group feature types based on feature description from source data
-    categorical_features = ["Application order", "Course", "Nacionality", "Gender",
-                            "Marital status", "Application mode", "Daytime/evening attendance",
-                            "Previous qualification", "Mother qualification",  "Mother occupation", 
-                            "Father qualification", "Father occupation", "Displaced", 
-                            "Educational special needs", "Debtor", "Tuition fees up to date",
-                            "Scholarship holder", "International"]
-
-    numeric_features = ["Previous qualification (grade)", "Admission grade", "Age at enrollment",
-                        "Curricular units 1st sem (credited)", "Curricular units 1st sem (enrolled)",
-                        "Curricular units 1st sem (evaluations)", "Curricular units 1st sem (approved)",
-                        "Curricular units 1st sem (grade)", "Curricular units 1st sem (without evaluations)",
-                        "Curricular units 2nd sem (credited)", "Curricular units 2nd sem (enrolled)",
-                        "Curricular units 2nd sem (evaluations)", "Curricular units 2nd sem (approved)",
-                        "Curricular units 2nd sem (grade)", "Curricular units 2nd sem (without evaluations)",
-                        "Unemployment rate", "Inflation rate", "GDP"]
-
-    
-
-    plot_numerical_features(df, numeric_features, figure_path)
-    # Call the function for categorical plot
-    plot_categorical_features(df, categorical_features, figure_path)
+    categorical_features = CATEGORICAL_FEATURES
+    numeric_features = NUMERIC_FEATURES
+
+    # Count each (value, Target) pair once, the charts only see these counts
+    with stage('eda_summary') as record:
+        if summary_path is not None:
+            summary = load_eda_summary(summary_path)
+        else:
+            # Read in cleaned data, only the columns that are plotted
+            df = read_processed(data_path, columns=categorical_features + numeric_features + ["Target"])
+            summary = summarize_eda(df, categorical_features + numeric_features)
+            record['rows'] = len(df)
+
+    # Render the combined figures and one chart per feature in parallel,
+    # charts whose spec did not change since the last run are skipped
+    with stage('eda_render') as record:
+        status = render_charts(eda_charts(summary, categorical_features, numeric_features), figure_path, max_workers=jobs)
+        rendered = sum(value == 'rendered' for value in status.values())
+        record.update(charts=len(status), rendered=rendered)
+    print(f"Rendered {rendered} of {len(status)} charts, index in {figure_path}/eda_index.json")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,24 @@
+# generate_synthetic_data.py
+# date: 2026-10-18
+
+import click
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.synthetic_data import write_synthetic
+
+@click.command()
+@click.option("--rows", type=int, help="Number of rows, e.g. from 10**4 to 10**8")
+@click.option("--write_to", type=str, help="Path of the CSV file, in the format of the raw UCI file")
+@click.option("--chunksize", type=int, default=1_000_000, help="Number of rows generated and written at a time")
+@click.option("--seed", type=int, default=0, help="Seed of the random generator")
+
+def main(rows, write_to, chunksize, seed):
+    """Writes a schema-valid synthetic dataset that scripts/data_cleaning_validation.py can read."""
+    if os.path.dirname(write_to):
+        os.makedirs(os.path.dirname(write_to), exist_ok=True)
+    write_synthetic(write_to, rows, chunksize=chunksize, seed=seed, raw_names=True)
+    print(f"Wrote {rows} synthetic rows to {write_to}")
+
+if __name__ == "__main__":
+    main()
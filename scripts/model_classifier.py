@@ -5,35 +5,73 @@
 import click
 import os
 import sys
+from functools import partial
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.model import load_data, build_preprocessor, build_pipeline, perform_random_search, save_best_model, evaluate_model
+from src.instrumentation import configure, stage
+from src.out_of_core import OutOfCoreKNNSearch, evaluate_out_of_core
+from src.model import load_data, build_preprocessor, build_pipeline, perform_random_search, perform_halving_search, perform_neighbor_graph_search, save_best_model, evaluate_model, build_training_matrix
 
 @click.command()
 @click.option("--data_path_train", type=str, help="Path to the training data")
 @click.option("--data_path_test", type=str, help="Path to the test data")
 @click.option("--pipeline_to", type=str, help="Path to save the best pipeline")
+@click.option("--memmap_dir", type=str, default=None, help="Directory for a memory-mapped copy of the training data shared with the search workers")
+@click.option("--backend", type=click.Choice(["exact", "lsh"]), default="exact", help="Neighbour search backend of the KNN classifier")
+@click.option("--search", type=click.Choice(["random", "halving", "neighbor-graph"]), default="random", help="Hyperparameter search strategy")
+@click.option("--n_candidates", type=int, default=50, help="Number of candidates sampled by the halving search (its compute budget)")
+@click.option("--halving_factor", type=int, default=3, help="Share of candidates (1/factor) promoted between halving rounds")
+@click.option("--out_of_core", is_flag=True, help="Stream the training data from disk in chunks to train with bounded memory; writes only the KNN artifact and ignores --backend, --search and --memmap_dir")
+@click.option("--chunksize", type=int, default=100_000, help="Rows read, scaled and searched at a time with --out_of_core")
+@click.option("--metrics_path", type=str, default=None, help="File the timing, CPU and memory records of each stage are appended to as JSON lines ('-' for stderr)")
+@click.option("--profile_dir", type=str, default=None, help="Directory a cProfile dump is written to for each stage")
 
-def main(data_path_train, data_path_test, pipeline_to):
+def main(data_path_train, data_path_test, pipeline_to, memmap_dir, backend, search, n_candidates, halving_factor, out_of_core, chunksize, metrics_path, profile_dir):
+	configure(metrics_path, profile_dir)
 
-	# Load data
-	X_train, y_train, X_test, y_test = load_data(data_path_train, data_path_test)
+	if out_of_core:
+		# Stream the training file, search n_neighbors on row-range folds and write the best artifact
+		search = OutOfCoreKNNSearch(os.path.join(pipeline_to, "best_knn_artifact"), chunksize=chunksize).fit(data_path_train)
+		print(f"Best parameters: {search.best_params_}")
+		print(f"Best cross-validation score: {search.best_score_}")
+		test_score = evaluate_out_of_core(search.best_estimator_, data_path_test, chunksize=chunksize)
+		print(f"Test set accuracy: {test_score}")
+		return
+
+	# Load data, with compact dtypes
+	with stage("load_data") as record:
+		X_train, y_train, X_test, y_test = load_data(data_path_train, data_path_test, compact=True)
+		record["rows"] = len(X_train) + len(X_test)
 
     # Build the preprocessor
 	preprocessor = build_preprocessor()
 
     # Build the pipeline with KNN classifier
-	my_pipeline = build_pipeline(preprocessor)
+	my_pipeline = build_pipeline(preprocessor, backend=backend)
 
-    # Perform RandomizedSearchCV for hyperparameter tuning
-	random_search = perform_random_search(X_train, y_train, my_pipeline)
+    # Perform the hyperparameter search, RandomizedSearchCV by default
+	search_function = {
+		"random": perform_random_search,
+		"halving": partial(perform_halving_search, n_candidates=n_candidates, factor=halving_factor),
+		"neighbor-graph": perform_neighbor_graph_search
+	}[search]
+	if memmap_dir:
+		# The workers share the memory-mapped matrix, the best pipeline is refit on the DataFrame
+		X_mm, y_mm, _ = build_training_matrix(X_train, y_train, memmap_dir)
+		search_pipeline = build_pipeline(build_preprocessor(feature_names=X_train.columns), backend=backend)
+		random_search = search_function(X_mm, y_mm, search_pipeline, refit=False)
+		with stage("refit_best_model", rows=len(X_train)):
+			best_model = my_pipeline.set_params(**random_search.best_params_).fit(X_train, y_train)
+	else:
+		random_search = search_function(X_train, y_train, my_pipeline)
+		best_model = random_search.best_estimator_
 
     # Print the best parameters and score
 	print(f"Best parameters: {random_search.best_params_}")
 	print(f"Best cross-validation score: {random_search.best_score_}")
 
     # Save the best pipeline
-	best_model = random_search.best_estimator_
-	save_best_model(best_model, pipeline_to)
+	with stage("save_best_model"):
+		save_best_model(best_model, pipeline_to, cv_score=random_search.best_score_, feature_dtypes=X_train.dtypes)
 
     # Evaluate the best model on the test set
 	test_score = evaluate_model(best_model, X_test, y_test)
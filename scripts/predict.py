@@ -0,0 +1,24 @@
+# predict.py
+# date: 2026-10-18
+
+import click
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.predict import load_model, predict_batch
+
+@click.command()
+@click.option("--model_path", type=str, default="results/models/best_knn_artifact", help="Path to the saved model artifact directory or pipeline pickle")
+@click.option("--input_path", type=str, help="CSV or Parquet file of students to score")
+@click.option("--output_path", type=str, help="CSV file to write the predictions to")
+@click.option("--chunksize", type=int, default=10000, help="Number of students scored at a time")
+@click.option("--id_column", type=str, default=None, help="Column copied to the output to identify each student")
+
+def main(model_path, input_path, output_path, chunksize, id_column):
+    """Scores a file of students in chunks with the saved pipeline."""
+    model = load_model(model_path)
+    n_rows = predict_batch(model, input_path, output_path, chunksize=chunksize, id_column=id_column)
+    print(f"Scored {n_rows} students, predictions written to {output_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# run_pipeline.py
+# date: 2026-10-18
+
+import click
+import importlib.util
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.eda_render import INDEX, chart_files
+from src.eda_summary import CATEGORICAL_FEATURES, NUMERIC_FEATURES
+from src.pipeline_cache import ArtifactStore, run_pipeline
+
+URL = "http://archive.ics.uci.edu/static/public/697/predict+students+dropout+and+academic+success.zip"
+# The Parquet copies are only written when pyarrow is installed (see src/columnar_cache.py)
+EXTENSIONS = ["csv", "parquet"] if importlib.util.find_spec("pyarrow") is not None else ["csv"]
+PROCESSED = [f"data/processed/{name}_data.{ext}" for name in ["clean", "train", "test"] for ext in EXTENSIONS]
+ARTIFACT = [f"results/models/best_knn_artifact/{name}" for name in
+            ["manifest.json", "scaler_mean.npy", "scaler_scale.npy", "fit_X.npy", "fit_sq_norms.npy", "labels.npy"]]
+FIGURES = ["results/figures/eda_categorical.png", "results/figures/eda_numerical.png"]
+# Every file scripts/eda.py writes: the combined figures, one chart per feature and the render index
+EDA_OUTPUTS = [f"results/figures/{name}" for name in chart_files(CATEGORICAL_FEATURES, NUMERIC_FEATURES) + [INDEX]]
+REPORT = "report/academic-success-prediction.qmd"
+
+# The same steps as the Makefile, keyed by the contents of their inputs and code
+STEPS = [
+    {
+        "name": "download",
+        "command": [sys.executable, "scripts/download_data.py", f"--url={URL}", "--write_to=data/raw"],
+        "params": {"url": URL},
+        "inputs": [],
+        "code": ["scripts/download_data.py"],
+        "outputs": ["data/raw/data.csv"]
+    },
+    {
+        "name": "clean_validate",
+        "command": [sys.executable, "scripts/data_cleaning_validation.py", "--file_path=data/raw/data.csv"],
+        "inputs": ["data/raw/data.csv"],
+        "code": ["scripts/data_cleaning_validation.py"],
+        "outputs": PROCESSED
+    },
+    {
+        "name": "eda",
+        "command": [sys.executable, "scripts/eda.py", "--data_path=data/processed/train_data.csv", "--figure_path=results/figures"],
+        "inputs": [f"data/processed/train_data.{ext}" for ext in EXTENSIONS],
+        "code": ["scripts/eda.py"],
+        "outputs": EDA_OUTPUTS
+    },
+    {
+        "name": "model",
+        "command": [sys.executable, "scripts/model_classifier.py", "--data_path_train=data/processed/train_data.csv",
+                    "--data_path_test=data/processed/test_data.csv", "--pipeline_to=results/models"],
+        "inputs": [f"data/processed/{name}_data.{ext}" for name in ["train", "test"] for ext in EXTENSIONS],
+        "code": ["scripts/model_classifier.py"],
+        "outputs": ["results/models/best_knn_pipeline.pickle"] + ARTIFACT
+    },
+    {
+        "name": "report",
+        "command": ["quarto", "render", REPORT],
+        "inputs": [REPORT, "report/references.bib", "data/processed/train_data.csv", "data/processed/test_data.csv",
+                   "results/models/best_knn_pipeline.pickle"] + FIGURES,
+        "outputs": ["report/academic-success-prediction.pdf", "report/academic-success-prediction.html"]
+    }
+]
+
+@click.command()
+@click.option("--cache_dir", type=str, default=".pipeline_cache", help="Directory of the artifact store")
+@click.option("--max_cache_mb", type=int, default=2048, help="Size limit of the artifact store in MB; least recently used entries are evicted")
+@click.option("--force", type=click.Choice([step["name"] for step in STEPS]), multiple=True, help="Run a step even if it is cached (repeatable), e.g. --force download to fetch the data again")
+@click.option("--until", type=click.Choice([step["name"] for step in STEPS]), default="report", help="Last step to run")
+
+def main(cache_dir, max_cache_mb, force, until):
+    """Runs the analysis, skipping every step whose inputs, parameters and code are unchanged."""
+    names = [step["name"] for step in STEPS]
+    steps = STEPS[:names.index(until) + 1]
+    store = ArtifactStore(cache_dir, max_bytes=max_cache_mb * 1024 ** 2)
+    for record in run_pipeline(steps, store, force=force):
+        print(f"{record['name']:<15} {record['status']:<7} {record['wall_time']:8.2f}s  {record['key'][:12]}")
+    print(f"Artifact store: {store.size() / 1024 ** 2:.1f} MB in {cache_dir}")
+
+if __name__ == "__main__":
+    main()
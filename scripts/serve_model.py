@@ -0,0 +1,39 @@
+# serve_model.py
+# date: 2026-10-18
+
+import asyncio
+import click
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.drift_monitor import DriftMonitor, load_profile
+from src.predict import load_model
+from src.scoring_server import ScoringServer
+
+async def serve(model_path, host, port, max_batch_size, max_delay_ms, drift_profile, drift_window, drift_buckets):
+    monitor = None
+    if drift_profile is not None:
+        monitor = DriftMonitor(load_profile(drift_profile), window_rows=drift_window, n_buckets=drift_buckets)
+    server = ScoringServer(load_model(model_path), max_batch_size=max_batch_size, max_delay=max_delay_ms / 1000,
+                           drift_monitor=monitor)
+    host, port = await server.start(host, port)
+    endpoints = "POST /predict, GET /metrics" + (", GET /drift" if monitor is not None else "")
+    print(f"Scoring server listening on http://{host}:{port} ({endpoints})")
+    await server.serve_forever()
+
+@click.command()
+@click.option("--model_path", type=str, default="results/models/best_knn_artifact", help="Path to the saved model artifact directory or pipeline pickle")
+@click.option("--host", type=str, default="127.0.0.1", help="Address to listen on")
+@click.option("--port", type=int, default=8000, help="Port to listen on")
+@click.option("--max_batch_size", type=int, default=256, help="Largest number of students scored in one call")
+@click.option("--max_delay_ms", type=float, default=5.0, help="Longest time a request waits for others to join its batch")
+@click.option("--drift_profile", type=str, default=None, help="Reference profile from scripts/build_drift_profile.py; enables GET /drift")
+@click.option("--drift_window", type=int, default=10_000, help="Number of recent scored rows the drift scores are computed over")
+@click.option("--drift_buckets", type=int, default=10, help="Buckets the drift window slides by (1 for a tumbling window)")
+
+def main(model_path, host, port, max_batch_size, max_delay_ms, drift_profile, drift_window, drift_buckets):
+    """Loads the saved pipeline once and serves predictions over HTTP."""
+    asyncio.run(serve(model_path, host, port, max_batch_size, max_delay_ms, drift_profile, drift_window, drift_buckets))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import time
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.neighbors import NearestNeighbors
+from sklearn.utils import check_random_state
+from sklearn.utils.validation import check_array, check_is_fitted
+
+class LSHKNeighborsClassifier(ClassifierMixin, BaseEstimator):
+    """
+    k-nearest neighbours classifier backed by a random-projection LSH index.
+
+    At fit time every training row is hashed into ``n_tables`` hash tables. Each hash
+    is the pattern of sides of the row against ``n_bits`` random hyperplanes. Each
+    hyperplane has a random direction and passes through a randomly drawn training row
+    rather than the origin, so it splits the data at a random point along its
+    direction. Two rows then end up on different sides with a probability that grows
+    with their Euclidean distance, not only with the angle between them, and close rows
+    tend to share a bucket. A query only computes exact
+    distances to the rows in its buckets, so its cost depends on the bucket sizes
+    rather than on the size of the training set. By default the number of hyperplanes
+    grows with the training set so that buckets hold about ``bucket_size`` rows; with
+    a fixed ``n_bits`` the buckets, and the query latency, grow linearly with it.
+    The candidates of a block of queries are scored together.
+
+    Parameters:
+    n_neighbors : int, default=5
+        Number of neighbours used for the vote.
+    n_tables : int, default=8
+        Number of hash tables. More tables give higher recall and slower queries.
+    n_bits : int, default=None
+        Number of hyperplanes per table. More bits give smaller buckets, faster queries
+        and lower recall. By default it is chosen at fit time as the smallest number
+        for which the bucket of a training row holds at most ``bucket_size`` rows on
+        average, which takes about ``log2(n_samples / bucket_size)`` bits.
+    bucket_size : int, default=1024
+        Number of rows in the bucket of a query aimed for when ``n_bits`` is None, so
+        a query is compared with at most about ``n_tables * bucket_size`` rows
+        whatever the size of the training set. The recall then drops slowly as the
+        training set grows; a larger ``bucket_size`` or more tables make up for it.
+    n_probes : int, default=1
+        Hamming radius probed around the query's bucket (0 or 1) when its own buckets
+        hold fewer than ``n_neighbors`` candidates.
+    random_state : int, RandomState instance or None, default=None
+        Seed of the random hyperplanes and of the training rows they pass through.
+
+    Example:
+    >>> from sklearn.preprocessing import StandardScaler
+    >>> pipeline = make_pipeline(StandardScaler(), LSHKNeighborsClassifier(n_neighbors=11))
+    >>> pipeline.fit(X_train, y_train).score(X_test, y_test)
+    """
+
+    def __init__(self, n_neighbors=5, n_tables=8, n_bits=None, bucket_size=1024, n_probes=1, random_state=None):
+        self.n_neighbors = n_neighbors
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.bucket_size = bucket_size
+        self.n_probes = n_probes
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        """
+        Builds the hash tables over the training data.
+
+        Parameters:
+        X : array-like, shape (n_samples, n_features)
+            The training data.
+        y : array-like, shape (n_samples,)
+            The target labels.
+
+        Returns:
+        self : LSHKNeighborsClassifier
+        """
+        X = check_array(X, dtype=np.float32)
+        self.n_features_in_ = X.shape[1]
+        self.classes_, self._y = np.unique(np.asarray(y), return_inverse=True)
+        self._fit_X = X
+        # Without a fixed `n_bits`, as many hyperplanes as an int64 key holds are drawn
+        # and only the first `n_bits_` of them are kept (see `_fit_bits`)
+        self.n_bits_ = 62 if self.n_bits is None else self.n_bits
+
+        rng = check_random_state(self.random_state)
+        self.planes_ = rng.standard_normal((self.n_tables, X.shape[1], self.n_bits_)).astype(np.float32)
+        # Offset of each hyperplane: the projection of a random training row onto its normal
+        anchors = X[rng.randint(len(X), size=(self.n_tables, self.n_bits_))]
+        self.offsets_ = np.einsum("tbd,tdb->tb", anchors, self.planes_)
+        all_signatures = self._signatures(X)
+        if self.n_bits is None:
+            all_signatures = self._fit_bits(all_signatures)
+
+        # Each table is stored CSR-style: the sorted distinct keys, and for each key
+        # the slice of `order` holding the training rows in that bucket
+        self._tables = []
+        for signatures in all_signatures:
+            order = np.argsort(signatures, kind="stable")
+            keys, starts = np.unique(signatures[order], return_index=True)
+            self._tables.append((keys, np.append(starts, len(order)), order))
+        # Every table's `order` end to end, for gathering the buckets of many queries at once
+        self._orders = np.concatenate([order for _, _, order in self._tables])
+        return self
+
+    def _fit_bits(self, signatures):
+        # Keeps the fewest hyperplanes for which the bucket of a training row, and so of
+        # a query from the same distribution, holds at most `bucket_size` rows on
+        # average over the tables. Rows do not fall evenly into the buckets, so this
+        # takes more bits than log2(n_samples / bucket_size), where the bisection
+        # starts; more bits only split buckets further.
+        n_samples = signatures.shape[1]
+        low = min(self.n_bits_, max(0, int(np.ceil(np.log2(n_samples / self.bucket_size)))))
+        high = self.n_bits_
+        while low < high:
+            n_bits = (low + high) // 2
+            sizes = [np.unique(table & ((1 << n_bits) - 1), return_counts=True)[1] for table in signatures]
+            if np.mean([(counts.astype(np.float64) ** 2).sum() / n_samples for counts in sizes]) <= self.bucket_size:
+                high = n_bits
+            else:
+                low = n_bits + 1
+        n_bits = self.n_bits_ = low
+        self.planes_ = self.planes_[:, :, :n_bits]
+        self.offsets_ = self.offsets_[:, :n_bits]
+        return signatures & ((1 << n_bits) - 1)
+
+    def _signatures(self, X, block_size=8192):
+        # Hash keys of every row for every table, shape (n_tables, n_samples)
+        weights = np.left_shift(1, np.arange(self.n_bits_), dtype=np.int64)
+        signatures = np.empty((self.n_tables, X.shape[0]), dtype=np.int64)
+        for start in range(0, X.shape[0], block_size):
+            block = X[start:start + block_size]
+            bits = block @ self.planes_ > self.offsets_[:, None, :]
+            signatures[:, start:start + block_size] = bits @ weights
+        return signatures
+
+    def _bucket_slices(self, signatures):
+        # Start in `order` and length of the bucket of every query in every table,
+        # each of shape (n_tables, n_queries); the length is 0 for an empty bucket
+        starts = np.zeros(signatures.shape, dtype=np.intp)
+        lengths = np.zeros(signatures.shape, dtype=np.intp)
+        for t, (keys, bounds, _) in enumerate(self._tables):
+            position = np.searchsorted(keys, signatures[t]).clip(0, len(keys) - 1)
+            hit = keys[position] == signatures[t]
+            starts[t] = bounds[position]
+            lengths[t] = np.where(hit, bounds[position + 1] - bounds[position], 0)
+        return starts, lengths
+
+    def _search_block(self, X, signatures, starts, lengths, n_neighbors):
+        # Scores the candidates of a block of queries together: the rows of their
+        # buckets are gathered into flat (query, candidate) pairs, duplicates across
+        # tables dropped, and the nearest candidates of every query selected at once
+        # from a matrix of distances with one padded row per query.
+        n_samples = len(self._fit_X)
+        queries = np.broadcast_to(np.arange(X.shape[0]), lengths.shape).T.ravel()
+        starts = (starts + n_samples * np.arange(len(self._tables))[:, None]).T.ravel()
+        lengths = lengths.T.ravel()
+        ends = np.cumsum(lengths)
+        positions = np.arange(ends[-1]) - np.repeat(ends - lengths - starts, lengths)
+        rows, candidates = np.divmod(np.unique(np.repeat(queries, lengths) * n_samples + self._orders[positions]), n_samples)
+
+        difference = self._fit_X[candidates] - X[rows]
+        counts = np.bincount(rows, minlength=X.shape[0])
+        offsets = np.cumsum(counts) - counts
+        squared = np.full((X.shape[0], max(counts.max(), n_neighbors)), np.inf, dtype=np.float32)
+        squared[rows, np.arange(len(rows)) - offsets[rows]] = np.einsum("ij,ij->i", difference, difference)
+        nearest = np.argpartition(squared, n_neighbors - 1, axis=1)[:, :n_neighbors]
+        nearest = np.take_along_axis(nearest, np.argsort(np.take_along_axis(squared, nearest, axis=1), axis=1, kind="stable"), axis=1)
+
+        distances = np.empty((X.shape[0], n_neighbors), dtype=np.float32)
+        indices = np.empty((X.shape[0], n_neighbors), dtype=np.intp)
+        enough = counts >= n_neighbors
+        distances[enough] = np.sqrt(np.take_along_axis(squared[enough], nearest[enough], axis=1))
+        indices[enough] = candidates[offsets[enough, None] + nearest[enough]]
+
+        # Queries with too few candidates probe the neighbouring buckets one at a time
+        for i in np.flatnonzero(~enough):
+            found = self._candidates(signatures[:, i], n_neighbors)
+            squared = ((self._fit_X[found] - X[i]) ** 2).sum(axis=1)
+            closest = np.argpartition(squared, n_neighbors - 1)[:n_neighbors]
+            closest = closest[np.argsort(squared[closest], kind="stable")]
+            distances[i] = np.sqrt(squared[closest])
+            indices[i] = found[closest]
+        return distances, indices
+
+    def _bucket(self, table, key):
+        keys, starts, order = table
+        position = np.searchsorted(keys, key)
+        if position < len(keys) and keys[position] == key:
+            return order[starts[position]:starts[position + 1]]
+        return order[:0]
+
+    def _candidates(self, signatures, n_neighbors):
+        candidates = [self._bucket(table, key) for table, key in zip(self._tables, signatures)]
+        found = np.unique(np.concatenate(candidates))
+
+        if len(found) < n_neighbors and self.n_probes > 0:
+            candidates += [self._bucket(table, key ^ (1 << bit))
+                           for table, key in zip(self._tables, signatures)
+                           for bit in range(self.n_bits_)]
+            found = np.unique(np.concatenate(candidates))
+
+        if len(found) < n_neighbors:
+            # Not enough candidates in the probed buckets, fall back to an exact search
+            found = np.arange(len(self._fit_X))
+        return found
+
+    def kneighbors(self, X, n_neighbors=None, return_distance=True, block_pairs=1 << 16):
+        """
+        Finds the (approximate) nearest training rows of each query row.
+
+        Parameters:
+        X : array-like, shape (n_queries, n_features)
+            The query rows.
+        n_neighbors : int, optional
+            Number of neighbours to return. Defaults to ``self.n_neighbors``.
+        return_distance : bool, default=True
+            Whether to return the distances as well as the indices.
+        block_pairs : int, default=2**16
+            Number of bucket rows of consecutive queries whose distances are computed
+            together. Larger blocks use more memory.
+
+        Returns:
+        distances : numpy.ndarray, shape (n_queries, n_neighbors)
+            Euclidean distances, sorted in increasing order. Only returned if
+            ``return_distance`` is True.
+        indices : numpy.ndarray, shape (n_queries, n_neighbors)
+            Indices of the neighbours in the training data.
+        """
+        check_is_fitted(self, "planes_")
+        X = check_array(X, dtype=np.float32)
+        n_neighbors = self.n_neighbors if n_neighbors is None else n_neighbors
+        n_neighbors = min(n_neighbors, len(self._fit_X))
+
+        distances = np.empty((X.shape[0], n_neighbors), dtype=np.float32)
+        indices = np.empty((X.shape[0], n_neighbors), dtype=np.intp)
+        signatures = self._signatures(X)
+        starts, lengths = self._bucket_slices(signatures)
+        # Blocks of consecutive queries with at most `block_pairs` bucket rows in total
+        ends = np.cumsum(lengths.sum(axis=0))
+        start = 0
+        while start < X.shape[0]:
+            before = ends[start - 1] if start > 0 else 0
+            stop = max(start + 1, np.searchsorted(ends, before + block_pairs, side="right"))
+            block = slice(start, stop)
+            distances[block], indices[block] = self._search_block(
+                X[block], signatures[:, block], starts[:, block], lengths[:, block], n_neighbors)
+            start = stop
+
+        return (distances, indices) if return_distance else indices
+
+    def predict_proba(self, X):
+        """
+        Returns the share of the neighbours' votes that goes to each class.
+
+        Parameters:
+        X : array-like, shape (n_queries, n_features)
+            The query rows.
+
+        Returns:
+        numpy.ndarray, shape (n_queries, n_classes)
+            Class probabilities, in the order of ``classes_``.
+        """
+        indices = self.kneighbors(X, return_distance=False)
+        votes = self._y[indices]
+        counts = np.zeros((len(indices), len(self.classes_)))
+        np.add.at(counts, (np.arange(len(indices))[:, None], votes), 1)
+        return counts / indices.shape[1]
+
+    def predict(self, X):
+        """
+        Predicts the majority class of the neighbours; ties go to the first class.
+
+        Parameters:
+        X : array-like, shape (n_queries, n_features)
+            The query rows.
+
+        Returns:
+        numpy.ndarray, shape (n_queries,)
+            The predicted labels.
+        """
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+def benchmark_recall(estimator, X_train, X_query, n_neighbors=None):
+    """
+    Compares an approximate neighbour search with an exact brute-force search.
+
+    Parameters:
+    estimator : LSHKNeighborsClassifier
+        A classifier fitted on ``X_train``.
+    X_train : array-like, shape (n_samples, n_features)
+        The (preprocessed) training data.
+    X_query : array-like, shape (n_queries, n_features)
+        The (preprocessed) query rows.
+    n_neighbors : int, optional
+        Number of neighbours to compare. Defaults to ``estimator.n_neighbors``.
+
+    Returns:
+    dict
+        ``recall`` (mean share of the exact neighbours that were found), and the
+        mean per-query latency in seconds of the ``approximate`` and ``exact`` searches.
+
+    Example:
+    >>> knn = LSHKNeighborsClassifier(n_neighbors=11, random_state=0).fit(X_train, y_train)
+    >>> benchmark_recall(knn, X_train, X_test)
+    """
+    n_neighbors = estimator.n_neighbors if n_neighbors is None else n_neighbors
+    X_query = check_array(X_query, dtype=np.float32)
+    exact = NearestNeighbors(n_neighbors=n_neighbors, algorithm="brute").fit(check_array(X_train, dtype=np.float32))
+
+    start = time.perf_counter()
+    approximate_indices = estimator.kneighbors(X_query, n_neighbors, return_distance=False)
+    approximate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exact_indices = exact.kneighbors(X_query, return_distance=False)
+    exact_time = time.perf_counter() - start
+
+    found = [len(np.intersect1d(a, e)) for a, e in zip(approximate_indices, exact_indices)]
+    return {
+        "recall": float(np.mean(found)) / n_neighbors,
+        "approximate": approximate_time / len(X_query),
+        "exact": exact_time / len(X_query)
+    }
@@ -0,0 +1,190 @@
+import datetime
+import json
+import os
+import platform
+import subprocess
+import pandas as pd
+from src.eda_summary import CATEGORICAL_FEATURES, NUMERIC_FEATURES, summarize_eda, merge_eda_summaries
+from src.instrumentation import stage
+from src.model import build_preprocessor, build_pipeline, perform_random_search
+from src.synthetic_data import write_synthetic
+from src.validate_correlation import validate_correlation, summarize_correlation, merge_correlation_summaries, validate_correlation_summary
+from src.validate_distribution import validate_distribution, summarize_distribution, merge_distribution_summaries, validate_distribution_summary
+from src.validate_quantiles import validate_quantiles, summarize_quantiles, merge_quantile_summaries, validate_quantile_summary
+from src.validate_schema import validate_schema
+
+STAGES = ['load', 'validate_schema', 'validate_distribution', 'validate_quantiles', 'validate_correlation', 'eda_summary', 'random_search', 'predict']
+
+def run_benchmark(n_rows, work_dir, stages=None, chunksize=1_000_000, in_memory_rows=10_000_000,
+                  model_rows=10_000, predict_rows=100_000, seed=0):
+    """
+    Times the stages of the pipeline on a synthetic dataset of ``n_rows`` rows.
+
+    The dataset is written to a CSV file with ``src.synthetic_data.write_synthetic``
+    and read back by the 'load' stage. Up to ``in_memory_rows`` rows, the file is read
+    into one DataFrame and the validators and the EDA aggregation run on it. Larger
+    files are streamed in chunks of ``chunksize`` rows, the way
+    `scripts/data_cleaning_validation.py --chunksize` does: the schema is validated on
+    each chunk and the other checks and the EDA counts run on merged summaries. Each
+    streamed stage reads the file again, so its time includes the '(streamed) load'
+    time of reading alone. The random search is timed on the first ``model_rows`` rows and prediction on the first
+    ``predict_rows`` rows, using the best model of the search.
+
+    Parameters:
+    n_rows : int
+        Number of rows of the dataset.
+    work_dir : str
+        Directory the dataset is written to.
+    stages : list of str, optional
+        Stages to time, from ``STAGES``. Default times all of them.
+    chunksize, in_memory_rows, model_rows, predict_rows, seed : int, optional
+        See above; ``seed`` seeds the generator.
+
+    Returns:
+    list of dict
+        One ``src.instrumentation.stage`` record per stage, including the generation
+        of the dataset, with the size of the dataset in 'n_rows'.
+    """
+    stages = STAGES if stages is None else stages
+    records = []
+    os.makedirs(work_dir, exist_ok=True)
+    path = os.path.join(work_dir, f'synthetic_{n_rows}.csv')
+    with stage('generate', rows=n_rows, n_rows=n_rows) as record:
+        write_synthetic(path, n_rows, chunksize=chunksize, seed=seed)
+    records.append(record)
+
+    in_memory = n_rows <= in_memory_rows
+    checks = [name for name in STAGES[1:6] if name in stages]
+    df = None
+    if in_memory:
+        with stage('load', rows=n_rows, n_rows=n_rows) as record:
+            df = pd.read_csv(path, delimiter=';')
+        records.append(record)
+
+        functions = {
+            'validate_schema': validate_schema,
+            'validate_distribution': validate_distribution,
+            'validate_quantiles': validate_quantiles,
+            'validate_correlation': validate_correlation,
+            'eda_summary': lambda df: summarize_eda(df, CATEGORICAL_FEATURES + NUMERIC_FEATURES)
+        }
+        for name in checks:
+            with stage(name, rows=n_rows, n_rows=n_rows) as record:
+                functions[name](df)
+            records.append(record)
+    else:
+        # Reading alone is timed by streaming the file without any check
+        for name, stream_checks in [('load', [])] + [(name, [name]) for name in checks]:
+            with stage(f'(streamed) {name}', rows=n_rows, n_rows=n_rows, chunksize=chunksize) as record:
+                _stream_checks(path, chunksize, stream_checks)
+            records.append(record)
+
+    if 'random_search' not in stages and 'predict' not in stages:
+        return records
+    model_df = df if in_memory else pd.read_csv(path, delimiter=';', nrows=max(model_rows, predict_rows))
+    X, y = model_df.drop(columns='Target'), model_df['Target']
+    X_model, y_model = X.iloc[:model_rows], y.iloc[:model_rows]
+    if 'random_search' in stages:
+        with stage('random_search', rows=len(X_model), n_rows=n_rows) as record:
+            best_model = perform_random_search(X_model, y_model, build_pipeline(build_preprocessor())).best_estimator_
+        records.append(record)
+    else:
+        best_model = build_pipeline(build_preprocessor()).fit(X_model, y_model)
+    if 'predict' in stages:
+        X_predict = X.iloc[:predict_rows]
+        with stage('predict', rows=len(X_predict), n_rows=n_rows) as record:
+            best_model.predict(X_predict)
+        records.append(record)
+    return records
+
+def _stream_checks(path, chunksize, checks):
+    # Streams the file, validating each chunk and merging the summaries of the others
+    distribution = quantiles = correlation = eda = None
+    for chunk in pd.read_csv(path, delimiter=';', chunksize=chunksize):
+        if 'validate_schema' in checks:
+            validate_schema(chunk)
+        if 'validate_distribution' in checks:
+            summary = summarize_distribution(chunk)
+            distribution = summary if distribution is None else merge_distribution_summaries(distribution, summary)
+        if 'validate_quantiles' in checks:
+            summary = summarize_quantiles(chunk)
+            quantiles = summary if quantiles is None else merge_quantile_summaries(quantiles, summary)
+        if 'validate_correlation' in checks:
+            summary = summarize_correlation(chunk)
+            correlation = summary if correlation is None else merge_correlation_summaries(correlation, summary)
+        if 'eda_summary' in checks:
+            summary = summarize_eda(chunk, CATEGORICAL_FEATURES + NUMERIC_FEATURES)
+            eda = summary if eda is None else merge_eda_summaries(eda, summary)
+    if distribution is not None:
+        validate_distribution_summary(distribution)
+    if quantiles is not None:
+        validate_quantile_summary(quantiles)
+    if correlation is not None:
+        validate_correlation_summary(correlation)
+
+def environment():
+    """
+    Describes where a benchmark ran: the git commit (with a '-dirty' suffix when the
+    tree has uncommitted changes), the date, the Python version, the platform and the
+    number of CPUs.
+    """
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
+
+    commit = git('rev-parse', '--short', 'HEAD') or 'unknown'
+    if git('status', '--porcelain', '--untracked-files=no'):
+        commit += '-dirty'
+    return {
+        'commit': commit,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+def save_results(records, results_dir, env=None):
+    """
+    Appends benchmark records, tagged with their ``environment``, to
+    '<results_dir>/<commit>.jsonl'.
+
+    Returns:
+    str
+        The path of the results file.
+    """
+    env = environment() if env is None else env
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{env['commit']}.jsonl")
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps({**env, **record}, default=str) + '\n')
+    return path
+
+def load_results(path):
+    """Reads a results file written by ``save_results`` into a DataFrame."""
+    return pd.read_json(path, lines=True, convert_dates=False)
+
+def compare_results(baseline, current, metric='wall_time_s'):
+    """
+    Compares two benchmark runs stage by stage.
+
+    Parameters:
+    baseline, current : pandas.DataFrame
+        Results read with ``load_results``. When a stage ran more than once for a size,
+        its median is used.
+    metric : str, optional
+        Record field to compare. Default is the wall time.
+
+    Returns:
+    pandas.DataFrame
+        The baseline and current values and their ratio (current / baseline), indexed
+        by dataset size and stage.
+    """
+    def median(results):
+        return results.groupby(['n_rows', 'stage'])[metric].median()
+
+    comparison = pd.concat({'baseline': median(baseline), 'current': median(current)}, axis=1)
+    comparison['ratio'] = comparison['current'] / comparison['baseline']
+    return comparison
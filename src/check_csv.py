@@ -1,9 +1,16 @@
+import codecs
+import csv
+import io
 import pandas as pd
 
+SNIFF_BYTES = 64 * 1024
+SNIFF_ROWS = 200
+DELIMITERS = ',;\t|'
+
 # Check the file format
 def check_csv(file_path):
     """
-    Check if the given file is a CSV file by its extension.
+    Check if the given file is a CSV file by its extension and a sniff of its first rows.
 
     Args:
     file_path (str): Path to the file.
@@ -11,13 +18,112 @@ def check_csv(file_path):
     Returns:
     bool: True if the file is a CSV file, False otherwise.
     """
+    return sniff_csv(file_path) is not None
+
+def sniff_csv(file_path, sample_bytes=SNIFF_BYTES, sample_rows=SNIFF_ROWS):
+    """
+    Detect the format of a CSV file from a bounded prefix, without parsing the whole file.
+
+    Only the first `sample_bytes` bytes are read. The encoding, delimiter and header are
+    detected from them, every complete row of the prefix (up to `sample_rows`) must have
+    the same number of fields, and the sample rows are parsed to infer the column dtypes.
+
+    Args:
+    file_path (str): Path to the file.
+    sample_bytes (int, optional): Size of the prefix read from the file. Default is 64 KB.
+    sample_rows (int, optional): Largest number of rows checked and used to infer dtypes.
+        Default is 200.
+
+    Returns:
+    dict or None: None if the file is not a CSV file. Otherwise a descriptor with the
+    'path', 'encoding', 'delimiter', 'has_header', 'columns', 'n_columns', the inferred
+    'dtypes' of each column and the number of 'sample_rows' checked, which
+    `read_sniffed_csv` reuses to parse the file once.
+    """
     # Check if file extension is .csv
     if not file_path.endswith(".csv"):
-        return False
+        return None
+
+    with open(file_path, 'rb') as f:
+        prefix = f.read(sample_bytes)
+        at_end = not f.read(1)
+
+    text, encoding = _decode(prefix, final=at_end)
+    if text is None:
+        return None
+    lines = text.splitlines(keepends=True)
+    # The last line of a prefix that stops mid-file may be incomplete
+    if not at_end and len(lines) > 1:
+        lines = lines[:-1]
+    lines = lines[:sample_rows + 1]
+    sample = ''.join(lines)
 
-    # Try to read the file using pandas (this will raise an error if it's not a CSV file)
+    # csv.Sniffer is slow on long samples, the first rows are enough to detect the format
+    head = ''.join(lines[:21])
     try:
-        pd.read_csv(file_path)
-        return True
-    except Exception:
-        return False
\ No newline at end of file
+        dialect = csv.Sniffer().sniff(head, delimiters=DELIMITERS)
+        has_header = csv.Sniffer().has_header(head)
+    except csv.Error:
+        return None
+
+    rows = [row for row in csv.reader(io.StringIO(sample), dialect) if row]
+    n_columns = len(rows[0]) if rows else 0
+    if n_columns < 2 or any(len(row) != n_columns for row in rows):
+        return None
+
+    try:
+        frame = pd.read_csv(io.StringIO(sample), sep=dialect.delimiter, header=0 if has_header else None)
+    except (ValueError, pd.errors.ParserError):
+        return None
+
+    return {
+        'path': file_path,
+        'encoding': encoding,
+        'delimiter': dialect.delimiter,
+        'has_header': has_header,
+        'columns': list(frame.columns),
+        'n_columns': n_columns,
+        'dtypes': {column: str(dtype) for column, dtype in frame.dtypes.items()},
+        'sample_rows': len(frame)
+    }
+
+def read_sniffed_csv(descriptor, chunksize=None, use_dtypes=True, **read_csv_kwargs):
+    """
+    Parse a CSV file with the format found by `sniff_csv`.
+
+    Args:
+    descriptor (dict): The descriptor returned by `sniff_csv`.
+    chunksize (int, optional): Number of rows per chunk. When given, an iterator of
+        DataFrames is returned.
+    use_dtypes (bool, optional): Whether to parse the float and text columns with the
+        dtypes inferred from the sample rows instead of inferring them again from the
+        whole file. Integer and boolean dtypes are still inferred by the parser, since
+        they cannot hold a missing value later in the file. Default is True.
+    **read_csv_kwargs: Passed to `pandas.read_csv`.
+
+    Returns:
+    pandas.DataFrame or iterator of pandas.DataFrame: The data, or its chunks when
+    `chunksize` is given.
+    """
+    options = {
+        'sep': descriptor['delimiter'],
+        'encoding': descriptor['encoding'],
+        'header': 0 if descriptor['has_header'] else None,
+        'chunksize': chunksize
+    }
+    if use_dtypes:
+        options['dtype'] = {column: dtype for column, dtype in descriptor['dtypes'].items()
+                            if dtype.startswith('float') or dtype == 'object'}
+    return pd.read_csv(descriptor['path'], **{**options, **read_csv_kwargs})
+
+def _decode(prefix, final):
+    # Returns the decoded prefix and its encoding, or (None, None) for binary data
+    if b'\x00' in prefix:
+        return None, None
+    for encoding in ['utf-8-sig', 'latin-1']:
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            return decoder.decode(prefix, final=final), encoding
+        except UnicodeDecodeError:
+            continue
+    return None, None
@@ -0,0 +1,134 @@
+import os
+import pandas as pd
+from src.validate_schema import SCHEMA
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, the CSV files are always written
+    pa = None
+    pq = None
+
+def columnar_path(csv_path):
+    """
+    Returns the path of the Parquet copy that sits next to a processed CSV file.
+
+    Args:
+        csv_path (str): Path to the CSV file, e.g. 'data/processed/train_data.csv'.
+
+    Returns:
+        str: The same path with a '.parquet' extension.
+    """
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+def apply_schema_dtypes(df):
+    """
+    Casts the columns of a DataFrame to the dtypes declared in the ``validate_schema``
+    schema. Columns that are not in the schema, string columns, and integer columns
+    holding missing values are left as they are.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to cast.
+
+    Returns:
+        pd.DataFrame: The DataFrame with the schema dtypes applied.
+    """
+    dtypes = {}
+    for name, column in SCHEMA.columns.items():
+        dtype = str(column.dtype)
+        if name not in df.columns or dtype == "str" or df[name].dtype == dtype:
+            continue
+        if dtype.startswith("int") and df[name].isna().any():
+            continue
+        dtypes[name] = dtype
+    return df.astype(dtypes) if dtypes else df
+
+def _as_read_from_csv(df, index):
+    # Parquet copies hold exactly what pd.read_csv returns for the CSV file, so an
+    # index written to the CSV comes back as an ordinary 'Unnamed: 0' column
+    if index:
+        df = df.reset_index(names=df.index.name or "Unnamed: 0")
+    return apply_schema_dtypes(df)
+
+def write_processed(df, csv_path, index=True):
+    """
+    Writes a processed dataset as CSV and, when pyarrow is installed, as a typed
+    Parquet file next to it.
+
+    Args:
+        df (pd.DataFrame): The dataset to write.
+        csv_path (str): Path of the CSV file to write.
+        index (bool, optional): Whether to write the index as the first column. Default is True.
+
+    Returns:
+        str or None: The path of the Parquet file, or None if pyarrow is not available.
+    """
+    df.to_csv(csv_path, index=index)
+    if pq is None:
+        return None
+
+    path = columnar_path(csv_path)
+    _as_read_from_csv(df, index).to_parquet(path, index=False)
+    return path
+
+def convert_to_columnar(csv_path, chunksize=100_000):
+    """
+    Writes the Parquet copy of an existing processed CSV file, reading the CSV in
+    chunks so memory stays bounded for large files.
+
+    Args:
+        csv_path (str): Path of the CSV file to convert.
+        chunksize (int, optional): Number of rows to convert at a time. Default is 100,000.
+
+    Returns:
+        str or None: The path of the Parquet file, or None if pyarrow is not available
+                     or the CSV file has no rows.
+    """
+    if pq is None:
+        return None
+
+    path = columnar_path(csv_path)
+    writer = None
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            table = pa.Table.from_pandas(apply_schema_dtypes(chunk), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    return path if writer is not None else None
+
+def is_columnar_current(csv_path):
+    """
+    Checks whether the Parquet copy of a CSV file exists and is at least as recent
+    as the CSV file.
+
+    Args:
+        csv_path (str): Path of the CSV file.
+
+    Returns:
+        bool: True if the Parquet copy can be read instead of the CSV file.
+    """
+    path = columnar_path(csv_path)
+    if pq is None or not os.path.exists(path):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(path) >= os.path.getmtime(csv_path)
+
+def read_processed(csv_path, columns=None):
+    """
+    Reads a processed dataset, preferring its Parquet copy when it is up to date.
+
+    Args:
+        csv_path (str): Path of the CSV file.
+        columns (list, optional): Only read these columns, in this order. Default reads all columns.
+
+    Returns:
+        pd.DataFrame: The dataset, identical whichever file it was read from.
+    """
+    if is_columnar_current(csv_path):
+        return pd.read_parquet(columnar_path(csv_path), columns=columns)
+
+    df = pd.read_csv(csv_path, usecols=columns)
+    return df if columns is None else df[columns]
@@ -0,0 +1,249 @@
+import collections
+import json
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from src.eda_summary import CATEGORICAL_FEATURES, NUMERIC_FEATURES
+from src.validate_distribution import REF_MEAN, REF_STD, REF_PROP
+from src.validate_schema import _COLUMN_CHECKS
+
+FORMAT_NAME = 'drift-profile'
+FORMAT_VERSION = 1
+
+def profile_spec(column, n_bins=10, categories=None):
+    """
+    Chooses how a column is sketched.
+
+    Numeric columns with a reference mean and standard deviation in
+    ``src.validate_distribution`` get ``n_bins`` bins whose edges are the deciles (for
+    10 bins) of a normal distribution with that mean and standard deviation, so the
+    bins are fixed before any data is seen. Categorical columns get the categories of
+    their ``isin`` domain in ``src.validate_schema``, Target gets the categories of
+    ``REF_PROP``, and other columns the given ``categories``. Values outside the
+    categories share an 'other' slot, and every column has a slot for missing values.
+
+    Parameters:
+    column : str
+        Name of the column.
+    n_bins : int, optional
+        Number of bins of a numeric column. Default is 10.
+    categories : list, optional
+        Categories of a categorical column without a known domain.
+
+    Returns:
+    dict
+        {'kind': 'numeric', 'edges': [...]} or {'kind': 'categorical', 'categories': [...]}.
+
+    Raises:
+    ValueError
+        If the column is neither a known numeric column nor has categories.
+    """
+    if column in NUMERIC_FEATURES and column in REF_MEAN.index:
+        quantiles = norm.ppf(np.linspace(0, 1, n_bins + 1)[1:-1], loc=REF_MEAN[column], scale=REF_STD[column])
+        return {'kind': 'numeric', 'edges': np.unique(quantiles).tolist()}
+    if column == 'Target':
+        categories = list(REF_PROP['prop'])
+    elif _COLUMN_CHECKS.get(column) and _COLUMN_CHECKS[column][0][0] == 'isin':
+        categories = _COLUMN_CHECKS[column][0][1].tolist()
+    if categories is None:
+        raise ValueError(f"Column {column} has no reference distribution or categories to sketch.")
+    return {'kind': 'categorical', 'categories': sorted(categories)}
+
+def count_column(values, spec):
+    """
+    Counts the values of a column into the fixed slots of its spec.
+
+    Returns:
+    numpy.ndarray
+        For a numeric column, the counts of the len(edges) + 1 bins (the first and last
+        bins are open-ended); for a categorical column, the counts of each category and
+        of 'other'. The last slot counts missing values.
+    """
+    values = pd.Series(values)
+    present = values.notna().to_numpy()
+    if spec['kind'] == 'numeric':
+        n_slots = len(spec['edges']) + 1
+        slots = np.searchsorted(spec['edges'], values.to_numpy(dtype=float)[present], side='right')
+    else:
+        categories = np.asarray(spec['categories'])
+        n_slots = len(categories) + 1
+        observed = values.to_numpy()[present]
+        try:
+            slots = np.searchsorted(categories, observed).clip(0, len(categories) - 1)
+            slots = np.where(categories[slots] == observed, slots, len(categories))
+        except TypeError:
+            # e.g. strings in a column of numeric codes
+            slots = np.array([spec['categories'].index(value) if value in spec['categories'] else len(categories)
+                              for value in observed], dtype=np.intp)
+    counts = np.bincount(slots, minlength=n_slots)
+    return np.append(counts, np.count_nonzero(~present)).astype(np.int64)
+
+def build_profile(frames, columns=None, n_bins=10):
+    """
+    Builds a reference profile from the reference data, one pass over its chunks.
+
+    Parameters:
+    frames : pandas.DataFrame or iterable of pandas.DataFrame
+        The reference data, e.g. the training data, or its chunks.
+    columns : list of str, optional
+        Columns to profile. Defaults to the EDA features and Target found in the data.
+    n_bins : int, optional
+        Number of bins of the numeric columns. Default is 10.
+
+    Returns:
+    dict
+        The profile: the number of rows and, per column, its spec (see ``profile_spec``)
+        and the reference counts of its slots.
+    """
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    profile = {'format': FORMAT_NAME, 'format_version': FORMAT_VERSION, 'n_rows': 0, 'columns': {}}
+    for df in frames:
+        if not profile['columns']:
+            names = columns or [name for name in CATEGORICAL_FEATURES + NUMERIC_FEATURES + ['Target'] if name in df.columns]
+            profile['columns'] = {name: profile_spec(name, n_bins=n_bins) for name in names}
+            counts = {name: 0 for name in names}
+        for name, spec in profile['columns'].items():
+            counts[name] = counts[name] + count_column(df[name], spec)
+        profile['n_rows'] += len(df)
+    for name, spec in profile['columns'].items():
+        spec['counts'] = np.asarray(counts[name]).tolist()
+    return profile
+
+def save_profile(profile, path):
+    """Writes a profile from ``build_profile`` as JSON."""
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2, default=lambda o: o.item())
+
+def load_profile(path):
+    """
+    Reads a profile written by ``save_profile``.
+
+    Raises:
+    ValueError
+        If the file does not hold a supported profile.
+    """
+    with open(path) as f:
+        profile = json.load(f)
+    if profile.get('format') != FORMAT_NAME or profile.get('format_version', 0) > FORMAT_VERSION:
+        raise ValueError(f"Unsupported drift profile format {profile.get('format')!r} in '{path}'.")
+    return profile
+
+def drift_scores(reference, current, kind, epsilon=1e-4):
+    """
+    Compares the slot counts of a column with its reference counts.
+
+    Parameters:
+    reference, current : array-like
+        Counts from ``count_column``.
+    kind : str
+        'numeric' or 'categorical'.
+    epsilon : float, optional
+        Proportion added to every slot before the PSI is computed, so empty slots do
+        not make it infinite. Default is 1e-4.
+
+    Returns:
+    dict
+        'psi', the population stability index over every slot, and 'ks', the largest
+        difference between the cumulative distributions of the bins of a numeric
+        column (None for a categorical column). Both are None if either side is empty.
+        The KS statistic is computed on the bins, so it is a lower bound of the one on
+        the raw values.
+    """
+    reference, current = np.asarray(reference, dtype=float), np.asarray(current, dtype=float)
+    if reference.sum() == 0 or current.sum() == 0:
+        return {'psi': None, 'ks': None}
+    p = reference / reference.sum() + epsilon
+    q = current / current.sum() + epsilon
+    p, q = p / p.sum(), q / q.sum()
+    psi = float(np.sum((q - p) * np.log(q / p)))
+
+    ks = None
+    if kind == 'numeric' and reference[:-1].sum() > 0 and current[:-1].sum() > 0:
+        # Missing values are left out of the cumulative distributions
+        ks = float(np.max(np.abs(np.cumsum(reference[:-1]) / reference[:-1].sum()
+                                 - np.cumsum(current[:-1]) / current[:-1].sum())))
+    return {'psi': psi, 'ks': ks}
+
+class DriftMonitor:
+    """
+    Fixed-memory drift monitor of incoming data against a reference profile.
+
+    Each batch passed to ``update`` is counted into the fixed slots of every profiled
+    column it has (histogram bins or category tables), so its memory does not depend on
+    the amount of traffic. The window is a ring of ``n_buckets`` buckets of
+    ``window_rows / n_buckets`` rows: a new bucket is started once the current one is
+    full and the oldest bucket is dropped, so the window slides over roughly the last
+    ``window_rows`` rows. With one bucket the window tumbles instead, restarting empty
+    every ``window_rows`` rows.
+
+    Parameters:
+    profile : dict
+        A reference profile from ``build_profile`` or ``load_profile``.
+    window_rows : int, optional
+        Number of rows in the window. Default is 10,000.
+    n_buckets : int, optional
+        Number of buckets of the window. Default is 10.
+    psi_threshold : float, optional
+        PSI above which a column is reported as drifting. Default is 0.2.
+    ks_threshold : float, optional
+        KS statistic above which a numeric column is reported as drifting. Default is 0.1.
+
+    Example:
+    >>> monitor = DriftMonitor(load_profile('results/models/drift_profile.json'))
+    >>> monitor.update(batch)
+    >>> monitor.report()
+    """
+
+    def __init__(self, profile, window_rows=10_000, n_buckets=10, psi_threshold=0.2, ks_threshold=0.1):
+        self.profile = profile
+        self.window_rows = window_rows
+        self.n_buckets = n_buckets
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.rows_seen = 0
+        self._buckets = collections.deque([self._new_bucket()], maxlen=n_buckets)
+
+    def update(self, df):
+        """
+        Counts a batch of rows into the window. Columns of the profile missing from the
+        batch are not counted.
+        """
+        bucket = self._buckets[-1]
+        if bucket['rows'] >= self.window_rows / self.n_buckets:
+            bucket = self._new_bucket()
+            self._buckets.append(bucket)
+        for name, spec in self.profile['columns'].items():
+            if name in df.columns:
+                bucket['counts'][name] += count_column(df[name], spec)
+        bucket['rows'] += len(df)
+        self.rows_seen += len(df)
+
+    def window_counts(self):
+        """Returns the number of rows in the window and the summed slot counts of each column."""
+        rows = sum(bucket['rows'] for bucket in self._buckets)
+        counts = {name: sum(bucket['counts'][name] for bucket in self._buckets) for name in self.profile['columns']}
+        return rows, counts
+
+    def report(self):
+        """
+        Scores the drift of every column over the window.
+
+        Returns:
+        pandas.DataFrame
+            One row per column, indexed by column name, with its kind, the number of
+            non-missing values in the window, 'psi', 'ks' and 'drift', which is True when
+            either score is above its threshold.
+        """
+        _, counts = self.window_counts()
+        rows = []
+        for name, spec in self.profile['columns'].items():
+            scores = drift_scores(spec['counts'], counts[name], spec['kind'])
+            drift = ((scores['psi'] is not None and scores['psi'] > self.psi_threshold)
+                     or (scores['ks'] is not None and scores['ks'] > self.ks_threshold))
+            rows.append({'column': name, 'kind': spec['kind'], 'count': int(counts[name][:-1].sum()), **scores, 'drift': drift})
+        return pd.DataFrame(rows).set_index('column')
+
+    def _new_bucket(self):
+        return {'rows': 0, 'counts': {name: np.zeros(len(spec['counts']), dtype=np.int64)
+                                      for name, spec in self.profile['columns'].items()}}
@@ -4,6 +4,66 @@
 
 import altair as alt
 import pandas as pd
+from src.eda_summary import summarize_eda, categorical_counts, numerical_histogram
+
+def _as_summary(data, features):
+    # The charts are drawn from (value, target) counts: summarize a DataFrame, pass a
+    # summary from `summarize_eda` through, and reject anything else
+    if isinstance(data, pd.DataFrame):
+        return summarize_eda(data, features)
+    if isinstance(data, dict) and 'counts' in data:
+        return data
+    return None
+
+def categorical_chart(summary, feature):
+    """
+    Bar chart of the counts of one categorical feature, one panel per target class.
+    Only the (value, target) counts are embedded in the chart.
+    """
+    target = summary['target']
+    counts = categorical_counts(summary, feature).set_axis(['value', target, 'count'], axis=1)
+    return alt.Chart(counts).mark_bar().encode(
+        x = alt.X('value:Q', title=feature),
+        y = alt.Y('count:Q', title='Count of Records'),
+        column = alt.Column(f'{target}:N', title=None),
+        color = alt.Color(f'{target}:N', legend=None)
+    ).properties(
+        width=120,
+        height=80
+    ).resolve_scale(
+        y='independent'
+    )
+
+def numerical_chart(summary, feature, maxbins=30):
+    """
+    Heatmap of the histogram of one numeric feature per target class. The histogram
+    is binned from the summary, so only its non-empty bins are embedded in the chart.
+    """
+    target = summary['target']
+    histogram = numerical_histogram(summary, feature, maxbins=maxbins)
+    return alt.Chart(histogram).mark_rect().encode(
+        x = alt.X('bin_start:Q', bin='binned', title=f'{feature} (binned)'),
+        x2 = 'bin_end:Q',
+        y = alt.Y(f'{target}:N', title=None),
+        color = alt.Color('count:Q', title='Count of Records').legend(orient="top")
+    ).properties(
+        width = 180
+    )
+
+def categorical_figure(summary, categorical_features):
+    """
+    The categorical charts of all features stacked in one column.
+    """
+    return alt.vconcat(*[categorical_chart(summary, feature) for feature in categorical_features])
+
+def numerical_figure(summary, numeric_features):
+    """
+    The numerical charts of all features in two columns.
+    """
+    return alt.concat(
+        *[numerical_chart(summary, feature) for feature in numeric_features],
+        columns = 2
+    )
 
 def plot_categorical_features(df, categorical_features, figure_path):
     """
@@ -11,41 +71,26 @@ def plot_categorical_features(df, categorical_features, figure_path):
     and saves the figure as a PNG image.
 
     Parameters:
-    df (pandas.DataFrame): The DataFrame containing the data.
+    df (pandas.DataFrame or dict): The DataFrame containing the data, or its summary
+        from `src.eda_summary.summarize_eda` (e.g. built while streaming the data).
     categorical_features (list): List of categorical column names to plot.
     figure_path (str): Path where the figure should be saved.
     """
-    categorical_figures = alt.Chart(df).mark_bar().encode(
-        x = alt.X(alt.repeat()).type('quantitative'),
-        y = 'count():Q',
-        column = alt.Column('Target:N', title=None),
-        color = alt.Color('Target:N', legend=None)
-    ).properties(
-        width=120,
-        height=80
-    ).resolve_scale(
-        y='independent'
-    ).repeat(
-        categorical_features,
-        columns=1
-    )
+    summary = _as_summary(df, categorical_features)
+    if summary is None:
+        return None
+
+    categorical_figures = categorical_figure(summary, categorical_features)
 
     # Save the plot to the given path
     categorical_figures.save(f"{figure_path}/eda_categorical.png")
 
 def plot_numerical_features(df, numeric_features, figure_path):
-    
-    # Plot numerical features
-    numerical_figures = alt.Chart(df).mark_rect().encode(
-        x = alt.X(alt.repeat()).bin(maxbins=30),
-        y = alt.Y('Target:N', title=None),
-        color = alt.Color('count():Q').legend(orient="top")
-    ).properties(
-        width = 180
-    ).repeat(
-        numeric_features,
-        columns = 2
-    )
-    numerical_figures.save(f"{figure_path}/eda_numerical.png")
 
+    # Plot numerical features from 30-bin histograms of the counts
+    summary = _as_summary(df, numeric_features)
+    if summary is None:
+        return None
 
+    numerical_figures = numerical_figure(summary, numeric_features)
+    numerical_figures.save(f"{figure_path}/eda_numerical.png")
@@ -0,0 +1,129 @@
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+from src.eda_plots import categorical_chart, numerical_chart, categorical_figure, numerical_figure
+
+INDEX = 'eda_index.json'
+
+def eda_charts(summary, categorical_features, numeric_features):
+    """
+    Builds every EDA chart from a summary: one chart per feature plus the two
+    combined figures.
+
+    Parameters:
+    summary : dict
+        A summary returned by ``src.eda_summary.summarize_eda``.
+    categorical_features, numeric_features : list of str
+        The features to plot.
+
+    Returns:
+    dict
+        Altair charts by output file, relative to the figure directory:
+        'eda_numerical.png', 'eda_categorical.png' and one
+        'features/<kind>_<feature>.png' per feature.
+    """
+    files = chart_files(categorical_features, numeric_features)
+    charts = {
+        files[0]: numerical_figure(summary, numeric_features),
+        files[1]: categorical_figure(summary, categorical_features)
+    }
+    for name, feature in zip(files[2:], numeric_features):
+        charts[name] = numerical_chart(summary, feature)
+    for name, feature in zip(files[2 + len(numeric_features):], categorical_features):
+        charts[name] = categorical_chart(summary, feature)
+    return charts
+
+def chart_files(categorical_features, numeric_features):
+    """
+    Returns the files ``eda_charts`` builds, relative to the figure directory, in
+    the same order: the two combined figures, then one file per numeric and per
+    categorical feature.
+    """
+    return (['eda_numerical.png', 'eda_categorical.png']
+            + [f'features/numerical_{_slug(feature)}.png' for feature in numeric_features]
+            + [f'features/categorical_{_slug(feature)}.png' for feature in categorical_features])
+
+def render_charts(charts, figure_path, max_workers=None):
+    """
+    Saves charts as PNG files in parallel, skipping the ones that did not change.
+
+    Each chart's Vega-Lite spec, which embeds its aggregated data, is hashed. A chart
+    whose hash matches the one recorded in the figure directory's 'eda_index.json' and
+    whose file exists is not rendered again. The others are rendered in a process pool
+    whose workers start the headless renderer once and reuse it for every chart they
+    are given; with a single worker they are rendered in this process. The index is
+    updated with the hash of every chart.
+
+    Parameters:
+    charts : dict
+        Altair charts by output file, relative to ``figure_path``.
+    figure_path : str
+        Directory the figures and the index are written to.
+    max_workers : int, optional
+        Number of rendering processes. Defaults to the number of CPUs, capped by the
+        number of charts to render.
+
+    Returns:
+    dict
+        'rendered' or 'skipped' by output file.
+    """
+    index_path = os.path.join(figure_path, INDEX)
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+
+    status, pending = {}, {}
+    for name, chart in charts.items():
+        spec = chart.to_dict()
+        spec_hash = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+        path = os.path.join(figure_path, name)
+        if index.get(name, {}).get('spec_hash') == spec_hash and os.path.exists(path):
+            status[name] = 'skipped'
+        else:
+            pending[name] = (spec, path)
+        index[name] = {'file': name, 'spec_hash': spec_hash}
+
+    if pending:
+        for path in {os.path.dirname(path) for _, path in pending.values()}:
+            os.makedirs(path, exist_ok=True)
+        # The combined figures are the slowest, start them first
+        order = sorted(pending.items(), key=lambda item: '/' in item[0])
+        workers = min(max_workers or os.cpu_count() or 1, len(pending))
+        if workers == 1:
+            for name, (spec, path) in order:
+                _render_png(spec, path)
+                status[name] = 'rendered'
+        else:
+            # The renderer is not safe to fork once started, so workers are spawned
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_start_renderer,
+                                                        mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = {pool.submit(_render_png, spec, path): name for name, (spec, path) in order}
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+                    status[futures[future]] = 'rendered'
+
+    with open(index_path, 'w') as f:
+        json.dump(dict(sorted(index.items())), f, indent=2)
+    return status
+
+def _slug(name):
+    return re.sub(r'[^0-9A-Za-z]+', '_', name).strip('_').lower()
+
+def _start_renderer():
+    # Render an empty chart so the worker's JavaScript engine is warm before real work
+    import vl_convert
+    from altair.utils._importers import vl_version_for_vl_convert
+    vl_convert.vegalite_to_png({'mark': 'point', 'data': {'values': []}}, vl_version=vl_version_for_vl_convert())
+
+def _render_png(spec, path):
+    import vl_convert
+    from altair.utils._importers import vl_version_for_vl_convert
+    png = vl_convert.vegalite_to_png(spec, vl_version=vl_version_for_vl_convert(), scale=1)
+    # Write to a temporary file first so an interrupted run never leaves a partial PNG
+    with open(path + '.tmp', 'wb') as f:
+        f.write(png)
+    os.replace(path + '.tmp', path)
@@ -0,0 +1,157 @@
+import math
+import numpy as np
+import pandas as pd
+
+CATEGORICAL_FEATURES = ["Application order", "Course", "Nacionality", "Gender",
+                        "Marital status", "Application mode", "Daytime/evening attendance",
+                        "Previous qualification", "Mother qualification",  "Mother occupation",
+                        "Father qualification", "Father occupation", "Displaced",
+                        "Educational special needs", "Debtor", "Tuition fees up to date",
+                        "Scholarship holder", "International"]
+
+NUMERIC_FEATURES = ["Previous qualification (grade)", "Admission grade", "Age at enrollment",
+                    "Curricular units 1st sem (credited)", "Curricular units 1st sem (enrolled)",
+                    "Curricular units 1st sem (evaluations)", "Curricular units 1st sem (approved)",
+                    "Curricular units 1st sem (grade)", "Curricular units 1st sem (without evaluations)",
+                    "Curricular units 2nd sem (credited)", "Curricular units 2nd sem (enrolled)",
+                    "Curricular units 2nd sem (evaluations)", "Curricular units 2nd sem (approved)",
+                    "Curricular units 2nd sem (grade)", "Curricular units 2nd sem (without evaluations)",
+                    "Unemployment rate", "Inflation rate", "GDP"]
+
+def summarize_eda(df, features, target='Target'):
+    """
+    Counts the rows of each (value, target) pair of every feature.
+
+    The counts are all the EDA charts need: bar charts plot them directly and
+    histograms are binned from them, so the charts never see the raw rows. Their size
+    grows with the number of distinct values rather than the number of rows, and the
+    summaries of chunks can be combined with ``merge_eda_summaries``, e.g. while the
+    raw data is streamed through cleaning and validation.
+
+    Parameters:
+    df : pandas.DataFrame
+        The data, with the feature columns and the target column.
+    features : list of str
+        The columns to summarize.
+    target : str, optional
+        The target column. Default is 'Target'.
+
+    Returns:
+    dict
+        A summary with the 'target' column name and the 'counts' of each feature, a
+        pandas.Series indexed by (value, target). Missing values are not counted.
+    """
+    counts = {}
+    for feature in features:
+        counts[feature] = df.groupby([feature, target], sort=True, observed=True).size().rename('count')
+    return {'target': target, 'counts': counts}
+
+def merge_eda_summaries(a, b):
+    """
+    Combines the summaries of two disjoint parts of the data.
+
+    Parameters:
+    a, b : dict
+        Summaries returned by ``summarize_eda`` over the same features.
+
+    Returns:
+    dict
+        The summary of both parts.
+
+    Raises:
+    ValueError
+        If the summaries do not cover the same features and target.
+    """
+    if a['target'] != b['target'] or list(a['counts']) != list(b['counts']):
+        raise ValueError("Cannot merge EDA summaries of different features.")
+    counts = {feature: a['counts'][feature].add(b['counts'][feature], fill_value=0).astype(np.int64)
+              for feature in a['counts']}
+    return {'target': a['target'], 'counts': counts}
+
+def save_eda_summary(summary, path):
+    """
+    Writes a summary as a long CSV table of feature, value, target and count.
+    """
+    tables = [counts.reset_index().set_axis(['value', summary['target'], 'count'], axis=1).assign(feature=feature)
+              for feature, counts in summary['counts'].items()]
+    table = pd.concat(tables, ignore_index=True)
+    table[['feature', 'value', summary['target'], 'count']].to_csv(path, index=False)
+
+def load_eda_summary(path):
+    """
+    Reads a summary written by ``save_eda_summary``.
+    """
+    table = pd.read_csv(path)
+    target = table.columns[2]
+    counts = {}
+    for feature, rows in table.groupby('feature', sort=False):
+        index = pd.MultiIndex.from_arrays([rows['value'].to_numpy(), rows[target].to_numpy()], names=[feature, target])
+        counts[feature] = pd.Series(rows['count'].to_numpy(), index=index, name='count')
+    return {'target': target, 'counts': counts}
+
+def categorical_counts(summary, feature):
+    """
+    Returns the count of every (value, target) pair of a feature as a small DataFrame
+    with the columns feature, target and 'count'.
+    """
+    return summary['counts'][feature].reset_index()
+
+def numerical_histogram(summary, feature, maxbins=30):
+    """
+    Bins the counts of a numeric feature into a histogram per target.
+
+    The bins are "nice" bins over the extent of the feature, chosen like Vega-Lite's
+    ``bin(maxbins=...)``, so the chart looks the same as when Vega-Lite bins the rows.
+
+    Parameters:
+    summary : dict
+        A summary returned by ``summarize_eda``.
+    feature : str
+        A numeric feature of the summary.
+    maxbins : int, optional
+        Largest number of bins. Default is 30.
+
+    Returns:
+    pandas.DataFrame
+        One row per non-empty (bin, target) pair with the columns 'bin_start',
+        'bin_end', the target and 'count'.
+    """
+    counts = summary['counts'][feature]
+    target = summary['target']
+    values = counts.index.get_level_values(0).to_numpy(dtype=float)
+    if len(values) == 0:
+        return pd.DataFrame(columns=['bin_start', 'bin_end', target, 'count'])
+
+    edges = nice_bin_edges(values.min(), values.max(), maxbins)
+    step = edges[1] - edges[0]
+    bins = np.clip(np.floor((values - edges[0]) / step + 1e-9).astype(int), 0, len(edges) - 2)
+    histogram = (pd.DataFrame({'bin': bins, target: counts.index.get_level_values(1), 'count': counts.to_numpy()})
+                 .groupby(['bin', target], sort=True)['count'].sum().reset_index())
+    histogram.insert(0, 'bin_start', edges[histogram['bin']])
+    histogram.insert(1, 'bin_end', edges[histogram['bin'] + 1])
+    return histogram.drop(columns='bin')
+
+def nice_bin_edges(start, stop, maxbins=30):
+    """
+    Returns evenly spaced bin edges covering [start, stop] with a step of 1, 2 or 5
+    times a power of ten and at most ``maxbins`` bins, as Vega-Lite bins a field.
+    """
+    span = stop - start
+    if span <= 0:
+        return np.array([start, start + 1.0])
+
+    level = math.ceil(math.log(maxbins) / math.log(10))
+    step = 10 ** (round(math.log10(span)) - level)
+    while math.ceil(span / step) > maxbins:
+        step *= 10
+    for divisor in [5, 2]:
+        if span / (step / divisor) <= maxbins:
+            step /= divisor
+
+    precision = 0 if step >= 1 else int(-math.log10(step)) + 1
+    eps = 10 ** (-precision - 1)
+    nice_start = math.floor(start / step + eps) * step
+    start = nice_start - step if start < nice_start else nice_start
+    stop = math.ceil(stop / step) * step
+    n_bins = max(int(round((stop - start) / step)), 1)
+    return start + step * np.arange(n_bins + 1)
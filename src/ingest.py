@@ -0,0 +1,259 @@
+import glob
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+import pandas as pd
+from src.check_csv import read_sniffed_csv
+from src.columnar_cache import convert_to_columnar
+from src.eda_summary import CATEGORICAL_FEATURES, NUMERIC_FEATURES, summarize_eda, merge_eda_summaries, save_eda_summary
+from src.instrumentation import stage
+from src.read_zip import read_zip_csv
+from src.row_fingerprint import FingerprintIndex, row_fingerprints, duplicate_violations
+from src.run_validators import run_checks
+from src.validate_correlation import summarize_correlation, merge_correlation_summaries, validate_correlation_summary
+from src.validate_distribution import summarize_distribution, merge_distribution_summaries, validate_distribution_summary
+from src.validate_quantiles import summarize_quantiles, merge_quantile_summaries, validate_quantile_summary
+from src.validate_schema import validate_schema
+
+# Processed outputs of every shard, one directory tree each
+OUTPUTS = ['clean', 'train', 'test']
+
+def clean_columns(df):
+    """Fixes the column names of the raw data in place."""
+    # Remove extra '\t' from the column name
+    df.rename(columns = {"Daytime/evening attendance\t" : "Daytime/evening attendance"}, inplace = True)
+
+    # Remove ' from column name to prevent issues with Altair plots
+    df.columns = df.columns.str.replace("'s", "", regex=False)
+    return df
+
+def read_raw(file_path, chunksize=None, member=None, descriptor=None):
+    """
+    Reads the raw data, straight from the zip file without extracting it when
+    `file_path` ends with '.zip'. A CSV file is parsed with the delimiter and dtypes
+    of its `sniff_csv` descriptor when one is given.
+
+    Returns:
+        pandas.DataFrame or iterator of pandas.DataFrame: The raw data, or its chunks
+        when `chunksize` is given.
+    """
+    if file_path.endswith(".zip"):
+        return read_zip_csv(file_path, member=member, chunksize=chunksize, delimiter=';')
+    if descriptor is not None:
+        return read_sniffed_csv(descriptor, chunksize=chunksize)
+    return pd.read_csv(file_path, delimiter=';', chunksize=chunksize)
+
+def find_raw_files(source):
+    """
+    Lists the raw files to ingest, sorted by path.
+
+    Args:
+        source (str): A directory, whose '.csv' and '.zip' files are listed, or a
+                      glob pattern such as 'data/raw/*_2024-*.csv'.
+
+    Returns:
+        list: The paths of the raw files.
+    """
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source) if name.endswith(('.csv', '.zip')))
+    return sorted(glob.glob(source))
+
+def partition_of(file_path, pattern=None):
+    """
+    Returns the partition of a raw file, as the relative directory its processed
+    rows are written to.
+
+    Args:
+        file_path (str): Path of the raw file.
+        pattern (str, optional): Regular expression with named groups, searched in the
+                                 file name. The partition has one 'name=value' directory
+                                 per group, e.g. the pattern
+                                 '(?P<institution>[a-z]+)_(?P<term>[0-9]{4}-[12])' puts
+                                 'porto_2024-1.csv' in 'institution=porto/term=2024-1'.
+                                 Defaults to one partition per file, named after it.
+
+    Raises:
+        ValueError: If the file name does not match the pattern.
+    """
+    name = os.path.basename(file_path)
+    if pattern is None:
+        return os.path.splitext(name)[0]
+    match = re.search(pattern, name)
+    if match is None or not match.groupdict():
+        raise ValueError(f"File name {name} does not match the partition pattern {pattern}.")
+    return os.path.join(*(f"{key}={value}" for key, value in match.groupdict().items()))
+
+def shard_outputs(output_dir, partition, file_path):
+    """
+    Returns the paths of the clean, train and test CSV files of a raw file:
+    '<output_dir>/<clean|train|test>/<partition>/<file name>.csv'.
+    """
+    name = os.path.splitext(os.path.basename(file_path))[0] + '.csv'
+    return [os.path.join(output_dir, kind, partition, name) for kind in OUTPUTS]
+
+def ingest_shard(file_path, partition, output_dir, chunksize=100_000, fingerprint_bits=128):
+    """
+    Cleans, validates and splits one raw file, the work of one worker of
+    ``ingest_shards``.
+
+    The file is read in chunks of `chunksize` rows, the schema is validated on every
+    chunk and the rows are split into train and test rows with the same random state
+    as `scripts/data_cleaning_validation.py`, so the split does not depend on which
+    worker processes the file. The rows are written to the '.tmp' siblings of
+    ``shard_outputs``, which ``ingest_shards`` moves into place once the merged report
+    passes.
+
+    Returns:
+        dict: The ``path``, ``partition`` and number of ``rows`` of the shard, the
+              ``error`` that stopped it (None if its schema is valid), and, for a valid
+              shard, its ``distribution``, ``quantiles``, ``correlation`` and train
+              ``eda`` summaries and its row ``fingerprints``.
+    """
+    rng = np.random.RandomState(123)
+    outputs = [path + '.tmp' for path in shard_outputs(output_dir, partition, file_path)]
+    result = {'path': file_path, 'partition': partition, 'rows': 0, 'error': None}
+    summaries = {}
+    fingerprints = []
+    try:
+        for path in outputs:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        for i, chunk in enumerate(read_raw(file_path, chunksize=chunksize)):
+            clean_columns(chunk)
+            mode, header = ('w', True) if i == 0 else ('a', False)
+            chunk.to_csv(outputs[0], mode=mode, header=header)
+            validate_schema(chunk)
+            fingerprints.append(row_fingerprints(chunk, bits=fingerprint_bits))
+
+            in_train = rng.random_sample(len(chunk)) < 0.8
+            chunk[in_train].to_csv(outputs[1], mode=mode, header=header)
+            chunk[~in_train].to_csv(outputs[2], mode=mode, header=header)
+            chunk_summaries = {
+                'distribution': summarize_distribution(chunk),
+                'quantiles': summarize_quantiles(chunk),
+                'correlation': summarize_correlation(chunk),
+                'eda': summarize_eda(chunk[in_train], CATEGORICAL_FEATURES + NUMERIC_FEATURES)
+            }
+            summaries = chunk_summaries if i == 0 else {
+                name: _MERGE[name](summaries[name], summary) for name, summary in chunk_summaries.items()
+            }
+            result['rows'] += len(chunk)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        return result
+    if not summaries:
+        result['error'] = "The file has no rows."
+        return result
+    return dict(result, fingerprints=np.concatenate(fingerprints), **summaries)
+
+def ingest_shards(file_paths, output_dir, workers=None, partition_pattern=None, chunksize=100_000, index_dir=None):
+    """
+    Cleans, validates and splits many raw files in a pool of worker processes.
+
+    Each file is a shard processed by ``ingest_shard``; its rows are written under
+    ``output_dir``, partitioned as given by ``partition_of``. The workers send back the
+    mergeable summaries of their shard, which are merged in file order, and one merged
+    report is produced: the schema check passes if every shard's schema is valid, the
+    distribution, quantile and correlation checks run on the merged summaries, and
+    duplicate rows across all shards are found with a `FingerprintIndex`, the persistent
+    one in `index_dir` if given. The outputs are moved into place, the merged EDA
+    counts saved to '<output_dir>/train_eda_summary.csv', the Parquet copies written
+    and new fingerprints indexed only if the report passes.
+
+    Args:
+        file_paths (list): Paths of the raw files, e.g. from ``find_raw_files``.
+        output_dir (str): Directory of the partitioned outputs.
+        workers (int, optional): Number of worker processes. Defaults to the number
+                                 of CPUs.
+        partition_pattern (str, optional): See ``partition_of``.
+        chunksize (int, optional): Number of rows a worker reads at a time. Default is 100,000.
+        index_dir (str, optional): Directory of a persistent fingerprint index.
+
+    Returns:
+        dict: The report described in ``run_checks``, with a ``shards`` list of the
+              ``path``, ``partition``, ``rows`` and ``error`` of every shard.
+
+    Raises:
+        ValueError: If a file name does not match the partition pattern, or two files
+                    would be written to the same output.
+    """
+    partitions = [partition_of(path, partition_pattern) for path in file_paths]
+    outputs = [shard_outputs(output_dir, partition, path) for path, partition in zip(file_paths, partitions)]
+    seen = {}
+    for path, paths in zip(file_paths, outputs):
+        if paths[0] in seen:
+            raise ValueError(f"{seen[paths[0]]} and {path} would both be written to {paths[0]}.")
+        seen[paths[0]] = path
+
+    workers = workers or os.cpu_count()
+    tmp_dir = tempfile.TemporaryDirectory() if index_dir is None else None
+    index = FingerprintIndex(index_dir or tmp_dir.name)
+    shards = []
+    merged = {}
+    duplicates = []
+    report = None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            with stage('ingest_shards', shards=len(file_paths), workers=workers) as record:
+                work = partial(ingest_shard, output_dir=output_dir, chunksize=chunksize, fingerprint_bits=index.bits)
+                for result in executor.map(work, file_paths, partitions):
+                    shards.append({key: result[key] for key in ['path', 'partition', 'rows', 'error']})
+                    if result['error'] is not None:
+                        continue
+                    duplicates.append((result['path'], index.check_and_add(result['fingerprints'], result['path'])))
+                    merged = {name: result[name] if name not in merged else merge(merged[name], result[name])
+                              for name, merge in _MERGE.items()}
+                record['rows'] = sum(shard['rows'] for shard in shards)
+
+            with stage('merged_summary_checks'):
+                report = run_checks({
+                    "validate_schema": partial(_validate_shards, shards),
+                    "validate_distribution": partial(_validate_merged, validate_distribution_summary, merged.get('distribution')),
+                    "validate_quantiles": partial(_validate_merged, validate_quantile_summary, merged.get('quantiles')),
+                    "validate_correlation": partial(_validate_merged, validate_correlation_summary, merged.get('correlation')),
+                    "validate_duplicates": partial(_validate_duplicates, duplicates)
+                })
+            report["shards"] = shards
+
+            if report["passed"]:
+                final = [path for paths in outputs for path in paths]
+                for path in final:
+                    os.replace(path + '.tmp', path)
+                save_eda_summary(merged['eda'], os.path.join(output_dir, "train_eda_summary.csv"))
+                with stage('write_columnar', files=len(final)):
+                    list(executor.map(partial(convert_to_columnar, chunksize=chunksize), final))
+    finally:
+        if report is not None and report["passed"]:
+            index.commit()
+        else:
+            index.rollback()
+            for path in [path + '.tmp' for paths in outputs for path in paths]:
+                if os.path.exists(path):
+                    os.remove(path)
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+    return report
+
+_MERGE = {
+    'distribution': merge_distribution_summaries,
+    'quantiles': merge_quantile_summaries,
+    'correlation': merge_correlation_summaries,
+    'eda': merge_eda_summaries
+}
+
+def _validate_shards(shards):
+    errors = [f"{shard['path']}: {line}" for shard in shards if shard['error'] for line in shard['error'].splitlines()]
+    if errors:
+        raise Exception("\n".join(errors))
+
+def _validate_merged(validate, summary):
+    if summary is None:
+        raise Exception("No shard passed the schema check.")
+    validate(summary)
+
+def _validate_duplicates(duplicates):
+    violations = [violation for source, found in duplicates for violation in duplicate_violations(found, source)]
+    if violations:
+        raise Exception("\n".join(violations))
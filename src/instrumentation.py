@@ -0,0 +1,145 @@
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_CONFIG = {'metrics_path': None, 'profile_dir': None}
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+def configure(metrics_path=None, profile_dir=None):
+    """
+    Sets where stage records and profiles are written for the rest of the process.
+
+    Parameters:
+    metrics_path : str, optional
+        File the stage records are appended to as JSON lines. Use '-' for standard
+        error. When None, records are not written.
+    profile_dir : str, optional
+        Directory a cProfile dump '<stage>.prof' is written to for every stage. When
+        None, stages are not profiled.
+    """
+    _CONFIG['metrics_path'] = metrics_path
+    _CONFIG['profile_dir'] = profile_dir
+    if profile_dir is not None:
+        os.makedirs(profile_dir, exist_ok=True)
+
+def peak_rss_mb():
+    """Returns the peak resident set size of the process so far in MB, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+@contextlib.contextmanager
+def stage(name, rows=None, **fields):
+    """
+    Measures a stage of the pipeline and emits one JSON record for it.
+
+    The record holds the stage name, the wall time and process CPU time in seconds,
+    the peak RSS of the process at the end of the stage and how much the stage raised
+    it (in MB), the number of rows processed and the throughput, whether the stage
+    raised, and any extra ``fields``. The caller can set or update fields, such as
+    'rows', on the yielded record before the stage ends.
+
+    When profiling is configured the outermost stage of each thread is run under
+    cProfile and dumped to '<profile_dir>/<name>.prof'.
+
+    Parameters:
+    name : str
+        Name of the stage, e.g. 'validate_schema'.
+    rows : int, optional
+        Number of rows the stage processes.
+    **fields
+        Extra JSON-serializable values stored in the record.
+
+    Yields:
+    dict
+        The record, emitted when the stage ends.
+
+    Example:
+    >>> with stage('read_data') as record:
+    ...     df = pd.read_csv(path)
+    ...     record['rows'] = len(df)
+    """
+    record = {'stage': name, 'rows': rows, **fields}
+    depth = getattr(_LOCAL, 'depth', 0)
+    profiler = cProfile.Profile() if _CONFIG['profile_dir'] is not None and depth == 0 else None
+
+    peak_before = peak_rss_mb()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    _LOCAL.depth = depth + 1
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield record
+        record['status'] = 'ok'
+    except BaseException as e:
+        record['status'] = 'error'
+        record['error'] = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        _LOCAL.depth = depth
+        wall_time = time.perf_counter() - wall_start
+        peak_after = peak_rss_mb()
+        record.update(
+            wall_time_s=wall_time,
+            cpu_time_s=time.process_time() - cpu_start,
+            peak_rss_mb=peak_after,
+            rss_growth_mb=None if peak_after is None else peak_after - peak_before,
+            timestamp=time.time(),
+            pid=os.getpid()
+        )
+        if record['rows'] is not None:
+            record['rows_per_s'] = record['rows'] / wall_time if wall_time > 0 else None
+        if profiler is not None:
+            profiler.dump_stats(os.path.join(_CONFIG['profile_dir'], f'{name}.prof'))
+        _emit(record)
+
+def instrumented(name=None, rows=None):
+    """
+    Decorator that runs every call of a function as a ``stage``.
+
+    Parameters:
+    name : str, optional
+        Name of the stage. Defaults to the function name.
+    rows : callable, optional
+        Called with the function's arguments to get the number of rows processed,
+        e.g. ``lambda df, *args, **kwargs: len(df)``.
+
+    Example:
+    >>> @instrumented(rows=lambda df, *args, **kwargs: len(df))
+    ... def validate_schema(df):
+    ...     ...
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name or function.__name__, rows=None if rows is None else rows(*args, **kwargs)):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _emit(record):
+    path = _CONFIG['metrics_path']
+    if path is None:
+        return
+    line = json.dumps(record, default=str) + '\n'
+    with _LOCK:
+        if path == '-':
+            sys.stderr.write(line)
+        else:
+            with open(path, 'a') as f:
+                f.write(line)
@@ -1,20 +1,36 @@
 import os
-import pandas as pd
+import numpy as np
 import pickle
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.pipeline import make_pipeline
 from sklearn.model_selection import RandomizedSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV
 from sklearn.compose import make_column_transformer
 from sklearn.preprocessing import StandardScaler
 from scipy.stats import randint
+from src.approximate_knn import LSHKNeighborsClassifier
+from src.columnar_cache import read_processed
+from src.instrumentation import instrumented
+from src.model_artifact import save_artifact
+from src.neighbor_graph_search import NeighborGraphSearchCV
+from src.validate_schema import SCHEMA
 
-def load_data(train_path, test_path):
+KNN_BACKENDS = {
+    'exact': KNeighborsClassifier,
+    'lsh': LSHKNeighborsClassifier
+}
+
+def load_data(train_path, test_path, columns=None, compact=False):
 	"""
 	Loads training and testing data from specified CSV file paths and separates features and target.
+	An up-to-date Parquet copy of a CSV file (see ``src.columnar_cache``) is read instead when present.
 
 	Parameters:
 	train_path (str): Path to the CSV file containing training data.
 	test_path (str): Path to the CSV file containing testing data.
+	columns (list, optional): Feature columns to load. Default loads every column.
+	compact (bool, optional): Downcast the features with ``downcast_features``. Default is False.
 
 	Returns:
 	tuple: A tuple containing:
@@ -24,17 +40,110 @@ def load_data(train_path, test_path):
         - y_test (pandas.Series): Target column of the testing data.
 	"""
     
-	train_df = pd.read_csv(train_path)
-	test_df = pd.read_csv(test_path)
-    
-	X_train = train_df.drop(columns=['Target'])
-	y_train = train_df['Target']
-	X_test = test_df.drop(columns=['Target'])
-	y_test = test_df['Target']
-    
+	if columns is not None:
+		columns = list(columns) + ['Target']
+	train_df = read_processed(train_path, columns=columns)
+	test_df = read_processed(test_path, columns=columns)
+
+	# pop removes the target in place instead of copying every feature column
+	y_train = train_df.pop('Target')
+	y_test = test_df.pop('Target')
+	X_train, X_test = train_df, test_df
+
+	if compact:
+		X_train = downcast_features(X_train)
+		X_test = downcast_features(X_test)
+
 	return X_train, y_train, X_test, y_test
 
-def build_preprocessor():
+def compact_dtypes(columns):
+	"""
+	Chooses a compact dtype for each feature from the ``validate_schema`` schema.
+
+	Coded categorical columns (``isin`` checks, e.g. Course, Nacionality, the qualification
+	and occupation codes and the binary flags) get the smallest of int8/int16 that holds
+	every allowed code, other integer columns get int16 and the grade and rate columns float32.
+
+	Parameters:
+	columns (list): Names of the feature columns.
+
+	Returns:
+	dict: Mapping of column name to NumPy dtype, for the columns in the schema.
+	"""
+	dtypes = {}
+	for name in columns:
+		if name not in SCHEMA.columns:
+			continue
+		column = SCHEMA.columns[name]
+		if str(column.dtype).startswith('float'):
+			dtypes[name] = np.float32
+		elif str(column.dtype).startswith('int'):
+			codes = [check.statistics['allowed_values'] for check in column.checks if check.name == 'isin']
+			small = codes and max(abs(code) for code in codes[0]) <= np.iinfo(np.int8).max
+			dtypes[name] = np.int8 if small else np.int16
+	return dtypes
+
+def downcast_features(X):
+	"""
+	Downcasts the feature columns of a DataFrame to the dtypes from ``compact_dtypes``.
+	Integer columns holding missing values are stored as float32 instead, and an integer
+	column with a value outside the range of its compact dtype gets the next wider
+	integer dtype that holds every value, so no value wraps around.
+
+	Parameters:
+	X (pandas.DataFrame): The features to downcast.
+
+	Returns:
+	pandas.DataFrame: The features with compact dtypes.
+	"""
+	dtypes = compact_dtypes(X.columns)
+	for name, dtype in dtypes.items():
+		if not np.issubdtype(dtype, np.integer):
+			continue
+		if X[name].isna().any():
+			dtypes[name] = np.float32
+			continue
+		low, high = X[name].min(), X[name].max()
+		wider = [t for t in (np.int8, np.int16, np.int32, np.int64) if np.iinfo(t).bits >= np.iinfo(dtype).bits]
+		dtypes[name] = next(t for t in wider if np.iinfo(t).min <= low and high <= np.iinfo(t).max)
+	return X.astype(dtypes)
+
+def build_training_matrix(X, y, directory):
+	"""
+	Stores the features and labels as memory-mapped NumPy arrays.
+
+	The feature matrix is written one column at a time as float32 (every coded column
+	fits exactly), so no full-size copy of X is built in memory. The arrays are reopened
+	read-only; joblib passes memory-mapped arrays to the worker processes of
+	RandomizedSearchCV by file reference instead of pickling a copy for each worker.
+
+	Parameters:
+	X (pandas.DataFrame): The features.
+	y (pandas.Series): The target labels.
+	directory (str): Directory where 'X.npy' and 'y.npy' are written.
+
+	Returns:
+	tuple: A tuple containing:
+        - X (numpy.memmap): The features, shape (n_samples, n_features), float32.
+        - y (numpy.memmap): The labels encoded as int8 indices into ``classes``.
+        - classes (numpy.ndarray): The sorted class labels.
+	"""
+	os.makedirs(directory, exist_ok=True)
+	X_path = os.path.join(directory, 'X.npy')
+	y_path = os.path.join(directory, 'y.npy')
+
+	X_mm = np.lib.format.open_memmap(X_path, mode='w+', dtype=np.float32, shape=X.shape)
+	for j, name in enumerate(X.columns):
+		X_mm[:, j] = X[name].to_numpy(dtype=np.float32)
+	X_mm.flush()
+	del X_mm
+
+	classes, codes = np.unique(np.asarray(y), return_inverse=True)
+	np.save(y_path, codes.astype(np.int8))
+
+	return np.load(X_path, mmap_mode='r'), np.load(y_path, mmap_mode='r'), classes
+
+def build_preprocessor(feature_names=None):
 	"""
 	Builds and returns a column transformer for preprocessing data, which scales numeric features 
 	and drops specified non-numeric or irrelevant features.
@@ -42,6 +151,11 @@ def build_preprocessor():
 	Numeric features are standardized using StandardScaler, while certain categorical or redundant 
 	features are dropped.
 
+	Parameters:
+	feature_names (list, optional): Column names of the feature matrix. When given, columns are
+	    selected by position so the preprocessor works on NumPy arrays (e.g. from
+	    ``build_training_matrix``) instead of DataFrames.
+
 	Returns:
 	sklearn.compose.ColumnTransformer: A preprocessor configured with:
         - StandardScaler for specified numeric features.
@@ -64,6 +178,11 @@ def build_preprocessor():
         "Mother occupation", "Father qualification", "Father occupation"
     ]
     
+	if feature_names is not None:
+		positions = {name: i for i, name in enumerate(feature_names)}
+		numeric_features = [positions[name] for name in numeric_features]
+		drop_features = [positions[name] for name in drop_features]
+
 	preprocessor = make_column_transformer(
         (StandardScaler(), numeric_features),
         ('drop', drop_features)
@@ -71,13 +190,22 @@ def build_preprocessor():
     
 	return preprocessor
 
-def build_pipeline(preprocessor):
+def build_pipeline(preprocessor, backend='exact', **backend_params):
     """
     Build and return a machine learning pipeline for a KNN classifier.
     
     Parameters:
     preprocessor : sklearn.compose.ColumnTransformer or similar
         A preprocessor object that will be applied to the data before the KNN classifier. 
+
+    backend : str, optional
+        The neighbour search backend: 'exact' for sklearn's KNeighborsClassifier (default)
+        or 'lsh' for the approximate LSHKNeighborsClassifier in ``src.approximate_knn``.
+
+    **backend_params
+        Parameters passed to the classifier, e.g. ``n_tables`` or ``n_bits`` for 'lsh'.
+        The random hyperplanes of 'lsh' are seeded with ``random_state=42`` unless
+        another one is given, so searches can be reproduced.
     
     Returns:
     pipeline : sklearn.pipeline.Pipeline
@@ -88,12 +216,18 @@ def build_pipeline(preprocessor):
     >>> preprocessor = StandardScaler()
     >>> p
     """
+    if backend not in KNN_BACKENDS:
+        raise ValueError(f"Unknown neighbour search backend: {backend}.")
+    if backend == 'lsh':
+        backend_params.setdefault('random_state', 42)
+
     return make_pipeline(
         preprocessor,
-        KNeighborsClassifier()
+        KNN_BACKENDS[backend](**backend_params)
     )
 
-def perform_random_search(X_train, y_train, pipeline):
+@instrumented(rows=lambda X_train, *args, **kwargs: len(X_train))
+def perform_random_search(X_train, y_train, pipeline, refit=True):
     """
     Perform RandomizedSearchCV to tune hyperparameters for a KNN classifier pipeline.
 
@@ -106,6 +240,9 @@ def perform_random_search(X_train, y_train, pipeline):
         
     pipeline : sklearn.pipeline.Pipeline
         The machine learning pipeline that includes preprocessing steps and a KNeighborsClassifier.
+
+    refit : bool, optional
+        Whether to refit the best pipeline on the whole training data. Default is True.
     
     Returns:
     random_search : sklearn.model_selection.RandomizedSearchCV
@@ -120,8 +257,9 @@ def perform_random_search(X_train, y_train, pipeline):
     >>> random_search = perform_random_search(X_train, y_train, pipeline)
     >>> print(random_search.best_params_)
     """
+    # The classifier step is named after the backend class, e.g. 'kneighborsclassifier'
     param_distributions = {
-        'kneighborsclassifier__n_neighbors': randint(1, 30)
+        f'{pipeline.steps[-1][0]}__n_neighbors': randint(1, 30)
     }
 
     random_search = RandomizedSearchCV(
@@ -131,21 +269,123 @@ def perform_random_search(X_train, y_train, pipeline):
         cv=5,
         scoring='accuracy',
         random_state=42,
-        n_jobs=-1
+        n_jobs=-1,
+        refit=refit
     )
     
     random_search.fit(X_train, y_train)
     
     return random_search
 
-def save_best_model(best_model, pipeline_to):
+@instrumented(rows=lambda X_train, *args, **kwargs: len(X_train))
+def perform_halving_search(X_train, y_train, pipeline, n_candidates=50, factor=3, refit=True):
+    """
+    Perform a successive-halving random search to tune n_neighbors for a KNN classifier pipeline.
+
+    All candidates are first scored with 5-fold cross-validation on a small random subsample
+    of the training rows. Only the best 1/``factor`` of them are promoted to the next round,
+    which uses ``factor`` times as many rows, until the last round scores the survivors on
+    the full training set. Compared to ``perform_random_search`` most of the fits happen on
+    small subsamples.
+
+    Parameters:
+    X_train : array-like, shape (n_samples, n_features)
+        The training data used to fit the model.
+        
+    y_train : array-like, shape (n_samples,)
+        The target labels corresponding to the training data.
+        
+    pipeline : sklearn.pipeline.Pipeline
+        The machine learning pipeline that includes preprocessing steps and a KNN classifier.
+
+    n_candidates : int, optional
+        Compute budget: the number of candidates sampled for the first round. Default is 50.
+
+    factor : int, optional
+        Share of candidates kept (1/factor) and growth of the subsample between rounds. Default is 3.
+
+    refit : bool, optional
+        Whether to refit the best pipeline on the whole training data. Default is True.
+    
+    Returns:
+    halving_search : sklearn.model_selection.HalvingRandomSearchCV
+        The fitted search, containing the best hyperparameters and model.
+
+    Example:
+    >>> halving_search = perform_halving_search(X_train, y_train, pipeline, n_candidates=100)
+    >>> print(halving_search.best_params_)
+    """
+    param_distributions = {
+        f'{pipeline.steps[-1][0]}__n_neighbors': randint(1, 30)
+    }
+
+    # Like min_resources='exhaust', but each training fold of the first round must
+    # still hold at least 29 rows so every sampled n_neighbors can be fit
+    n_rounds = 1 + int(np.floor(np.log(n_candidates) / np.log(factor)))
+    min_resources = max(len(y_train) // factor ** (n_rounds - 1), 40)
+
+    halving_search = HalvingRandomSearchCV(
+        estimator=pipeline,
+        param_distributions=param_distributions,
+        n_candidates=n_candidates,
+        factor=factor,
+        resource='n_samples',
+        min_resources=min_resources,
+        cv=5,
+        scoring='accuracy',
+        random_state=42,
+        n_jobs=-1,
+        refit=refit
+    )
+
+    halving_search.fit(X_train, y_train)
+
+    return halving_search
+
+@instrumented(rows=lambda X_train, *args, **kwargs: len(X_train))
+def perform_neighbor_graph_search(X_train, y_train, pipeline, refit=True):
+    """
+    Tune n_neighbors for a KNN classifier pipeline with one neighbour search per fold.
+
+    Every k from 1 to 29 (the range sampled by ``perform_random_search``) is scored with
+    5-fold cross-validation by ``NeighborGraphSearchCV``, which finds the 29 nearest
+    neighbours of each validation row once and scores each k from that sorted list.
+
+    Parameters:
+    X_train : array-like, shape (n_samples, n_features)
+        The training data used to fit the model.
+        
+    y_train : array-like, shape (n_samples,)
+        The target labels corresponding to the training data.
+        
+    pipeline : sklearn.pipeline.Pipeline
+        The machine learning pipeline that includes preprocessing steps and a KNN classifier.
+
+    refit : bool, optional
+        Whether to refit the best pipeline on the whole training data. Default is True.
+
+    Returns:
+    search : src.neighbor_graph_search.NeighborGraphSearchCV
+        The fitted search, with the same ``cv_results_``, ``best_params_``, ``best_score_``
+        and ``best_estimator_`` attributes as RandomizedSearchCV.
+
+    Example:
+    >>> search = perform_neighbor_graph_search(X_train, y_train, pipeline)
+    >>> print(search.best_params_)
+    """
+    search = NeighborGraphSearchCV(pipeline, max_neighbors=29, cv=5, refit=refit)
+    return search.fit(X_train, y_train)
+
+def save_best_model(best_model, pipeline_to, cv_score=None, feature_dtypes=None):
 
     """
     Save the best model pipeline to the specified path.
     
     This function serializes and saves the given `best_model` (e.g., the best model 
     obtained from RandomizedSearchCV) to a file in the specified directory. The 
-    model is saved in a pickle file format.
+    model is saved in a pickle file format. When the pipeline is a scaler followed by
+    an exact KNN classifier, it is also saved as a memory-mappable artifact (see
+    ``src.model_artifact``) that scoring workers load in milliseconds.
 
     Parameters:
     best_model : sklearn.pipeline.Pipeline or similar
@@ -153,17 +393,30 @@ def save_best_model(best_model, pipeline_to):
         
     pipeline_to : str
         The directory path where the model will be saved. The model will be stored as 
-        'best_knn_pipeline.pickle' in this directory.
+        'best_knn_pipeline.pickle' in this directory, and the artifact in its
+        'best_knn_artifact' subdirectory.
+
+    cv_score : float, optional
+        Cross-validation score of the model, recorded in the artifact manifest.
+
+    feature_dtypes : dict or pandas.Series, optional
+        Dtypes of the training columns, recorded in the artifact manifest.
     
     Returns:
     None
     
     Example:
-    >>> save_best_model(random_search.best_estimator_, './models')
+    >>> save_best_model(random_search.best_estimator_, './models', cv_score=random_search.best_score_)
     """
     with open(os.path.join(pipeline_to, 'best_knn_pipeline.pickle'), 'wb') as f:
         pickle.dump(best_model, f)
 
+    # Other backends (e.g. LSH) are only saved as a pickle
+    if isinstance(best_model[-1], KNeighborsClassifier):
+        save_artifact(best_model, os.path.join(pipeline_to, 'best_knn_artifact'),
+                      cv_score=cv_score, feature_dtypes=feature_dtypes)
+
+@instrumented(rows=lambda best_model, X_test, *args, **kwargs: len(X_test))
 def evaluate_model(best_model, X_test, y_test):
     """
     Evaluate the model on the test data.
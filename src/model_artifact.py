@@ -0,0 +1,370 @@
+import datetime
+import hashlib
+import json
+import os
+import numpy as np
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import StandardScaler
+
+FORMAT_NAME = 'knn-artifact'
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+def save_artifact(pipeline, directory, cv_score=None, feature_dtypes=None):
+    """
+    Saves a fitted scaler + KNN pipeline as raw arrays plus a JSON manifest.
+
+    The scaler mean and scale, the scaled KNN training matrix, its squared row norms
+    and the encoded labels are each written as a '.npy' file, so ``load_artifact`` can
+    memory-map them instead of unpickling the whole object graph. ``manifest.json``
+    records the format version, the feature list and dtypes, the hyperparameters, the
+    classes, the CV score and a SHA-256 hash of the training matrix and labels.
+
+    Parameters:
+    pipeline : sklearn.pipeline.Pipeline
+        Fitted pipeline of a StandardScaler (alone or inside a ColumnTransformer that
+        drops every other column, as built by ``build_preprocessor``) followed by a
+        KNeighborsClassifier using Euclidean distance.
+    directory : str
+        Directory the artifact is written to. It is created if needed.
+    cv_score : float, optional
+        Cross-validation score of the pipeline, stored in the manifest.
+    feature_dtypes : dict or pandas.Series, optional
+        Dtype of each input column, e.g. ``X_train.dtypes``, stored in the manifest.
+
+    Returns:
+    dict
+        The manifest that was written.
+
+    Raises:
+    ValueError
+        If the pipeline is not a fitted scaler + Euclidean KNN pipeline, or if the
+        installed scikit-learn does not store the training data where expected.
+
+    Example:
+    >>> save_artifact(random_search.best_estimator_, 'results/models/best_knn_artifact',
+    ...               cv_score=random_search.best_score_, feature_dtypes=X_train.dtypes)
+    """
+    scaler, features, input_features = _unpack_preprocessor(pipeline[:-1])
+    knn = pipeline[-1]
+    if not isinstance(knn, KNeighborsClassifier) or not hasattr(knn, 'n_samples_fit_'):
+        raise ValueError("The last step of the pipeline must be a fitted KNeighborsClassifier.")
+    if knn.weights not in ('uniform', 'distance') or not (
+            knn.metric == 'euclidean' or (knn.metric == 'minkowski' and knn.p == 2)):
+        raise ValueError("Only uniform or distance weights with Euclidean distance can be saved as an artifact.")
+
+    fit_X, labels = _training_data(knn)
+    n_features = len(features)
+    arrays = {
+        'scaler_mean': np.asarray(scaler.mean_ if scaler.with_mean else np.zeros(n_features), dtype=np.float64),
+        'scaler_scale': np.asarray(scaler.scale_ if scaler.with_std else np.ones(n_features), dtype=np.float64),
+        'fit_X': fit_X,
+        'fit_sq_norms': np.einsum('ij,ij->i', fit_X, fit_X),
+        'labels': labels
+    }
+
+    data_hash = hashlib.sha256()
+    data_hash.update(fit_X.tobytes())
+    data_hash.update(labels.tobytes())
+
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f'{name}.npy'), array)
+
+    return write_manifest(directory, arrays, features=features, input_features=input_features,
+                          feature_dtypes=feature_dtypes, n_neighbors=knn.n_neighbors, weights=knn.weights,
+                          classes=knn.classes_, cv_score=cv_score, data_hash=data_hash.hexdigest(),
+                          estimator=type(knn).__name__)
+
+def _training_data(knn):
+    # KNeighborsClassifier has no public accessor for its training matrix and encoded
+    # labels; the private attributes are checked against the public ones so a
+    # scikit-learn release that changes them fails here instead of saving a bad artifact
+    if getattr(knn, 'outputs_2d_', False):
+        raise ValueError("Only a KNeighborsClassifier fitted on a single target can be saved as an artifact.")
+    fit_X = getattr(knn, '_fit_X', None)
+    labels = getattr(knn, '_y', None)
+    if (not isinstance(fit_X, np.ndarray) or fit_X.shape != (knn.n_samples_fit_, knn.n_features_in_)
+            or not isinstance(labels, np.ndarray) or labels.shape != (knn.n_samples_fit_,)
+            or not np.issubdtype(labels.dtype, np.integer)
+            or (len(labels) and (labels.min() < 0 or labels.max() >= len(knn.classes_)))):
+        raise ValueError(f"Cannot read the training data of a KNeighborsClassifier from scikit-learn "
+                         f"{sklearn.__version__}; artifacts are written from its private '_fit_X' and "
+                         f"'_y' attributes, written against scikit-learn 1.5. Save the pipeline as "
+                         f"a pickle instead.")
+    return np.ascontiguousarray(fit_X, dtype=np.float64), labels.astype(np.int32)
+
+def write_manifest(directory, arrays, features, input_features, feature_dtypes, n_neighbors, weights,
+                   classes, cv_score, data_hash, estimator='KNeighborsClassifier'):
+    """
+    Writes the 'manifest.json' of an artifact whose '.npy' arrays are already in
+    ``directory``. Used by ``save_artifact`` and by writers that build the arrays
+    on disk, such as ``src.out_of_core``.
+
+    Parameters:
+    directory : str
+        Directory of the artifact.
+    arrays : dict
+        The arrays by name (their dtype and shape are recorded, memory-mapped arrays
+        are not read).
+    features, input_features, feature_dtypes, n_neighbors, weights, classes, cv_score :
+        The fields described in ``save_artifact``.
+    data_hash : str
+        Hex SHA-256 digest of the training matrix bytes followed by the label bytes.
+
+    Returns:
+    dict
+        The manifest that was written.
+    """
+    if feature_dtypes is not None:
+        feature_dtypes = {str(column): str(dtype) for column, dtype in dict(feature_dtypes).items()}
+    manifest = {
+        'format': FORMAT_NAME,
+        'format_version': FORMAT_VERSION,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'estimator': estimator,
+        'features': list(features),
+        'input_features': None if input_features is None else list(input_features),
+        'feature_dtypes': feature_dtypes,
+        'hyperparameters': {'n_neighbors': int(n_neighbors), 'weights': weights},
+        'classes': np.asarray(classes).tolist(),
+        'n_samples': int(arrays['fit_X'].shape[0]),
+        'cv_score': None if cv_score is None else float(cv_score),
+        'data_hash': f'sha256:{data_hash}',
+        'arrays': {name: {'file': f'{name}.npy', 'dtype': str(array.dtype), 'shape': list(array.shape)}
+                   for name, array in arrays.items()}
+    }
+    # The manifest is written last, so a directory with a manifest holds every array
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def load_artifact(directory):
+    """
+    Opens an artifact written by ``save_artifact``.
+
+    Only the manifest is read here; the arrays are memory-mapped the first time a
+    prediction needs them.
+
+    Parameters:
+    directory : str
+        Directory holding 'manifest.json' and the '.npy' arrays.
+
+    Returns:
+    KNNArtifact
+        A lightweight predictor with the same ``predict``/``predict_proba`` results as
+        the saved pipeline.
+
+    Raises:
+    ValueError
+        If the directory does not hold a supported artifact.
+    """
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        raise ValueError(f"No {MANIFEST} found in '{directory}'.")
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT_NAME or manifest.get('format_version', 0) > FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {manifest.get('format')!r} "
+                         f"version {manifest.get('format_version')!r} in '{directory}'.")
+    return KNNArtifact(directory, manifest)
+
+class KNNArtifact:
+    """
+    Predictor over a memory-mapped KNN artifact.
+
+    Scaling and the neighbour search are done with NumPy on the memory-mapped arrays,
+    so only the pages of the training matrix that are touched are read from disk.
+    Neighbours are found by brute-force Euclidean distance in blocks of queries against
+    blocks of training rows, so memory stays bounded however large the training matrix is.
+
+    Attributes:
+    manifest : dict
+        The contents of 'manifest.json'.
+    classes_ : numpy.ndarray
+        The class labels, in the order of the ``predict_proba`` columns.
+    feature_names_in_ : numpy.ndarray
+        The columns the model reads from a DataFrame.
+    n_neighbors : int
+        Number of neighbours used for the vote.
+    """
+
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+        self.classes_ = np.asarray(manifest['classes'])
+        self.feature_names_in_ = np.asarray(manifest['features'], dtype=object)
+        self.n_neighbors = manifest['hyperparameters']['n_neighbors']
+        self.weights = manifest['hyperparameters']['weights']
+        self._arrays = {}
+
+    def array(self, name):
+        """Returns the named array, memory-mapping it on first use."""
+        if name not in self._arrays:
+            spec = self.manifest['arrays'][name]
+            array = np.load(os.path.join(self.directory, spec['file']), mmap_mode='r')
+            if str(array.dtype) != spec['dtype'] or list(array.shape) != spec['shape']:
+                raise ValueError(f"Array '{name}' does not match the manifest of '{self.directory}'.")
+            self._arrays[name] = array
+        return self._arrays[name]
+
+    def transform(self, X):
+        """
+        Selects the model's features and standardizes them.
+
+        Parameters:
+        X : pandas.DataFrame or array-like
+            A DataFrame with the feature columns, or an array whose columns are either
+            the model's features or all of its input columns, in order.
+
+        Returns:
+        numpy.ndarray
+            The scaled features.
+        """
+        if hasattr(X, 'columns'):
+            X = X[self.manifest['features']].to_numpy(dtype=np.float64)
+        else:
+            X = np.asarray(X, dtype=np.float64)
+            input_features = self.manifest['input_features']
+            if input_features is not None and X.shape[1] == len(input_features) != len(self.feature_names_in_):
+                positions = {name: i for i, name in enumerate(input_features)}
+                X = X[:, [positions[name] for name in self.manifest['features']]]
+        return (X - self.array('scaler_mean')) / self.array('scaler_scale')
+
+    def kneighbors(self, X, n_neighbors=None, block_size=1024, reference_block_size=16384):
+        """
+        Finds the nearest training rows of each query row.
+
+        Parameters:
+        X : pandas.DataFrame or array-like
+            The query rows, before scaling.
+        n_neighbors : int, optional
+            Number of neighbours. Defaults to the saved ``n_neighbors``.
+        block_size : int, optional
+            Number of queries whose distances are computed at once. Default is 1024.
+        reference_block_size : int, optional
+            Number of training rows each block of queries is compared with at once.
+            Default is 16384.
+
+        Returns:
+        tuple of numpy.ndarray
+            Distances and indices of the neighbours, each of shape (n_queries, n_neighbors),
+            sorted by increasing distance.
+        """
+        fit_X, fit_sq_norms = self.array('fit_X'), self.array('fit_sq_norms')
+
+        def reference_blocks():
+            for start in range(0, len(fit_X), reference_block_size):
+                yield start, fit_X[start:start + reference_block_size], fit_sq_norms[start:start + reference_block_size]
+
+        return nearest_neighbors(self.transform(X), reference_blocks, n_neighbors or self.n_neighbors, block_size=block_size)
+
+    def predict_proba(self, X):
+        """
+        Returns the class probabilities of each row, as ``KNeighborsClassifier`` does.
+        """
+        distances, indices = self.kneighbors(X)
+        labels = self.array('labels')[indices]
+        if self.weights == 'distance':
+            with np.errstate(divide='ignore'):
+                weights = 1 / distances
+            # Exact matches take all the weight, as in scikit-learn
+            exact = np.isinf(weights).any(axis=1)
+            weights[exact] = np.isinf(weights[exact])
+        else:
+            weights = np.ones_like(distances)
+
+        proba = np.zeros((len(labels), len(self.classes_)))
+        np.add.at(proba, (np.arange(len(labels))[:, None], labels), weights)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        """
+        Returns the predicted class of each row.
+        """
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def score(self, X, y):
+        """
+        Returns the accuracy of the predictions for ``X``, as scikit-learn classifiers do.
+        """
+        return float(np.mean(self.predict(X) == np.asarray(y)))
+
+def nearest_neighbors(Z, reference_blocks, k, block_size=1024):
+    """
+    Brute-force Euclidean k-nearest-neighbour search over blocks of reference rows.
+
+    Each block of ``block_size`` queries is compared with one block of reference rows
+    at a time and only the ``k`` nearest rows seen so far are kept, so the memory used
+    is bounded by the block sizes rather than by the number of reference rows. Ties
+    are broken by the lower reference index.
+
+    Parameters:
+    Z : numpy.ndarray, shape (n_queries, n_features)
+        The scaled query rows.
+    reference_blocks : callable
+        Called once per block of queries; returns an iterable of
+        ``(first_index, rows, squared_norms)`` tuples covering the reference rows,
+        where ``first_index`` is the index reported for the first row of the block.
+    k : int
+        Number of neighbours. Fewer are returned if there are fewer reference rows.
+    block_size : int, optional
+        Number of queries processed at once. Default is 1024.
+
+    Returns:
+    tuple of numpy.ndarray
+        Distances and indices of the neighbours, each of shape (n_queries, k), sorted
+        by increasing distance.
+    """
+    distances, indices = [], []
+    for start in range(0, len(Z), block_size):
+        block = Z[start:start + block_size]
+        block_sq_norms = np.einsum('ij,ij->i', block, block)[:, None]
+        best_d2 = np.empty((len(block), 0))
+        best = np.empty((len(block), 0), dtype=np.intp)
+        for first, rows, sq_norms in reference_blocks():
+            d2 = np.concatenate([best_d2, sq_norms[None, :] - 2 * block @ rows.T + block_sq_norms], axis=1)
+            index = np.concatenate([best, np.broadcast_to(np.arange(first, first + len(rows)), (len(block), len(rows)))], axis=1)
+            if d2.shape[1] > k:
+                keep = np.argpartition(d2, k - 1, axis=1)[:, :k]
+                d2, index = np.take_along_axis(d2, keep, axis=1), np.take_along_axis(index, keep, axis=1)
+            best_d2, best = d2, index
+        order = np.lexsort((best, best_d2), axis=1)
+        distances.append(np.sqrt(np.maximum(np.take_along_axis(best_d2, order, axis=1), 0)))
+        indices.append(np.take_along_axis(best, order, axis=1))
+    if not distances:
+        return np.empty((0, k)), np.empty((0, k), dtype=np.intp)
+    return np.concatenate(distances), np.concatenate(indices)
+
+def _unpack_preprocessor(preprocessor):
+    # Returns the fitted scaler, the names of the columns it scales and the names of
+    # every input column (None if the preprocessor saw no column names)
+    steps = preprocessor.steps if hasattr(preprocessor, 'steps') else [('', preprocessor)]
+    if len(steps) != 1:
+        raise ValueError("The pipeline must have exactly one preprocessing step before the KNN classifier.")
+    step = steps[0][1]
+    input_features = getattr(step, 'feature_names_in_', None)
+    input_features = None if input_features is None else [str(name) for name in input_features]
+
+    if isinstance(step, StandardScaler):
+        scaler = step
+        features = input_features or [str(i) for i in range(scaler.n_features_in_)]
+    elif isinstance(step, ColumnTransformer):
+        scalers = [(t, columns) for _, t, columns in step.transformers_ if t != 'drop' and len(columns)]
+        if len(scalers) != 1 or not isinstance(scalers[0][0], StandardScaler):
+            raise ValueError("The ColumnTransformer must scale one set of columns and drop the rest.")
+        scaler, columns = scalers[0]
+        if all(isinstance(c, str) for c in columns):
+            features = list(columns)
+        elif input_features is not None:
+            features = [input_features[c] for c in columns]
+        else:
+            raise ValueError("The ColumnTransformer selects columns by position but was not fit on named columns.")
+    else:
+        raise ValueError(f"Unsupported preprocessing step {type(step).__name__}.")
+
+    if not hasattr(scaler, 'n_features_in_'):
+        raise ValueError("The StandardScaler must be fitted.")
+    return scaler, features, input_features
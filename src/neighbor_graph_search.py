@@ -0,0 +1,132 @@
+import time
+import numpy as np
+from scipy.stats import rankdata
+from sklearn.base import clone
+from sklearn.model_selection import check_cv
+
+class NeighborGraphSearchCV:
+    """
+    Cross-validated search over ``n_neighbors`` for a KNN pipeline that runs a single
+    neighbour search per fold.
+
+    For every fold the preprocessing steps are fit on the training part and the
+    ``max_neighbors`` nearest training rows of each validation row are found once.
+    Because the neighbours come back sorted by distance, the prediction for any
+    k <= ``max_neighbors`` is the majority vote of the first k of them, so every
+    candidate k is scored by slicing the same neighbour list. With 5 folds this
+    replaces the 250 fits and neighbour searches of a 50-candidate random search
+    by 5 searches.
+
+    Ties between classes go to the first class, and the folds are the same as the
+    ones RandomizedSearchCV uses for ``cv=5``, so the scores match a grid search with
+    uniform weights. The results follow the layout of scikit-learn's search objects.
+
+    Parameters:
+    estimator : sklearn.pipeline.Pipeline
+        Pipeline whose last step is a KNN classifier with a ``kneighbors`` method.
+    max_neighbors : int, default=29
+        The largest k to score; every k from 1 to ``max_neighbors`` is scored.
+    cv : int or cross-validation generator, default=5
+        Cross-validation splitting strategy, as in scikit-learn.
+    refit : bool, default=True
+        Whether to refit the best pipeline on the whole training data.
+
+    Attributes:
+    cv_results_ : dict
+        Per-candidate parameters, split scores, mean/std/rank of the test scores and timings.
+    best_index_, best_params_, best_score_ :
+        The best candidate, as in RandomizedSearchCV.
+    best_estimator_ : sklearn.pipeline.Pipeline
+        The refit pipeline, only if ``refit`` is True.
+
+    Example:
+    >>> search = NeighborGraphSearchCV(pipeline).fit(X_train, y_train)
+    >>> print(search.best_params_)
+    """
+
+    def __init__(self, estimator, max_neighbors=29, cv=5, refit=True):
+        self.estimator = estimator
+        self.max_neighbors = max_neighbors
+        self.cv = cv
+        self.refit = refit
+
+    def fit(self, X, y):
+        """
+        Scores every k from 1 to ``max_neighbors`` with cross-validation.
+
+        Parameters:
+        X : array-like, shape (n_samples, n_features)
+            The training data.
+        y : array-like, shape (n_samples,)
+            The target labels.
+
+        Returns:
+        self : NeighborGraphSearchCV
+        """
+        y = np.asarray(y)
+        step = self.estimator.steps[-1][0]
+        param = f"{step}__n_neighbors"
+        candidates = np.arange(1, self.max_neighbors + 1)
+        classes, y_encoded = np.unique(y, return_inverse=True)
+
+        splits = list(check_cv(self.cv, y, classifier=True).split(X, y))
+        scores = np.empty((len(splits), len(candidates)))
+        fit_times = np.empty(len(splits))
+        score_times = np.empty(len(splits))
+
+        for i, (train, test) in enumerate(splits):
+            start = time.perf_counter()
+            pipeline = clone(self.estimator)
+            preprocessor, knn = pipeline[:-1], pipeline[-1]
+            X_fold = preprocessor.fit_transform(_take(X, train), y[train])
+            knn.set_params(n_neighbors=min(self.max_neighbors, len(train)))
+            knn.fit(X_fold, y_encoded[train])
+            fit_times[i] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            neighbors = knn.kneighbors(preprocessor.transform(_take(X, test)), return_distance=False)
+            scores[i] = _score_every_k(y_encoded[train][neighbors], y_encoded[test], len(classes), len(candidates))
+            score_times[i] = time.perf_counter() - start
+
+        mean = scores.mean(axis=0)
+        self.cv_results_ = {
+            # Fit and search costs are shared by every candidate of a fold
+            "mean_fit_time": np.full(len(candidates), fit_times.mean()),
+            "std_fit_time": np.full(len(candidates), fit_times.std()),
+            "mean_score_time": np.full(len(candidates), score_times.mean()),
+            "std_score_time": np.full(len(candidates), score_times.std()),
+            f"param_{param}": np.ma.MaskedArray(candidates, mask=False),
+            "params": [{param: int(k)} for k in candidates],
+            **{f"split{i}_test_score": scores[i] for i in range(len(splits))},
+            "mean_test_score": mean,
+            "std_test_score": scores.std(axis=0),
+            "rank_test_score": rankdata(-mean, method="min").astype(np.int32)
+        }
+        self.n_splits_ = len(splits)
+        self.best_index_ = int(self.cv_results_["rank_test_score"].argmin())
+        self.best_params_ = self.cv_results_["params"][self.best_index_]
+        self.best_score_ = float(mean[self.best_index_])
+
+        if self.refit:
+            self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
+
+def _take(X, rows):
+    return X.iloc[rows] if hasattr(X, "iloc") else X[rows]
+
+def _score_every_k(neighbor_labels, y_true, n_classes, n_candidates, block_size=65536):
+    # neighbor_labels: (n_queries, n_neighbors) labels of the sorted neighbours.
+    # Running vote counts give the prediction for every k at once; queries are
+    # processed in blocks to bound the size of the vote array.
+    correct = np.zeros(neighbor_labels.shape[1])
+    for start in range(0, len(y_true), block_size):
+        labels = neighbor_labels[start:start + block_size]
+        votes = np.eye(n_classes, dtype=np.int32)[labels].cumsum(axis=1)
+        predictions = votes.argmax(axis=2)
+        correct += (predictions == y_true[start:start + block_size, None]).sum(axis=0)
+    accuracy = correct / len(y_true)
+
+    # Folds with fewer training rows than candidates reuse the largest possible k
+    if len(accuracy) < n_candidates:
+        accuracy = np.append(accuracy, np.full(n_candidates - len(accuracy), accuracy[-1]))
+    return accuracy
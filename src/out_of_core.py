@@ -0,0 +1,250 @@
+import hashlib
+import os
+import time
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+from sklearn.preprocessing import StandardScaler
+from src.instrumentation import instrumented, stage
+from src.model import build_preprocessor
+from src.model_artifact import write_manifest, load_artifact, nearest_neighbors
+from src.neighbor_graph_search import _score_every_k
+
+class OutOfCoreKNNSearch:
+    """
+    Cross-validated search over ``n_neighbors`` for a scaler + KNN model, trained from a
+    CSV file that does not fit in memory.
+
+    The training file is streamed once in chunks of ``chunksize`` rows: the features are
+    appended to an on-disk matrix and the final StandardScaler is fit with
+    ``partial_fit``. The folds are contiguous row-index ranges of that memory-mapped
+    matrix, so no fold is ever copied: each fold's scaler is fit with ``partial_fit``
+    over the rows outside its range, and its rows are searched, block by block, against
+    the rows outside its range. As in ``NeighborGraphSearchCV``, one neighbour search per
+    fold scores every k from 1 to ``max_neighbors``. The best model is written as a KNN
+    artifact (see ``src.model_artifact``) whose scaled reference matrix is built on disk.
+
+    Memory is bounded by ``chunksize`` and the search block sizes, not by the number of
+    rows. Because the folds are contiguous, the training rows should be in random order,
+    as the train split written by ``scripts/data_cleaning_validation.py`` is.
+
+    Parameters:
+    directory : str
+        Directory the artifact of the best model is written to.
+    features : list of str, optional
+        Columns scaled and used for the neighbour search. Defaults to the columns
+        ``build_preprocessor`` scales.
+    max_neighbors : int, default=29
+        The largest k to score; every k from 1 to ``max_neighbors`` is scored.
+    n_splits : int, default=5
+        Number of folds.
+    chunksize : int, default=100000
+        Rows read, scaled and searched at a time.
+    block_size, reference_block_size : int, default=1024 and 16384
+        Number of query and reference rows whose distances are computed at once.
+
+    Attributes:
+    cv_results_ : dict
+        Per-candidate parameters, split scores, mean/std/rank of the test scores and timings.
+    best_index_, best_params_, best_score_ :
+        The best candidate, as in RandomizedSearchCV.
+    best_estimator_ : src.model_artifact.KNNArtifact
+        The best model, opened from ``directory``.
+    n_samples_ : int
+        Number of training rows.
+
+    Example:
+    >>> search = OutOfCoreKNNSearch('results/models/best_knn_artifact').fit('data/processed/train_data.csv')
+    >>> print(search.best_params_)
+    """
+
+    def __init__(self, directory, features=None, max_neighbors=29, n_splits=5, chunksize=100_000,
+                 block_size=1024, reference_block_size=16384):
+        self.directory = directory
+        self.features = features
+        self.max_neighbors = max_neighbors
+        self.n_splits = n_splits
+        self.chunksize = chunksize
+        self.block_size = block_size
+        self.reference_block_size = reference_block_size
+
+    def fit(self, path, target='Target'):
+        """
+        Scores every k from 1 to ``max_neighbors`` and writes the artifact of the best one.
+
+        Parameters:
+        path : str
+            CSV file of the training data, with the feature columns and the target.
+        target : str, optional
+            Name of the target column. Default is 'Target'.
+
+        Returns:
+        self : OutOfCoreKNNSearch
+        """
+        features = list(self.features or _scaled_features())
+        os.makedirs(self.directory, exist_ok=True)
+        X_path = os.path.join(self.directory, 'X_raw.bin')
+        y_path = os.path.join(self.directory, 'labels_raw.bin')
+        try:
+            with stage('out_of_core_read') as record:
+                scaler, classes, feature_dtypes = self._stream_to_disk(path, features, target, X_path, y_path)
+                record['rows'] = self.n_samples_
+            X = np.memmap(X_path, dtype=np.float64, mode='r', shape=(self.n_samples_, len(features)))
+            labels = np.memmap(y_path, dtype=np.int32, mode='r', shape=(self.n_samples_,))
+
+            with stage('out_of_core_search', rows=self.n_samples_):
+                self._search(X, labels, len(classes))
+            with stage('out_of_core_refit', rows=self.n_samples_):
+                self._write_artifact(X, labels, scaler, features, classes, feature_dtypes)
+            del X, labels
+        finally:
+            for tmp in [X_path, y_path]:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+        self.best_estimator_ = load_artifact(self.directory)
+        return self
+
+    def _stream_to_disk(self, path, features, target, X_path, y_path):
+        # Appends the features and the label codes (in order of first appearance) to raw
+        # binary files, then recodes the labels against the sorted classes
+        scaler = StandardScaler()
+        vocabulary = {}
+        feature_dtypes = None
+        self.n_samples_ = 0
+        with open(X_path, 'wb') as X_file, open(y_path, 'wb') as y_file:
+            for chunk in pd.read_csv(path, usecols=features + [target], chunksize=self.chunksize):
+                if feature_dtypes is None:
+                    feature_dtypes = chunk[features].dtypes
+                X = np.ascontiguousarray(chunk[features].to_numpy(dtype=np.float64))
+                scaler.partial_fit(X)
+                X_file.write(X.tobytes())
+                codes = np.array([vocabulary.setdefault(label, len(vocabulary)) for label in chunk[target]], dtype=np.int32)
+                y_file.write(codes.tobytes())
+                self.n_samples_ += len(chunk)
+        if self.n_samples_ <= self.n_splits:
+            raise ValueError(f"Cannot split {self.n_samples_} rows into {self.n_splits} folds.")
+
+        classes = np.array(sorted(vocabulary))
+        recode = np.empty(len(vocabulary), dtype=np.int32)
+        recode[list(vocabulary.values())] = np.searchsorted(classes, list(vocabulary))
+        labels = np.memmap(y_path, dtype=np.int32, mode='r+', shape=(self.n_samples_,))
+        for start in range(0, self.n_samples_, self.chunksize):
+            labels[start:start + self.chunksize] = recode[labels[start:start + self.chunksize]]
+        labels.flush()
+        del labels
+        return scaler, classes, feature_dtypes
+
+    def _search(self, X, labels, n_classes):
+        n = len(X)
+        candidates = np.arange(1, self.max_neighbors + 1)
+        bounds = np.linspace(0, n, self.n_splits + 1).astype(int)
+        scores = np.empty((self.n_splits, len(candidates)))
+        fit_times = np.empty(self.n_splits)
+        score_times = np.empty(self.n_splits)
+
+        for i, (first, last) in enumerate(zip(bounds[:-1], bounds[1:])):
+            outside = [(0, first), (last, n)]
+            start = time.perf_counter()
+            scaler = StandardScaler()
+            for block_start, block_end in self._blocks(outside, self.chunksize):
+                scaler.partial_fit(X[block_start:block_end])
+            fit_times[i] = time.perf_counter() - start
+
+            def reference_blocks():
+                for block_start, block_end in self._blocks(outside, self.reference_block_size):
+                    rows = scaler.transform(X[block_start:block_end])
+                    yield block_start, rows, np.einsum('ij,ij->i', rows, rows)
+
+            start = time.perf_counter()
+            correct = np.zeros(len(candidates))
+            for query_start, query_end in self._blocks([(first, last)], self.chunksize):
+                _, neighbors = nearest_neighbors(scaler.transform(X[query_start:query_end]), reference_blocks,
+                                                 self.max_neighbors, block_size=self.block_size)
+                accuracy = _score_every_k(labels[neighbors], labels[query_start:query_end], n_classes, len(candidates))
+                correct += accuracy * (query_end - query_start)
+            scores[i] = correct / (last - first)
+            score_times[i] = time.perf_counter() - start
+
+        param = 'kneighborsclassifier__n_neighbors'
+        mean = scores.mean(axis=0)
+        self.cv_results_ = {
+            # Fit and search costs are shared by every candidate of a fold
+            "mean_fit_time": np.full(len(candidates), fit_times.mean()),
+            "std_fit_time": np.full(len(candidates), fit_times.std()),
+            "mean_score_time": np.full(len(candidates), score_times.mean()),
+            "std_score_time": np.full(len(candidates), score_times.std()),
+            f"param_{param}": np.ma.MaskedArray(candidates, mask=False),
+            "params": [{param: int(k)} for k in candidates],
+            **{f"split{i}_test_score": scores[i] for i in range(self.n_splits)},
+            "mean_test_score": mean,
+            "std_test_score": scores.std(axis=0),
+            "rank_test_score": rankdata(-mean, method="min").astype(np.int32)
+        }
+        self.best_index_ = int(self.cv_results_["rank_test_score"].argmin())
+        self.best_params_ = self.cv_results_["params"][self.best_index_]
+        self.best_score_ = float(mean[self.best_index_])
+
+    def _write_artifact(self, X, labels, scaler, features, classes, feature_dtypes):
+        # The scaled reference matrix and its squared norms are written block by block
+        arrays = {
+            'scaler_mean': np.asarray(scaler.mean_, dtype=np.float64),
+            'scaler_scale': np.asarray(scaler.scale_, dtype=np.float64)
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(self.directory, f'{name}.npy'), array)
+
+        fit_X = np.lib.format.open_memmap(os.path.join(self.directory, 'fit_X.npy'), mode='w+', dtype=np.float64, shape=X.shape)
+        fit_sq_norms = np.lib.format.open_memmap(os.path.join(self.directory, 'fit_sq_norms.npy'), mode='w+', dtype=np.float64, shape=(len(X),))
+        out_labels = np.lib.format.open_memmap(os.path.join(self.directory, 'labels.npy'), mode='w+', dtype=np.int32, shape=(len(X),))
+        data_hash = hashlib.sha256()
+        for start, end in self._blocks([(0, len(X))], self.chunksize):
+            rows = scaler.transform(X[start:end])
+            fit_X[start:end] = rows
+            fit_sq_norms[start:end] = np.einsum('ij,ij->i', rows, rows)
+            data_hash.update(np.ascontiguousarray(rows).tobytes())
+        out_labels[:] = labels
+        data_hash.update(np.asarray(labels).tobytes())
+        for array in [fit_X, fit_sq_norms, out_labels]:
+            array.flush()
+        arrays.update(fit_X=fit_X, fit_sq_norms=fit_sq_norms, labels=out_labels)
+
+        write_manifest(self.directory, arrays, features=features, input_features=None, feature_dtypes=feature_dtypes,
+                       n_neighbors=self.best_params_['kneighborsclassifier__n_neighbors'], weights='uniform',
+                       classes=classes, cv_score=self.best_score_, data_hash=data_hash.hexdigest())
+
+    @staticmethod
+    def _blocks(ranges, size):
+        for first, last in ranges:
+            for start in range(first, last, size):
+                yield start, min(start + size, last)
+
+@instrumented()
+def evaluate_out_of_core(model, path, chunksize=100_000, target='Target'):
+    """
+    Computes the accuracy of a model on a CSV file streamed in chunks of ``chunksize`` rows.
+
+    Parameters:
+    model : src.model_artifact.KNNArtifact or estimator
+        A model with a ``predict`` method and ``feature_names_in_``.
+    path : str
+        CSV file with the feature columns and the target.
+    chunksize : int, optional
+        Rows predicted at a time. Default is 100,000.
+    target : str, optional
+        Name of the target column. Default is 'Target'.
+
+    Returns:
+    float
+        The accuracy over every row of the file.
+    """
+    columns = list(model.feature_names_in_) + [target]
+    correct = total = 0
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+        correct += int(np.sum(model.predict(chunk[columns[:-1]]) == chunk[target].to_numpy()))
+        total += len(chunk)
+    return correct / total
+
+def _scaled_features():
+    # The columns the default preprocessor passes to its StandardScaler
+    return build_preprocessor().transformers[0][2]
@@ -0,0 +1,268 @@
+import ast
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+
+def hash_file(path, block_size=1 << 20):
+    """
+    Returns the SHA-256 hex digest of a file's contents, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def code_dependencies(script, root='.'):
+    """
+    Lists a script and every module of the ``src`` package it imports, directly or
+    through other ``src`` modules.
+
+    Parameters:
+    script : str
+        Path to the Python script.
+    root : str, optional
+        Repository root holding the ``src`` package. Default is the current directory.
+
+    Returns:
+    list of str
+        Sorted paths of the script and the ``src`` modules it depends on.
+    """
+    seen = set()
+    pending = [script]
+    while pending:
+        path = pending.pop()
+        if path in seen or not os.path.exists(path):
+            continue
+        seen.add(path)
+        with open(path) as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.module and node.module.split('.')[0] == 'src':
+                pending.append(os.path.join(root, *node.module.split('.')) + '.py')
+            elif isinstance(node, ast.Import):
+                pending += [os.path.join(root, *alias.name.split('.')) + '.py'
+                            for alias in node.names if alias.name.split('.')[0] == 'src']
+    return sorted(seen)
+
+def step_key(step, root='.'):
+    """
+    Returns the content hash of a pipeline step.
+
+    The hash covers the step name, its command, its parameters, the contents of its
+    input files and the contents of its code (the script run by the command and the
+    ``src`` modules it imports). Timestamps play no part, so touching a file or
+    re-creating it with the same bytes keeps the key.
+
+    Parameters:
+    step : dict
+        A step with 'name', 'command' (list of str), 'inputs' and 'outputs' (lists of
+        paths), and optionally 'params' (JSON-serializable) and 'code' (list of paths).
+    root : str, optional
+        Repository root holding the ``src`` package. Default is the current directory.
+
+    Returns:
+    str
+        The SHA-256 hex digest of the step.
+
+    Raises:
+    FileNotFoundError
+        If an input file does not exist.
+    """
+    code = set(step.get('code', []))
+    for script in step.get('code', []):
+        code.update(code_dependencies(script, root))
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        'name': step['name'],
+        'command': step['command'],
+        'params': step.get('params'),
+        'outputs': step['outputs']
+    }, sort_keys=True).encode())
+    for kind, paths in [('input', step['inputs']), ('code', code)]:
+        for path in sorted(paths):
+            digest.update(f'{kind}:{path}:{hash_file(path)}\n'.encode())
+    return digest.hexdigest()
+
+class ArtifactStore:
+    """
+    Local content-addressed store of step outputs with size-bounded LRU eviction.
+
+    Each entry is a directory named after a step key holding a copy of the step's
+    output files and an 'entry.json' file with their paths, hashes and total size and
+    the time the entry was last used. When the store grows over ``max_bytes`` the least
+    recently used entries are removed.
+
+    Parameters:
+    root : str
+        Directory of the store. It is created if needed.
+    max_bytes : int, optional
+        Largest total size of the stored outputs. Default is 2 GB.
+    """
+
+    def __init__(self, root, max_bytes=2 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _entry(self, key):
+        path = os.path.join(self.root, key, 'entry.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_entry(self, key, entry):
+        with open(os.path.join(self.root, key, 'entry.json'), 'w') as f:
+            json.dump(entry, f, indent=2)
+
+    def entries(self):
+        """
+        Returns every complete entry of the store.
+
+        Returns:
+        dict
+            Entry metadata by step key.
+        """
+        entries = {}
+        for key in os.listdir(self.root):
+            entry = self._entry(key)
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    def size(self):
+        """Returns the total size in bytes of the stored outputs."""
+        return sum(entry['size'] for entry in self.entries().values())
+
+    def contains(self, key):
+        """Returns whether outputs are stored for the step key."""
+        return self._entry(key) is not None
+
+    def put(self, key, outputs):
+        """
+        Copies the output files of a step into the store, then evicts old entries.
+
+        Parameters:
+        key : str
+            The step key.
+        outputs : list of str
+            Paths of the output files.
+        """
+        directory = os.path.join(self.root, key)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        files = {}
+        for i, path in enumerate(outputs):
+            shutil.copy2(path, os.path.join(directory, str(i)))
+            files[path] = {'blob': str(i), 'sha256': hash_file(path), 'size': os.path.getsize(path)}
+        # entry.json is written last, so an interrupted copy is never seen as an entry
+        self._write_entry(key, {
+            'files': files,
+            'size': sum(f['size'] for f in files.values()),
+            'last_used': time.time()
+        })
+        self.evict(keep=key)
+
+    def restore(self, key):
+        """
+        Copies the stored outputs of a step back to their paths and marks the entry used.
+
+        Outputs whose current contents already match the stored hash are left untouched.
+
+        Parameters:
+        key : str
+            The step key.
+
+        Returns:
+        list of str
+            The paths that were rewritten.
+        """
+        entry = self._entry(key)
+        restored = []
+        for path, spec in entry['files'].items():
+            if os.path.exists(path) and hash_file(path) == spec['sha256']:
+                continue
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            shutil.copy2(os.path.join(self.root, key, spec['blob']), path)
+            restored.append(path)
+        entry['last_used'] = time.time()
+        self._write_entry(key, entry)
+        return restored
+
+    def evict(self, keep=None):
+        """
+        Removes least recently used entries until the store fits in ``max_bytes``.
+
+        Parameters:
+        keep : str, optional
+            A step key that is never evicted, e.g. the entry just added.
+
+        Returns:
+        list of str
+            The evicted step keys.
+        """
+        entries = self.entries()
+        total = sum(entry['size'] for entry in entries.values())
+        evicted = []
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            total -= entry['size']
+            evicted.append(key)
+        return evicted
+
+def run_pipeline(steps, store, force=(), root='.'):
+    """
+    Runs pipeline steps in order, skipping the ones whose key is in the store.
+
+    A step whose key is stored has its outputs restored from the store instead of
+    running its command. Otherwise the command is run and its outputs are stored. Since
+    keys depend on input contents, a step rerun that produces identical outputs lets
+    every later step hit the cache.
+
+    Parameters:
+    steps : list of dict
+        Steps as described in ``step_key``, in dependency order.
+    store : ArtifactStore
+        The artifact store.
+    force : collection of str, optional
+        Names of steps that run even when they are cached.
+    root : str, optional
+        Repository root holding the ``src`` package. Default is the current directory.
+
+    Returns:
+    list of dict
+        One record per step with its 'name', 'key', 'status' ('cached' or 'ran') and
+        'wall_time' in seconds.
+
+    Raises:
+    subprocess.CalledProcessError
+        If a step's command fails; later steps are not run.
+    FileNotFoundError
+        If a step did not write one of its declared outputs.
+    """
+    report = []
+    for step in steps:
+        start = time.perf_counter()
+        key = step_key(step, root)
+        if step['name'] not in force and store.contains(key):
+            store.restore(key)
+            status = 'cached'
+        else:
+            subprocess.run(step['command'], check=True)
+            missing = [path for path in step['outputs'] if not os.path.exists(path)]
+            if missing:
+                raise FileNotFoundError(f"Step '{step['name']}' did not write: {', '.join(missing)}")
+            store.put(key, step['outputs'])
+            status = 'ran'
+        report.append({'name': step['name'], 'key': key, 'status': status,
+                       'wall_time': time.perf_counter() - start})
+    return report
@@ -0,0 +1,102 @@
+import os
+import pickle
+import pandas as pd
+from src.model_artifact import load_artifact
+
+def load_model(model_path):
+    """
+    Loads a fitted model saved by ``save_best_model``.
+
+    Parameters:
+    model_path : str
+        Path to an artifact directory (see ``src.model_artifact``), e.g.
+        'results/models/best_knn_artifact', or to a pickle file, e.g.
+        'results/models/best_knn_pipeline.pickle'.
+
+    Returns:
+    src.model_artifact.KNNArtifact or sklearn.pipeline.Pipeline
+        The memory-mapped predictor for an artifact directory, the unpickled
+        pipeline otherwise.
+    """
+    if os.path.isdir(model_path):
+        return load_artifact(model_path)
+    with open(model_path, 'rb') as f:
+        return pickle.load(f)
+
+def iter_chunks(input_path, chunksize=10000):
+    """
+    Reads a CSV or Parquet file of students one chunk at a time.
+
+    Parameters:
+    input_path : str
+        Path to a '.csv' or '.parquet' file.
+    chunksize : int, optional
+        Number of rows per chunk. Default is 10,000.
+
+    Yields:
+    pandas.DataFrame
+        The next chunk of rows.
+    """
+    if os.path.splitext(input_path)[1] == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=chunksize)
+
+def score_frame(model, df):
+    """
+    Scores a DataFrame of students with a fitted pipeline in one ``predict_proba`` call.
+
+    Parameters:
+    model : sklearn.pipeline.Pipeline or estimator
+        The fitted model.
+    df : pandas.DataFrame
+        The students to score. Columns the model was not trained on, such as an id, are
+        ignored when the model records its feature names.
+
+    Returns:
+    pandas.DataFrame
+        One row per student, with the predicted class in 'prediction' and the probability
+        of each class in 'proba_<class>' columns. The index is the index of ``df``.
+    """
+    features = getattr(model, 'feature_names_in_', None)
+    proba = model.predict_proba(df if features is None else df[features])
+    scores = pd.DataFrame(proba, index=df.index, columns=[f'proba_{c}' for c in model.classes_])
+    scores.insert(0, 'prediction', model.classes_[proba.argmax(axis=1)])
+    return scores
+
+def predict_batch(model, input_path, output_path, chunksize=10000, id_column=None):
+    """
+    Scores a whole file of students, streaming it through the model in chunks.
+
+    Only one chunk is held in memory at a time and results are appended to the output
+    CSV file as they are computed.
+
+    Parameters:
+    model : sklearn.pipeline.Pipeline or estimator
+        The fitted model.
+    input_path : str
+        CSV or Parquet file of students.
+    output_path : str
+        CSV file the scores are written to.
+    chunksize : int, optional
+        Number of rows scored per ``predict_proba`` call. Default is 10,000.
+    id_column : str, optional
+        Column of the input copied to the output to identify each student.
+
+    Returns:
+    int
+        The number of students scored.
+
+    Example:
+    >>> predict_batch(load_model('results/models/best_knn_pipeline.pickle'), 'cohort.csv', 'scores.csv')
+    """
+    n_rows = 0
+    for i, chunk in enumerate(iter_chunks(input_path, chunksize)):
+        scores = score_frame(model, chunk)
+        if id_column is not None:
+            scores.insert(0, id_column, chunk[id_column])
+        scores.to_csv(output_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        n_rows += len(chunk)
+    return n_rows
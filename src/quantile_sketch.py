@@ -0,0 +1,149 @@
+import numpy as np
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (KLL, Karnin, Lang and Liberty 2016).
+
+    Values are kept in a stack of compactors. Level h holds items that each stand for
+    2**h values; when the sketch is over its total capacity, the lowest level over its
+    own capacity is sorted and every other item, starting at a random offset, is
+    promoted to the level above. Capacities shrink by
+    a factor 2/3 per level below the top one, so the sketch keeps at most about 3k
+    items whatever the number of values, and a batch of m values is added in O(m log m).
+    Sketches of separate chunks or shards are combined with ``merge``.
+
+    The normalized rank error is about ``rank_error()`` (1.3% for k=200) with 99%
+    confidence. The minimum and maximum are exact.
+
+    Parameters:
+    k : int, default=200
+        Capacity of the top level; larger values give smaller errors.
+    seed : int, optional
+        Seed of the random compaction offsets. Default is 0.
+
+    Example:
+    >>> sketch = KLLSketch().update(df['Admission grade'])
+    >>> sketch.quantile(0.95)
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """
+        Adds values to the sketch. Missing values are ignored.
+
+        Returns:
+        self : KLLSketch
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Returns the sketch of the values of both sketches, with the smaller of their k.
+        Neither sketch is modified.
+        """
+        merged = KLLSketch(k=min(self.k, other.k), seed=self._rng.integers(2 ** 32))
+        merged.n = self.n + other.n
+        merged.min = min(self.min, other.min)
+        merged.max = max(self.max, other.max)
+        depth = max(len(self._levels), len(other._levels))
+        merged._levels = [np.concatenate([sketch._levels[h] for sketch in (self, other) if h < len(sketch._levels)])
+                          for h in range(depth)]
+        merged._compress()
+        return merged
+
+    def quantile(self, q):
+        """
+        Returns the estimated q-quantile (the smallest retained value whose estimated
+        rank reaches ``q``), or NaN if the sketch is empty. ``q`` can be an array.
+        """
+        q = np.asarray(q, dtype=float)
+        if self.n == 0:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        items, cumulative = self._sorted()
+        positions = np.searchsorted(cumulative, q * self.n, side='left').clip(0, len(items) - 1)
+        result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, items[positions]))
+        return result if q.ndim else float(result)
+
+    def rank(self, value, inclusive=True):
+        """
+        Returns the estimated fraction of values below ``value`` (or equal to it, when
+        ``inclusive``), or NaN if the sketch is empty. ``value`` can be an array.
+        """
+        value = np.asarray(value, dtype=float)
+        if self.n == 0:
+            return np.full(value.shape, np.nan) if value.ndim else np.nan
+        items, cumulative = self._sorted()
+        positions = np.searchsorted(items, value, side='right' if inclusive else 'left')
+        result = np.concatenate([[0], cumulative])[positions] / self.n
+        return result if value.ndim else float(result)
+
+    def rank_error(self):
+        """
+        Returns the normalized rank error of the sketch at 99% confidence, from the
+        empirical fit published for KLL sketches by Apache DataSketches.
+        """
+        return 2.296 / self.k ** 0.9723
+
+    def to_dict(self):
+        """Returns the sketch as a JSON-serializable dictionary."""
+        return {
+            'k': self.k,
+            'n': self.n,
+            'min': None if self.n == 0 else float(self.min),
+            'max': None if self.n == 0 else float(self.max),
+            'levels': [level.tolist() for level in self._levels]
+        }
+
+    @classmethod
+    def from_dict(cls, data, seed=0):
+        """Rebuilds a sketch written by ``to_dict``."""
+        sketch = cls(k=data['k'], seed=seed)
+        sketch.n = data['n']
+        if sketch.n:
+            sketch.min, sketch.max = data['min'], data['max']
+        sketch._levels = [np.asarray(level, dtype=float) for level in data['levels']]
+        return sketch
+
+    def __len__(self):
+        # Number of retained items
+        return sum(len(level) for level in self._levels)
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        # Lazy compaction: while the sketch holds more items than its total capacity,
+        # compact the lowest level that is over its own capacity
+        while len(self) > sum(self._capacity(h) for h in range(len(self._levels))):
+            level = next(h for h, items in enumerate(self._levels) if len(items) > self._capacity(h))
+            if level + 1 == len(self._levels):
+                self._levels.append(np.empty(0))
+            items = np.sort(self._levels[level])
+            # An odd item out stays at this level, so the total weight is unchanged
+            keep, items = items[:len(items) % 2], items[len(items) % 2:]
+            promoted = items[self._rng.integers(2)::2]
+            self._levels[level] = keep
+            self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+
+    def _sorted(self):
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
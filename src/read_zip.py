@@ -1,62 +1,229 @@
+import hashlib
+import json
+import time
 import zipfile
 import requests
 import os
+import pandas as pd
 
-def read_zip(url, directory):
+CHUNK_SIZE = 1 << 20
+
+def read_zip(url, directory, checksum=None, max_retries=3, chunk_size=CHUNK_SIZE, extract=True):
     """
     Read a zip file from the given URL and extract its contents to the specified directory.
 
+    The zip file is streamed to disk in chunks. An interrupted transfer is kept as a
+    '.part' file and resumed with an HTTP Range request, both within a call (up to
+    ``max_retries`` times) and by the next call. The ETag, size and SHA-256 of the
+    downloaded file are recorded next to it in '<zip>.meta.json'. A later call then
+    asks the server for the file only if its ETag changed, and does not download it
+    again if it did not.
+
+    Only the members whose CRC-32 in the zip central directory differs from the one
+    recorded at their last extraction, or whose local file was modified or removed
+    since, are extracted.
+
     Parameters:
     ----------
     url : str
         The URL of the zip file to be read.
     directory : str
         The directory where the contents of the zip file will be extracted.
+    checksum : str, optional
+        Expected SHA-256 hex digest of the zip file. The download is discarded and a
+        ValueError is raised if it does not match. A local copy the server reports as
+        unchanged is downloaded again if it does not match.
+    max_retries : int, optional
+        Number of times an interrupted transfer is resumed before giving up. Default is 3.
+    chunk_size : int, optional
+        Number of bytes written to disk at a time. Default is 1 MB.
+    extract : bool, optional
+        Whether to extract the members. Use False to keep only the zip file and read
+        its CSV member with ``read_zip_csv``. Default is True.
 
     Returns:
     -------
-    None
+    list of str
+        Names of the members that were extracted.
     """
-    request = requests.get(url)
     filename_from_url = os.path.basename(url)
+    path_to_zip_file = os.path.join(directory, filename_from_url)
+    meta_path = path_to_zip_file + '.meta.json'
+    part_path = path_to_zip_file + '.part'
+    meta = _load_meta(meta_path)
+    if not os.path.exists(path_to_zip_file):
+        meta.update(etag=None, sha256=None, members={})
+
+    request = _request(url, meta, part_path)
 
     # check if URL exists, if not raise an error
-    if request.status_code != 200:
+    if request.status_code not in (200, 206, 304):
         raise ValueError('The URL provided does not exist.')
-    
-    # check if the URL points to a zip file, if not raise an error  
+
+    # check if the URL points to a zip file, if not raise an error
     #if request.headers['content-type'] != 'application/zip':
     if filename_from_url[-4:] != '.zip':
         raise ValueError('The URL provided does not point to a zip file.')
-    
+
     # check if the directory exists, if not raise an error
     if not os.path.isdir(directory):
         raise ValueError('The directory provided does not exist.')
 
-    # write the zip file to the directory
-    path_to_zip_file = os.path.join(directory, filename_from_url)
-    with open(path_to_zip_file, 'wb') as f:
-        f.write(request.content)
-
-    # get list of files/directories in the directory
-    original_files = os.listdir(directory)
-    original_timestamps = []
-    for filename in original_files:
-        filename = os.path.join(directory, filename)
-        original_timestamp = os.path.getmtime(filename)
-        original_timestamps.append(original_timestamp)
-
-    # extract the zip file to the directory
+    # download the zip file, unless the local copy has the server's ETag
+    etag = request.headers.get('ETag')
+    current = request.status_code == 304 or (etag is not None and etag == meta.get('etag') and request.status_code == 200)
+    if current and checksum is not None and _sha256(path_to_zip_file) != checksum.lower():
+        # the local copy is not the expected file: download the whole file again
+        request.close()
+        meta['etag'] = None
+        request = _request(url, meta, part_path)
+        etag = request.headers.get('ETag')
+        current = False
+    if current:
+        request.close()
+    else:
+        # remember which version of the file the partial download belongs to
+        meta['part_etag'] = etag
+        _save_meta(meta_path, meta)
+        for attempt in range(max_retries + 1):
+            try:
+                _stream_to_part(request, part_path, chunk_size)
+                break
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError):
+                if attempt == max_retries:
+                    raise
+                time.sleep(min(2 ** attempt, 30) * 0.1)
+                request = _request(url, meta, part_path)
+
+        digest = _sha256(part_path)
+        if checksum is not None and digest != checksum.lower():
+            os.remove(part_path)
+            raise ValueError(f'The checksum of the downloaded file {digest} does not match {checksum}.')
+        os.replace(part_path, path_to_zip_file)
+        meta.update(url=url, etag=etag, part_etag=None, size=os.path.getsize(path_to_zip_file), sha256=digest)
+        _save_meta(meta_path, meta)
+
+    # read the central directory and extract the members that changed
+    with zipfile.ZipFile(path_to_zip_file, 'r') as zip_ref:
+        members = [info for info in zip_ref.infolist() if not info.is_dir()]
+
+        # check if the zip file has any files, if not raise an error
+        if not members:
+            raise ValueError('The ZIP file is empty.')
+
+        recorded = meta.get('members', {})
+        extracted = []
+        for info in members if extract else []:
+            target = os.path.join(directory, info.filename)
+            if not _is_current(target, info, recorded.get(info.filename)):
+                zip_ref.extract(info, directory)
+                extracted.append(info.filename)
+            recorded[info.filename] = {'crc': info.CRC, 'size': info.file_size,
+                                       'mtime': os.path.getmtime(target)}
+
+    meta['members'] = recorded
+    _save_meta(meta_path, meta)
+    return extracted
+
+def _request(url, meta, part_path):
+    # Resumes a partial download when one exists, otherwise asks for the file only if
+    # its ETag differs from the local copy's. With If-Range the server sends the whole
+    # file instead of the rest when the file changed since the partial download began.
+    headers = {}
+    if os.path.exists(part_path):
+        headers['Range'] = f'bytes={os.path.getsize(part_path)}-'
+        if meta.get('part_etag'):
+            headers['If-Range'] = meta['part_etag']
+    elif meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    request = requests.get(url, stream=True, headers=headers)
+
+    # the partial file is complete or stale: download the whole file again
+    if request.status_code == 416:
+        request.close()
+        os.remove(part_path)
+        request = requests.get(url, stream=True)
+    return request
+
+def _stream_to_part(request, part_path, chunk_size):
+    # A 206 response continues the partial file, any other response replaces it
+    mode = 'ab' if request.status_code == 206 else 'wb'
+    expected = request.headers.get('Content-Length')
+    written = 0
+    with open(part_path, mode) as f:
+        for chunk in request.iter_content(chunk_size=chunk_size):
+            f.write(chunk)
+            written += len(chunk)
+    if expected is not None and written < int(expected):
+        raise requests.exceptions.ConnectionError(f'Transfer interrupted after {written} of {expected} bytes.')
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _is_current(target, info, record):
+    # The member is unchanged in the zip and its extracted file was not touched since
+    return (record is not None and os.path.isfile(target)
+            and record['crc'] == info.CRC
+            and record['size'] == info.file_size == os.path.getsize(target)
+            and record['mtime'] == os.path.getmtime(target))
+
+def _load_meta(meta_path):
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path) as f:
+        return json.load(f)
+
+def _save_meta(meta_path, meta):
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+def read_zip_csv(path_to_zip_file, member=None, chunksize=None, **read_csv_kwargs):
+    """
+    Read a CSV member straight from a zip file, without extracting it to disk.
+
+    The member is decompressed on the fly while pandas parses it, so with ``chunksize``
+    only one chunk of rows is held in memory and no extracted copy is written.
+
+    Parameters:
+    ----------
+    path_to_zip_file : str
+        Path to the zip file, e.g. as downloaded by ``read_zip(..., extract=False)``.
+    member : str, optional
+        Name of the CSV member. Defaults to the only '.csv' member of the archive.
+    chunksize : int, optional
+        Number of rows per chunk. When given, an iterator of DataFrames is returned.
+    **read_csv_kwargs
+        Passed to ``pandas.read_csv``, e.g. ``delimiter=';'``.
+
+    Returns:
+    -------
+    pandas.DataFrame or iterator of pandas.DataFrame
+        The whole member, or its chunks when ``chunksize`` is given.
+
+    Raises:
+    ------
+    ValueError
+        If ``member`` is not given and the archive does not have exactly one CSV member.
+    """
     with zipfile.ZipFile(path_to_zip_file, 'r') as zip_ref:
-        zip_ref.extractall(directory)
-
-    # check if any files were extracted, if not raise an error
-    # get list of files/directories in the directory
-    current_files = os.listdir(directory)
-    current_timestamps = []
-    for filename in current_files:
-        filename = os.path.join(directory, filename)
-        current_timestamp = os.path.getmtime(filename)
-        current_timestamps.append(current_timestamp)
-    if (len(current_files) == len(original_files)) & (original_timestamps == current_timestamps):
-        raise ValueError('The ZIP file is empty.')
\ No newline at end of file
+        if member is None:
+            members = [name for name in zip_ref.namelist() if name.lower().endswith('.csv')]
+            if len(members) != 1:
+                raise ValueError(f'The ZIP file has {len(members)} CSV members, please choose one of: {members}.')
+            member = members[0]
+        # fail now rather than on the first chunk if the member does not exist
+        zip_ref.getinfo(member)
+
+    if chunksize is None:
+        with zipfile.ZipFile(path_to_zip_file, 'r') as zip_ref, zip_ref.open(member) as f:
+            return pd.read_csv(f, **read_csv_kwargs)
+    return _iter_zip_csv(path_to_zip_file, member, chunksize, read_csv_kwargs)
+
+def _iter_zip_csv(path_to_zip_file, member, chunksize, read_csv_kwargs):
+    # The archive stays open until the last chunk has been read
+    with zipfile.ZipFile(path_to_zip_file, 'r') as zip_ref, zip_ref.open(member) as f:
+        yield from pd.read_csv(f, chunksize=chunksize, **read_csv_kwargs)
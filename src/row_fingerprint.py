@@ -0,0 +1,319 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+FINGERPRINT_128 = np.dtype([('hi', '<u8'), ('lo', '<u8')])
+INDEX = 'index.json'
+
+# Salts of numeric values and keys of strings of the two 64-bit halves; fixed so
+# fingerprints are stable across runs
+_HASH_KEYS = ((np.uint64(0), '0123456789123456'), (np.uint64(0x9E3779B97F4A7C15), 'fedcba9876543210'))
+_NAN = np.array([np.nan]).view(np.uint64)[0]
+
+def row_fingerprints(df, columns=None, bits=64):
+    """
+    Computes a stable fingerprint of every row, vectorized over the columns.
+
+    Columns are hashed in name order, numeric columns as float64 and other columns as
+    strings, so the same row gets the same fingerprint in every file and chunk whatever
+    its column order or whether a column was parsed as int or float. Missing values
+    hash alike. The index is not part of the fingerprint.
+
+    Parameters:
+    df : pandas.DataFrame
+        The rows.
+    columns : list of str, optional
+        Columns the fingerprint covers. Defaults to every column.
+    bits : int, optional
+        64 for uint64 fingerprints (default) or 128 for fingerprints of dtype
+        ``FINGERPRINT_128``, whose collisions are practically impossible even over
+        billions of rows.
+
+    Returns:
+    numpy.ndarray
+        One fingerprint per row.
+    """
+    if bits not in (64, 128):
+        raise ValueError(f"Fingerprints have 64 or 128 bits, not {bits}.")
+    columns = sorted(df.columns if columns is None else columns)
+    halves = [pd.util.hash_pandas_object(_normalized(df, columns, salt), index=False, hash_key=key).to_numpy()
+              for salt, key in _HASH_KEYS[:bits // 64]]
+    if bits == 64:
+        return halves[0]
+    fingerprints = np.empty(len(df), dtype=FINGERPRINT_128)
+    fingerprints['hi'], fingerprints['lo'] = halves
+    return fingerprints
+
+def _normalized(df, columns, salt):
+    # Numeric values as the bits of their float64 value, with a single zero and NaN,
+    # XORed with the salt; other values as strings
+    data = {}
+    for name in columns:
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan) + 0.0
+            data[name] = np.where(np.isnan(values), _NAN, values.view(np.uint64)) ^ salt
+        else:
+            data[name] = np.where(series.notna(), series.astype(str), None)
+    return pd.DataFrame(data)
+
+def duplicate_mask(fingerprints):
+    """
+    Returns a boolean array that is True for every row whose fingerprint was already
+    seen earlier in ``fingerprints``, like ``DataFrame.duplicated()``.
+    """
+    fingerprints = np.asarray(fingerprints)
+    _, first = np.unique(fingerprints, return_index=True)
+    mask = np.ones(len(fingerprints), dtype=bool)
+    mask[first] = False
+    return mask
+
+def duplicate_violations(duplicates, source, limit=20):
+    """
+    Lists the duplicate rows found by ``FingerprintIndex.check_and_add``.
+
+    Parameters:
+    duplicates : pandas.DataFrame
+        The duplicates of one source, with the columns 'row', 'first_source' and
+        'first_row'.
+    source : str
+        Name of the source the duplicates were found in.
+    limit : int, optional
+        Largest number of duplicates listed one by one. Default is 20.
+
+    Returns:
+    list
+        One message per duplicate row, and one for the duplicates over ``limit``.
+    """
+    violations = [f"Row {row} of {source} duplicates row {first_row} of {first_source}."
+                  for row, first_source, first_row in duplicates[['row', 'first_source', 'first_row']].head(limit).itertuples(index=False)]
+    if len(duplicates) > limit:
+        violations.append(f"{len(duplicates) - limit} more duplicate rows in {source}.")
+    return violations
+
+def validate_duplicates(duplicates, source, limit=20):
+    """
+    Raises an exception listing the duplicate rows, see ``duplicate_violations``.
+
+    Raises:
+    Exception
+        If there is any duplicate, with one message per line.
+    """
+    violations = duplicate_violations(duplicates, source, limit=limit)
+    if violations:
+        raise Exception("\n".join(violations))
+
+class BloomFilter:
+    """
+    Bloom filter over row fingerprints, sized for ``capacity`` items at a false
+    positive rate of ``error_rate``. Positions are derived from the fingerprint by
+    double hashing, so adding and testing a chunk is vectorized.
+    """
+
+    def __init__(self, capacity, error_rate=0.001, bits=None):
+        n_bits = int(np.ceil(-capacity * np.log(error_rate) / np.log(2) ** 2))
+        self.n_bits = max(64, -(-n_bits // 64) * 64)
+        self.n_hashes = max(1, int(round(self.n_bits / capacity * np.log(2))))
+        self.bits = np.zeros(self.n_bits // 64, dtype=np.uint64) if bits is None else bits
+
+    def add(self, fingerprints):
+        positions = self._positions(fingerprints).ravel()
+        np.bitwise_or.at(self.bits, positions >> 6, np.uint64(1) << (positions & 63).astype(np.uint64))
+
+    def __contains__(self, fingerprint):
+        return bool(self.contains(np.asarray([fingerprint]))[0])
+
+    def contains(self, fingerprints):
+        """Returns False for the fingerprints certainly not added, True for the others."""
+        positions = self._positions(fingerprints)
+        words = self.bits[positions >> 6]
+        return ((words >> (positions & 63).astype(np.uint64)) & np.uint64(1)).all(axis=1).astype(bool)
+
+    def _positions(self, fingerprints):
+        fingerprints = np.asarray(fingerprints)
+        h = fingerprints['hi'] ^ fingerprints['lo'] if fingerprints.dtype == FINGERPRINT_128 else fingerprints
+        h = h.astype(np.uint64)
+        h1 = h & np.uint64(0xFFFFFFFF)
+        h2 = (h >> np.uint64(32)) | np.uint64(1)
+        i = np.arange(self.n_hashes, dtype=np.uint64)
+        return ((h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.n_bits)).astype(np.int64)
+
+class FingerprintIndex:
+    """
+    Persistent on-disk index of the row fingerprints of every ingested file.
+
+    Fingerprints are stored in sorted runs, each saved as '.npy' arrays of the
+    fingerprints and of the source and row number of each one, and memory-mapped when
+    searched, so the index does not need to fit in memory. A new run is written for
+    every batch of new rows and runs of similar size are merged, which keeps the number
+    of runs logarithmic in the number of rows. A Bloom filter in front of the runs
+    skips the search for rows that are certainly new.
+
+    Changes are only visible to later sessions after ``commit``: an ingestion that
+    fails validation calls ``rollback`` and leaves the index as it was. Re-ingesting a
+    row at the same source and row number it was indexed with is not a duplicate, so
+    reruns on the same file are idempotent.
+
+    Parameters:
+    directory : str
+        Directory of the index. It is created if needed.
+    bits : int, optional
+        Fingerprint size, 64 or 128 (default). Fixed when the index is created.
+    capacity : int, optional
+        Expected number of rows, used to size the Bloom filter (1.8 bytes per row)
+        when the index is created. More rows only make the filter less selective.
+        Default is 10,000,000.
+
+    Example:
+    >>> index = FingerprintIndex('data/processed/fingerprints')
+    >>> duplicates = index.check_and_add(row_fingerprints(chunk, bits=128), 'raw/2024-09.csv', chunk.index)
+    >>> index.commit()
+    """
+
+    def __init__(self, directory, bits=128, capacity=10_000_000):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, INDEX)
+        if os.path.exists(path):
+            with open(path) as f:
+                self._state = json.load(f)
+        else:
+            self._state = {'bits': bits, 'capacity': capacity, 'sources': [], 'runs': [], 'next_run': 0}
+        self.bits = self._state['bits']
+        self._obsolete = []
+        self._committed = json.loads(json.dumps(self._state))
+        # Runs that the committed index does not list are left over from a failed session
+        listed = {file for run in self._state['runs'] for file in self._run_files(run)}
+        for file in os.listdir(directory):
+            if file.startswith('run_') and file not in listed:
+                os.remove(os.path.join(directory, file))
+        self._load_bloom()
+
+    def __len__(self):
+        return sum(run['size'] for run in self._state['runs'])
+
+    @property
+    def sources(self):
+        """The sources indexed so far, in order."""
+        return list(self._state['sources'])
+
+    def check_and_add(self, fingerprints, source, rows=None):
+        """
+        Reports which rows were already indexed and indexes the others.
+
+        Parameters:
+        fingerprints : numpy.ndarray
+            Fingerprints from ``row_fingerprints`` with the index's number of bits.
+        source : str
+            Name of the batch's source, e.g. the raw file path.
+        rows : array-like, optional
+            Row number of each fingerprint in the source. Defaults to 0, 1, ...
+
+        Returns:
+        pandas.DataFrame
+            One row per duplicate with its 'row' in the source and the 'first_source'
+            and 'first_row' it duplicates, which may be earlier in the same batch.
+        """
+        expected = FINGERPRINT_128 if self.bits == 128 else np.dtype(np.uint64)
+        fingerprints = np.asarray(fingerprints)
+        if fingerprints.dtype != expected:
+            raise ValueError(f"The index holds {self.bits}-bit fingerprints.")
+        rows = np.arange(len(fingerprints)) if rows is None else np.asarray(rows, dtype=np.int64)
+        if source not in self._state['sources']:
+            self._state['sources'].append(source)
+        source_id = self._state['sources'].index(source)
+
+        # Duplicates within the batch point at their first occurrence in it
+        _, first, inverse = np.unique(fingerprints, return_index=True, return_inverse=True)
+        first_in_batch = first[inverse.ravel()]
+        duplicate = first_in_batch != np.arange(len(fingerprints))
+        first_source = np.full(len(fingerprints), source_id)
+        first_row = rows[first_in_batch]
+
+        # Duplicates of indexed rows, searched only for the rows the Bloom filter flags
+        new = ~duplicate
+        candidates = np.flatnonzero(new)
+        candidates = candidates[self._bloom.contains(fingerprints[candidates])]
+        for run in self._state['runs']:
+            if len(candidates) == 0:
+                break
+            run_fingerprints, run_sources, run_rows = self._open_run(run)
+            positions = np.searchsorted(run_fingerprints, fingerprints[candidates]).clip(0, run['size'] - 1)
+            found = run_fingerprints[positions] == fingerprints[candidates]
+            hits = candidates[found]
+            first_source[hits] = run_sources[positions[found]]
+            first_row[hits] = run_rows[positions[found]]
+            new[hits] = False
+            # The same row of the same source, indexed by an earlier run, is not a duplicate
+            duplicate[hits] = (first_source[hits] != source_id) | (first_row[hits] != rows[hits])
+            candidates = candidates[~found]
+
+        duplicates = np.flatnonzero(duplicate)
+        if new.any():
+            self._add_run(fingerprints[new], np.full(new.sum(), source_id, dtype=np.int32), rows[new])
+        return pd.DataFrame({
+            'row': rows[duplicates],
+            'first_source': np.asarray(self._state['sources'], dtype=object)[first_source[duplicates]] if len(duplicates) else [],
+            'first_row': first_row[duplicates]
+        })
+
+    def commit(self):
+        """Makes the rows added since the last commit permanent."""
+        np.save(os.path.join(self.directory, 'bloom.npy'), self._bloom.bits)
+        with open(os.path.join(self.directory, INDEX + '.tmp'), 'w') as f:
+            json.dump(self._state, f)
+        os.replace(os.path.join(self.directory, INDEX + '.tmp'), os.path.join(self.directory, INDEX))
+        self._remove_obsolete()
+        self._committed = json.loads(json.dumps(self._state))
+
+    def rollback(self):
+        """Forgets the rows added since the last commit."""
+        kept = {file for run in self._committed['runs'] for file in self._run_files(run)}
+        for run in self._state['runs']:
+            for file in self._run_files(run):
+                if file not in kept and os.path.exists(os.path.join(self.directory, file)):
+                    os.remove(os.path.join(self.directory, file))
+        self._state = json.loads(json.dumps(self._committed))
+        self._obsolete = []
+        self._load_bloom()
+
+    def _load_bloom(self):
+        path = os.path.join(self.directory, 'bloom.npy')
+        self._bloom = BloomFilter(self._state['capacity'], bits=np.load(path) if os.path.exists(path) else None)
+
+    def _run_files(self, run):
+        return [f"{run['name']}_{part}.npy" for part in ('fingerprints', 'sources', 'rows')]
+
+    def _open_run(self, run):
+        return [np.load(os.path.join(self.directory, file), mmap_mode='r') for file in self._run_files(run)]
+
+    def _add_run(self, fingerprints, sources, rows):
+        order = np.argsort(fingerprints, kind='stable')
+        self._write_run(fingerprints[order], sources[order], rows[order])
+        self._bloom.add(fingerprints)
+        # Merge runs of similar size, like a binary counter
+        runs = self._state['runs']
+        while len(runs) > 1 and runs[-2]['size'] <= 2 * runs[-1]['size']:
+            older, newer = runs[-2], runs[-1]
+            parts = [np.concatenate(arrays) for arrays in zip(self._open_run(older), self._open_run(newer))]
+            order = np.argsort(parts[0], kind='stable')
+            del runs[-2:]
+            self._obsolete += [older, newer]
+            self._write_run(*(part[order] for part in parts))
+
+    def _write_run(self, fingerprints, sources, rows):
+        run = {'name': f"run_{self._state['next_run']:06d}", 'size': len(fingerprints)}
+        self._state['next_run'] += 1
+        for file, array in zip(self._run_files(run), (fingerprints, sources, rows)):
+            np.save(os.path.join(self.directory, file), array)
+        self._state['runs'].append(run)
+
+    def _remove_obsolete(self):
+        # Merged runs are deleted once the index no longer lists them
+        listed = {file for run in self._state['runs'] for file in self._run_files(run)}
+        for run in self._obsolete:
+            for file in self._run_files(run):
+                if file not in listed and os.path.exists(os.path.join(self.directory, file)):
+                    os.remove(os.path.join(self.directory, file))
+        self._obsolete = []
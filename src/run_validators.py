@@ -0,0 +1,99 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from src.validate_correlation import validate_correlation
+from src.validate_distribution import validate_distribution
+from src.validate_quantiles import validate_quantiles
+from src.validate_schema import validate_schema
+
+DEFAULT_VALIDATORS = {
+    "validate_schema": validate_schema,
+    "validate_distribution": validate_distribution,
+    "validate_quantiles": validate_quantiles,
+    "validate_correlation": validate_correlation
+}
+
+def run_checks(checks, max_workers=None):
+    """
+    Runs a set of checks concurrently and collects their results into one report.
+
+    Each check is a callable that takes no arguments and raises an exception when
+    the data does not pass. Checks run in a thread pool so they can share the same
+    read-only data without copying it; a failing check does not stop the others.
+
+    Args:
+        checks (dict): Mapping of check name to a callable taking no arguments.
+        max_workers (int, optional): Number of threads to use. Defaults to one per check.
+
+    Returns:
+        dict: A report with the keys ``passed`` (True if every check passed),
+              ``wall_time`` (seconds for the whole run) and ``checks``, a list with
+              one ``{"name", "passed", "wall_time", "error"}`` entry per check,
+              in the order the checks were given.
+    """
+    def timed(name, check):
+        start = time.perf_counter()
+        try:
+            check()
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return {
+            "name": name,
+            "passed": error is None,
+            "wall_time": time.perf_counter() - start,
+            "error": error
+        }
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(checks), 1)) as executor:
+        futures = [executor.submit(timed, name, check) for name, check in checks.items()]
+        results = [future.result() for future in futures]
+
+    return {
+        "passed": all(result["passed"] for result in results),
+        "wall_time": time.perf_counter() - start,
+        "checks": results
+    }
+
+def run_validators(df, validators=None, max_workers=None):
+    """
+    Runs the data validators on a DataFrame concurrently.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to validate. It is shared by all validators
+                           and must not be modified while they run.
+        validators (dict, optional): Mapping of name to a validator taking the DataFrame.
+                                     Defaults to the schema, distribution, quantile
+                                     and correlation validators.
+        max_workers (int, optional): Number of threads to use. Defaults to one per validator.
+
+    Returns:
+        dict: The report described in ``run_checks``.
+
+    Example:
+    >>> report = run_validators(df)
+    >>> print(format_report(report))
+    """
+    validators = DEFAULT_VALIDATORS if validators is None else validators
+    checks = {name: partial(validator, df) for name, validator in validators.items()}
+    return run_checks(checks, max_workers=max_workers)
+
+def format_report(report):
+    """
+    Formats a validation report as human readable text, one line per check.
+
+    Args:
+        report (dict): A report returned by ``run_checks`` or ``run_validators``.
+
+    Returns:
+        str: The formatted report.
+    """
+    lines = []
+    for result in report["checks"]:
+        status = "PASSED" if result["passed"] else "FAILED"
+        lines.append(f"{result['name']}: {status} ({result['wall_time']:.3f}s)")
+        if result["error"]:
+            lines.extend(f"    {line}" for line in result["error"].splitlines())
+    lines.append(f"Total validation time: {report['wall_time']:.3f}s")
+    return "\n".join(lines)
@@ -0,0 +1,243 @@
+import asyncio
+import collections
+import json
+import time
+import numpy as np
+import pandas as pd
+from src.predict import score_frame
+
+class ScoringServer:
+    """
+    Local HTTP scoring server that keeps one model in memory and micro-batches requests.
+
+    Concurrent requests are queued and merged into a single ``predict_proba`` call of up
+    to ``max_batch_size`` students; a batch is sent as soon as it is full or ``max_delay``
+    seconds after its first request arrived. The model runs in a worker thread so the
+    event loop keeps accepting requests while a batch is scored. If scoring a batch
+    fails, each of its requests is scored on its own, so a malformed request only fails
+    itself.
+
+    Endpoints:
+    POST /predict  JSON object (one student) or list of objects; returns the prediction
+                   and class probabilities of each student under "predictions".
+    GET /metrics   Request, row and batch counters, latency percentiles and throughput.
+    GET /drift     Drift scores of the scored rows against the reference profile, when
+                   a drift monitor is given.
+    GET /health    Liveness check.
+
+    Parameters:
+    model : sklearn.pipeline.Pipeline or estimator
+        The fitted model, e.g. from ``src.predict.load_model``.
+    max_batch_size : int, optional
+        Largest number of students scored in one call. Default is 256.
+    max_delay : float, optional
+        Longest time in seconds a request waits for others to join its batch. Default is 0.005.
+    drift_monitor : src.drift_monitor.DriftMonitor, optional
+        Monitor every scored batch is counted into.
+
+    Example:
+    >>> server = ScoringServer(load_model('results/models/best_knn_pipeline.pickle'))
+    >>> await server.start('127.0.0.1', 8000)
+    >>> await server.serve_forever()
+    """
+
+    def __init__(self, model, max_batch_size=256, max_delay=0.005, drift_monitor=None):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.drift_monitor = drift_monitor
+        self._latencies = collections.deque(maxlen=10000)
+        self._counters = {'requests': 0, 'rows': 0, 'batches': 0, 'errors': 0}
+        self._started = time.perf_counter()
+        self._queue = None
+        self._server = None
+        self._batcher = None
+
+    async def start(self, host='127.0.0.1', port=8000):
+        """
+        Starts listening and batching. Use port 0 to pick a free port.
+
+        Returns:
+        tuple
+            The (host, port) the server listens on.
+        """
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self._started = time.perf_counter()
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        """Serves requests until the task is cancelled."""
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stops the server and the batching task."""
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+
+    async def score(self, records):
+        """
+        Scores students through the micro-batching queue.
+
+        Parameters:
+        records : list of dict
+            One dictionary of feature values per student.
+
+        Returns:
+        list of dict
+            The prediction and class probabilities of each student, in order.
+        """
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((pd.DataFrame.from_records(records), future))
+        try:
+            scores = await future
+        except Exception:
+            self._counters['errors'] += 1
+            raise
+        self._counters['requests'] += 1
+        self._counters['rows'] += len(records)
+        self._latencies.append(time.perf_counter() - start)
+        return scores.to_dict('records')
+
+    def metrics(self):
+        """
+        Returns the counters of the server.
+
+        Returns:
+        dict
+            Totals of requests, rows, batches and errors, the mean batch size, latency
+            percentiles in milliseconds over the last 10,000 requests, and throughput in
+            rows per second since the server started.
+        """
+        counters = self._counters
+        latencies = np.array(self._latencies) * 1000
+        uptime = time.perf_counter() - self._started
+        metrics = dict(counters)
+        metrics['mean_batch_size'] = counters['rows'] / counters['batches'] if counters['batches'] else 0.0
+        metrics['uptime_s'] = uptime
+        metrics['throughput_rows_per_s'] = counters['rows'] / uptime if uptime > 0 else 0.0
+        for name, q in [('p50', 50), ('p95', 95), ('p99', 99)]:
+            metrics[f'latency_{name}_ms'] = float(np.percentile(latencies, q)) if len(latencies) else None
+        return metrics
+
+    def drift(self):
+        """
+        Returns the drift report of the monitor.
+
+        Returns:
+        dict
+            The number of rows in the monitor's window and seen in total, and the kind,
+            count, PSI, KS and drift flag of each column under 'columns'.
+        """
+        report = self.drift_monitor.report()
+        rows, _ = self.drift_monitor.window_counts()
+        columns = report.reset_index().astype(object)
+        return {
+            'window_rows': rows,
+            'rows_seen': self.drift_monitor.rows_seen,
+            'columns': columns.where(columns.notna(), None).to_dict('records')
+        }
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            n_rows = len(batch[0][0])
+            deadline = loop.time() + self.max_delay
+            while n_rows < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                n_rows += len(batch[-1][0])
+
+            frame = pd.concat([df for df, _ in batch], ignore_index=True)
+            try:
+                scores = await loop.run_in_executor(None, score_frame, self.model, frame)
+                starts = np.cumsum([0] + [len(df) for df, _ in batch])
+                results = [scores.iloc[start:end] for start, end in zip(starts[:-1], starts[1:])]
+            except Exception as e:
+                if len(batch) == 1:
+                    results = [e]
+                else:
+                    # One malformed request must not fail the others sharing its batch
+                    results = [await self._score_alone(df) for df, _ in batch]
+
+            self._counters['batches'] += 1
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+            scored = [df for (df, _), result in zip(batch, results) if not isinstance(result, Exception)]
+            if self.drift_monitor is not None and scored:
+                # Counted once the requests are answered; a column the monitor cannot
+                # bin must not stop the batching loop
+                try:
+                    self.drift_monitor.update(frame if len(scored) == len(batch) else pd.concat(scored, ignore_index=True))
+                except (TypeError, ValueError):
+                    self._counters['errors'] += 1
+
+    async def _score_alone(self, df):
+        # Returns the scores of one request, or the exception scoring it raised
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, score_frame, self.model, df)
+        except Exception as e:
+            return e
+
+    async def _route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return '200 OK', {'status': 'ok'}
+        if method == 'GET' and path == '/metrics':
+            return '200 OK', self.metrics()
+        if method == 'GET' and path == '/drift' and self.drift_monitor is not None:
+            return '200 OK', self.drift()
+        if method == 'POST' and path == '/predict':
+            try:
+                records = json.loads(body)
+                records = [records] if isinstance(records, dict) else records
+                return '200 OK', {'predictions': await self.score(records)}
+            except (ValueError, KeyError, TypeError) as e:
+                return '400 Bad Request', {'error': f'{type(e).__name__}: {e}'}
+            except Exception as e:
+                return '500 Internal Server Error', {'error': f'{type(e).__name__}: {e}'}
+        return '404 Not Found', {'error': f'No route for {method} {path}.'}
+
+    async def _handle(self, reader, writer):
+        # Minimal HTTP/1.1: one JSON request per message, connections are kept alive
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, payload = await self._route(method, path, body)
+                data = json.dumps(payload, default=lambda o: o.item()).encode()
+                writer.write(f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n'
+                             f'Content-Length: {len(data)}\r\n\r\n'.encode() + data)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
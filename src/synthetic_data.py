@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+from src.validate_distribution import REF_MEAN, REF_STD, REF_PROP
+from src.validate_quantiles import REF_QUANTILES
+from src.validate_schema import SCHEMA, _COLUMN_CHECKS
+
+# Column names of the raw UCI file, which `scripts/data_cleaning_validation.py` fixes
+RAW_NAMES = {
+    "Daytime/evening attendance": "Daytime/evening attendance\t",
+    "Mother qualification": "Mother's qualification",
+    "Father qualification": "Father's qualification",
+    "Mother occupation": "Mother's occupation",
+    "Father occupation": "Father's occupation"
+}
+
+def generate_synthetic(n_rows, seed=0):
+    """
+    Generates a schema-valid synthetic dataset.
+
+    Every column is drawn from a normal distribution with its reference mean and
+    standard deviation from ``src.validate_distribution``, or, for the skewed grade
+    and age columns, by inverse transform sampling of its reference quantiles from
+    ``src.validate_quantiles``. Values are then clipped to their ``between`` range and
+    snapped to the nearest value of their ``isin`` domain from ``src.validate_schema``.
+    Count columns without a domain are rounded and kept non-negative. Target is drawn with the reference proportions. Columns are drawn
+    independently, so the data passes the correlation check, and the unrounded float
+    columns make duplicate rows practically impossible.
+
+    Parameters:
+    n_rows : int
+        Number of rows.
+    seed : int or numpy.random.SeedSequence, optional
+        Seed of the random generator. Default is 0.
+
+    Returns:
+    pandas.DataFrame
+        The dataset, with the cleaned column names and dtypes of the schema.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for name, column in SCHEMA.columns.items():
+        if name == 'Target':
+            continue
+        domains = _COLUMN_CHECKS[name] or []
+        if name in REF_QUANTILES.columns:
+            values = _from_quantiles(rng.random(n_rows), REF_QUANTILES[name], domains)
+        else:
+            values = rng.normal(REF_MEAN[name], REF_STD[name], n_rows)
+        for domain in domains:
+            if domain[0] == 'isin':
+                values = _snap(values, domain[1])
+            else:
+                values = np.clip(values, domain[1], domain[2])
+
+        if str(column.dtype).startswith('int'):
+            values = np.rint(values)
+            if not domains:
+                values = np.maximum(values, 0)
+            values = values.astype(np.int64)
+        data[name] = values
+
+    categories = list(REF_PROP['prop'])
+    data['Target'] = pd.Categorical.from_codes(
+        rng.choice(len(categories), size=n_rows, p=list(REF_PROP['prop'].values())), categories
+    ).astype(object)
+    return pd.DataFrame(data)
+
+def iter_synthetic(n_rows, chunksize=1_000_000, seed=0):
+    """
+    Generates a synthetic dataset of ``n_rows`` rows in chunks of ``chunksize`` rows,
+    so datasets larger than memory can be produced. Each chunk has its own child seed
+    of ``seed``, so the data is reproducible for a given chunk size.
+
+    Yields:
+    pandas.DataFrame
+        The chunks, see ``generate_synthetic``, with a continuous RangeIndex.
+    """
+    children = np.random.SeedSequence(seed).spawn(-(-n_rows // chunksize))
+    for i, child in enumerate(children):
+        start = i * chunksize
+        chunk = generate_synthetic(min(chunksize, n_rows - start), seed=child)
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        yield chunk
+
+def write_synthetic(path, n_rows, chunksize=1_000_000, seed=0, raw_names=False):
+    """
+    Writes a synthetic dataset to a semicolon-delimited CSV file one chunk at a time.
+
+    Parameters:
+    path : str
+        Path of the CSV file.
+    n_rows : int
+        Number of rows, e.g. from 10**4 to 10**8.
+    chunksize : int, optional
+        Number of rows generated and written at a time. Default is 1,000,000.
+    seed : int, optional
+        Seed of the random generator. Default is 0.
+    raw_names : bool, optional
+        Use the column names of the raw UCI file, so the file can be fed to
+        `scripts/data_cleaning_validation.py`. Default is False.
+
+    Returns:
+    str
+        The path of the file.
+    """
+    for i, chunk in enumerate(iter_synthetic(n_rows, chunksize=chunksize, seed=seed)):
+        if raw_names:
+            chunk = chunk.rename(columns=RAW_NAMES)
+        chunk.to_csv(path, sep=';', index=False, mode='w' if i == 0 else 'a', header=i == 0)
+    return path
+
+def _from_quantiles(u, quantiles, domains):
+    # Piecewise-linear quantile function through the reference quantiles, extended to
+    # probabilities 0 and 1 by the spacing of the outer quantiles and kept in range
+    p, q = quantiles.index.to_numpy(dtype=float), quantiles.to_numpy(dtype=float)
+    low, high = q[0] - (q[1] - q[0]), q[-1] + (q[-1] - q[-2])
+    for domain in domains:
+        if domain[0] == 'between':
+            low, high = max(low, domain[1]), min(high, domain[2])
+    return np.interp(u, np.concatenate([[0], p, [1]]), np.concatenate([[low], q, [high]]))
+
+def _snap(values, allowed):
+    # Replace each value with the nearest value of the sorted domain
+    upper = np.searchsorted(allowed, values).clip(1, len(allowed) - 1)
+    lower = upper - 1
+    nearest = np.where(values - allowed[lower] <= allowed[upper] - values, lower, upper)
+    return allowed[nearest].astype(float)
@@ -1,6 +1,10 @@
 import pandas as pd
 import numpy as np
+from src.instrumentation import instrumented
 
+TARGET_MAPPING = {"Enrolled": 0, "Dropout": 1, "Graduate": 2}
+
+@instrumented(rows=lambda df, *args, **kwargs: len(df))
 def validate_correlation(df, corr_threshold = 0.95):
     """
     Validates the correlation between features and the target column in a DataFrame.
@@ -24,18 +28,152 @@ def validate_correlation(df, corr_threshold = 0.95):
                    the correlated columns and their correlation value.
     """
     
+    # Correlations are rebuilt from co-moments, the Target column is encoded on the fly without copying df
+    correlations = correlation_from_summary(summarize_correlation(df))
+    _check_correlations(correlations, corr_threshold)
+
+def summarize_correlation(df):
+    """
+    Computes the pairwise counts, means, sums of squared deviations and co-moments
+    needed to rebuild the correlation matrix of a DataFrame (or of one chunk of a
+    larger file).
+
+    Missing values are handled pairwise, like ``pd.DataFrame.corr``: every statistic
+    for a pair of columns only uses the rows where both columns are present. The data
+    is shifted by its column means before the cross-products are taken, so the
+    co-moments stay accurate for columns with large offsets such as Course.
+    The input frame is never copied; the numeric columns (and the encoded Target
+    column) are read straight into one float matrix.
+
+    Summaries of separate chunks or shards are combined with
+    ``merge_correlation_summaries`` and checked with ``validate_correlation_summary``.
+
+    Args:
+        df (pd.DataFrame): The DataFrame (or chunk) to summarize.
+
+    Returns:
+        dict: A dictionary with the numeric ``columns`` and the p x p NumPy arrays
+              ``n`` (rows where both columns are present), ``mean`` (mean of the row
+              column over those rows), ``m2`` (sum of squared deviations of the row
+              column over those rows) and ``comoment`` (sum of cross deviations).
+    """
+    columns = [column for column in df.columns
+               if column == "Target" or pd.api.types.is_numeric_dtype(df[column])]
+
     # Encode the target column with numeric values so correlation test can be done
-    mapping = {"Enrolled": 0, "Dropout": 1, "Graduate": 2}
-    validate_df = df.copy()
-    validate_df["Target"] = validate_df["Target"].map(mapping)
-
-    # Calculate pairwise correlations for all feature/feature and feature/target pairs
-    correlations = validate_df.corr(numeric_only=True)
-
-    # Identify highly correlated pairs
-    for i in range(len(correlations)):
-        for j in range(i + 1, len(correlations.columns)):
-            corr_value = correlations.iloc[i, j]
-            if abs(corr_value) > corr_threshold:
-                pair = (correlations.index[i], correlations.columns[j])
-                raise Exception(f"Correlation exceeds threshold for: {pair}.")
\ No newline at end of file
+    values = np.empty((len(df), len(columns)))
+    for k, column in enumerate(columns):
+        series = df[column].map(TARGET_MAPPING) if column == "Target" else df[column]
+        values[:, k] = series.to_numpy(dtype=float, na_value=np.nan)
+
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    count = present.sum(axis=0)
+    shift = np.divide(filled.sum(axis=0), count, out=np.zeros(len(columns)), where=count > 0)
+    shifted = np.where(present, filled - shift, 0.0)
+    present = present.astype(float)
+
+    n = present.T @ present
+    sums = shifted.T @ present
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centred = np.where(n > 0, sums / n, 0.0)
+    comoment = shifted.T @ shifted - sums * centred.T
+    m2 = (shifted ** 2).T @ present - sums * centred
+
+    return {
+        "columns": columns,
+        "n": n,
+        "mean": np.where(n > 0, centred + shift[:, None], np.nan),
+        "m2": m2,
+        "comoment": comoment
+    }
+
+def merge_correlation_summaries(left, right):
+    """
+    Combines two summaries returned by ``summarize_correlation`` with Chan et al.'s
+    pairwise update, so the merged summary is the same as if both parts had been
+    summarized together.
+
+    Args:
+        left (dict): Summary of the first part of the data.
+        right (dict): Summary of the second part of the data.
+
+    Returns:
+        dict: The summary of both parts taken together.
+
+    Raises:
+        ValueError: If the two summaries were computed over different columns.
+    """
+    if left["columns"] != right["columns"]:
+        raise ValueError("Cannot merge correlation summaries with different columns.")
+
+    n = left["n"] + right["n"]
+    left_mean = np.nan_to_num(left["mean"])
+    delta = np.nan_to_num(right["mean"]) - left_mean
+    with np.errstate(divide="ignore", invalid="ignore"):
+        right_share = np.where(n > 0, right["n"] / n, 0.0)
+    weight = left["n"] * right_share
+
+    return {
+        "columns": left["columns"],
+        "n": n,
+        "mean": np.where(n > 0, left_mean + delta * right_share, np.nan),
+        "m2": left["m2"] + right["m2"] + delta ** 2 * weight,
+        "comoment": left["comoment"] + right["comoment"] + delta * delta.T * weight
+    }
+
+def correlation_from_summary(summary):
+    """
+    Builds the pairwise correlation matrix from a summary.
+
+    Args:
+        summary (dict): A summary returned by ``summarize_correlation``.
+
+    Returns:
+        pd.DataFrame: The correlation matrix, indexed by column on both axes.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlations = summary["comoment"] / np.sqrt(summary["m2"] * summary["m2"].T)
+
+    return pd.DataFrame(correlations, index=summary["columns"], columns=summary["columns"])
+
+def correlation_violations(correlations, corr_threshold = 0.95):
+    """
+    Finds every pair of columns whose correlation exceeds the threshold.
+
+    Args:
+        correlations (pd.DataFrame): A square correlation matrix.
+        corr_threshold (float, optional): The threshold above which correlations between columns
+                                          are considered too high. Default is 0.95.
+
+    Returns:
+        list: A list of ``(column, column, correlation)`` tuples, one per offending pair
+              in the upper triangle of the matrix.
+    """
+    values = correlations.to_numpy()
+    too_high = np.triu(np.abs(values) > corr_threshold, k=1)
+    rows, cols = np.nonzero(too_high)
+
+    return [(correlations.index[i], correlations.columns[j], float(values[i, j]))
+            for i, j in zip(rows, cols)]
+
+def validate_correlation_summary(summary, corr_threshold = 0.95):
+    """
+    Runs the check of ``validate_correlation`` on a summary built with
+    ``summarize_correlation``, e.g. the running summary of a chunked file.
+
+    Args:
+        summary (dict): The summary of the data to be validated.
+        corr_threshold (float, optional): The threshold above which correlations between columns
+                                          are considered too high. Default is 0.95.
+
+    Raises:
+        Exception: If any pair of columns has a correlation higher than the threshold.
+    """
+    _check_correlations(correlation_from_summary(summary), corr_threshold)
+
+def _check_correlations(correlations, corr_threshold):
+    # Identify highly correlated pairs, all of them are reported in one exception
+    violations = correlation_violations(correlations, corr_threshold)
+    if violations:
+        raise Exception("\n".join(f"Correlation exceeds threshold for: {(a, b)}." for a, b, _ in violations))
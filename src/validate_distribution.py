@@ -1,15 +1,102 @@
 import pandas as pd
 import numpy as np
+from src.instrumentation import instrumented
 
+REF_MEAN = pd.Series({
+    "Marital status": 1.178571429,
+    "Application mode": 18.66907776,
+    "Application order": 1.727848101,
+    "Course": 8856.642631,
+    "Daytime/evening attendance": 0.890822785,
+    "Previous qualification": 4.577757685,
+    "Previous qualification (grade)": 132.6133137,
+    "Nacionality": 1.873191682,
+    "Mother qualification": 19.5619349,
+    "Father qualification": 22.27531646,
+    "Mother occupation": 10.96089512,
+    "Father occupation": 11.03232369,
+    "Admission grade": 126.9781193,
+    "Displaced": 0.548372514,
+    "Educational special needs": 0.011528029,
+    "Debtor": 0.113698011,
+    "Tuition fees up to date": 0.880650995,
+    "Gender": 0.351717902,
+    "Scholarship holder": 0.248417722,
+    "Age at enrollment": 23.26514467,
+    "International": 0.024864376,
+    "Curricular units 1st sem (credited)": 0.709990958,
+    "Curricular units 1st sem (enrolled)": 6.27056962,
+    "Curricular units 1st sem (evaluations)": 8.299050633,
+    "Curricular units 1st sem (approved)": 4.706600362,
+    "Curricular units 1st sem (grade)": 10.64082158,
+    "Curricular units 1st sem (without evaluations)": 0.137658228,
+    "Curricular units 2nd sem (credited)": 0.54181736,
+    "Curricular units 2nd sem (enrolled)": 6.232142857,
+    "Curricular units 2nd sem (evaluations)": 8.063291139,
+    "Curricular units 2nd sem (approved)": 4.435804702,
+    "Curricular units 2nd sem (grade)": 10.23020572,
+    "Curricular units 2nd sem (without evaluations)": 0.150316456,
+    "Unemployment rate": 11.56613924,
+    "Inflation rate": 1.228028933,
+    "GDP": 0.001968807
+})
+
+REF_STD = pd.Series({
+    "Marital status": 0.605746946,
+    "Application mode": 17.48468229,
+    "Application order": 1.313793078,
+    "Course": 2063.566416,
+    "Daytime/evening attendance": 0.311896681,
+    "Previous qualification": 10.21659234,
+    "Previous qualification (grade)": 13.18833169,
+    "Nacionality": 6.914514032,
+    "Mother qualification": 15.60318632,
+    "Father qualification": 15.34310781,
+    "Mother occupation": 26.41825291,
+    "Father occupation": 25.26304024,
+    "Admission grade": 14.48200082,
+    "Displaced": 0.497710853,
+    "Educational special needs": 0.106760057,
+    "Debtor": 0.31748001,
+    "Tuition fees up to date": 0.324235383,
+    "Gender": 0.477560437,
+    "Scholarship holder": 0.432144154,
+    "Age at enrollment": 7.587815615,
+    "International": 0.155729319,
+    "Curricular units 1st sem (credited)": 2.360506619,
+    "Curricular units 1st sem (enrolled)": 2.480178175,
+    "Curricular units 1st sem (evaluations)": 4.179105569,
+    "Curricular units 1st sem (approved)": 3.09423798,
+    "Curricular units 1st sem (grade)": 4.843663381,
+    "Curricular units 1st sem (without evaluations)": 0.690880184,
+    "Curricular units 2nd sem (credited)": 1.918546144,
+    "Curricular units 2nd sem (enrolled)": 2.195950751,
+    "Curricular units 2nd sem (evaluations)": 3.947950941,
+    "Curricular units 2nd sem (approved)": 3.014763902,
+    "Curricular units 2nd sem (grade)": 5.210807955,
+    "Curricular units 2nd sem (without evaluations)": 0.753774069,
+    "Unemployment rate": 2.663850484,
+    "Inflation rate": 1.382710692,
+    "GDP": 2.269935441
+})
+
+REF_PROP = {
+    'prop': {'Graduate': 0.5, 'Enrolled': 0.18, 'Dropout': 0.32},
+    'std': 0.10
+}
+
+
+@instrumented(rows=lambda df, *args, **kwargs: len(df))
 def validate_distribution(df):
     """
     Validates the distribution of numerical columns in a DataFrame by comparing their 
     mean values to reference means and standard deviations.
 
     This function checks if the mean of each numerical column in the given DataFrame 
-    is within two standard deviations of the predefined reference mean for that column.
-    If a column's mean deviates more than two standard deviations from the reference mean, 
-    it raises an exception.
+    is within two standard deviations of the predefined reference mean for that column,
+    and if the proportion of each Target category is within two standard deviations of
+    its reference proportion. All columns are checked at once and every violation is
+    reported in a single exception.
 
     Args:
         df (pd.DataFrame): The DataFrame containing the data to be validated. 
@@ -18,117 +105,169 @@ def validate_distribution(df):
     Raises:
         Exception: If any column's mean deviates by more than two standard deviations 
                   from the reference mean, an exception is raised with a message specifying
-                  the column name, its mean, and the reference mean.
+                  the column name, its mean, and the reference mean for every such column.
+    """
+
+    validate_distribution_summary(summarize_distribution(df))
+
+
+def summarize_distribution(df):
     """
+    Computes the count, mean and sum of squared deviations (M2) of every numerical
+    column and the counts of each Target category in a single vectorized pass.
+
+    Summaries of separate chunks of a file, or of shards processed by different
+    workers, can be combined exactly with ``merge_distribution_summaries`` and
+    checked once at the end with ``validate_distribution_summary``.
+
+    Args:
+        df (pd.DataFrame): The DataFrame (or chunk) to summarize.
+
+    Returns:
+        dict: A dictionary with the keys ``columns`` (list of numerical column names),
+              ``count``, ``mean`` and ``m2`` (NumPy arrays aligned with ``columns``)
+              and ``target_counts`` (pd.Series indexed by category, or None if the
+              DataFrame has no Target column).
+    """
+    columns = [column for column in df.columns if column != 'Target']
+    values = df[columns].to_numpy(dtype=float)
+
+    present = ~np.isnan(values)
+    count = present.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(present, values, 0.0).sum(axis=0) / count
+    m2 = np.where(present, values - mean, 0.0)
+    m2 = (m2 * m2).sum(axis=0)
+
+    if 'Target' in df.columns:
+        target_counts = df['Target'].value_counts(dropna=True)
+    else:
+        target_counts = None
+
+    return {
+        'columns': columns,
+        'count': count,
+        'mean': mean,
+        'm2': m2,
+        'target_counts': target_counts
+    }
+
+
+def merge_distribution_summaries(left, right):
+    """
+    Combines two summaries returned by ``summarize_distribution`` using Chan et al.'s
+    pairwise update, so the merged mean and variance are the same as if both parts
+    had been summarized together.
+
+    Args:
+        left (dict): Summary of the first part of the data.
+        right (dict): Summary of the second part of the data.
+
+    Returns:
+        dict: The summary of both parts taken together.
+
+    Raises:
+        ValueError: If the two summaries were computed over different columns.
+    """
+    if left['columns'] != right['columns']:
+        raise ValueError('Cannot merge distribution summaries with different columns.')
+
+    count = left['count'] + right['count']
+    left_mean = np.nan_to_num(left['mean'])
+    right_mean = np.nan_to_num(right['mean'])
+    delta = right_mean - left_mean
+    with np.errstate(divide='ignore', invalid='ignore'):
+        right_share = np.where(count > 0, right['count'] / count, 0.0)
+        mean = np.where(count > 0, left_mean + delta * right_share, np.nan)
+    m2 = left['m2'] + right['m2'] + delta ** 2 * left['count'] * right_share
 
-    ref_mean = pd.DataFrame({
-        "Marital status": 1.178571429,
-        "Application mode": 18.66907776,
-        "Application order": 1.727848101,
-        "Course": 8856.642631,
-        "Daytime/evening attendance": 0.890822785,
-        "Previous qualification": 4.577757685,
-        "Previous qualification (grade)": 132.6133137,
-        "Nacionality": 1.873191682,
-        "Mother qualification": 19.5619349,
-        "Father qualification": 22.27531646,
-        "Mother occupation": 10.96089512,
-        "Father occupation": 11.03232369,
-        "Admission grade": 126.9781193,
-        "Displaced": 0.548372514,
-        "Educational special needs": 0.011528029,
-        "Debtor": 0.113698011,
-        "Tuition fees up to date": 0.880650995,
-        "Gender": 0.351717902,
-        "Scholarship holder": 0.248417722,
-        "Age at enrollment": 23.26514467,
-        "International": 0.024864376,
-        "Curricular units 1st sem (credited)": 0.709990958,
-        "Curricular units 1st sem (enrolled)": 6.27056962,
-        "Curricular units 1st sem (evaluations)": 8.299050633,
-        "Curricular units 1st sem (approved)": 4.706600362,
-        "Curricular units 1st sem (grade)": 10.64082158,
-        "Curricular units 1st sem (without evaluations)": 0.137658228,
-        "Curricular units 2nd sem (credited)": 0.54181736,
-        "Curricular units 2nd sem (enrolled)": 6.232142857,
-        "Curricular units 2nd sem (evaluations)": 8.063291139,
-        "Curricular units 2nd sem (approved)": 4.435804702,
-        "Curricular units 2nd sem (grade)": 10.23020572,
-        "Curricular units 2nd sem (without evaluations)": 0.150316456,
-        "Unemployment rate": 11.56613924,
-        "Inflation rate": 1.228028933,
-        "GDP": 0.001968807
-    }, index=[0])
-
-    ref_std = pd.DataFrame({
-        "Marital status": 0.605746946,
-        "Application mode": 17.48468229,
-        "Application order": 1.313793078,
-        "Course": 2063.566416,
-        "Daytime/evening attendance": 0.311896681,
-        "Previous qualification": 10.21659234,
-        "Previous qualification (grade)": 13.18833169,
-        "Nacionality": 6.914514032,
-        "Mother qualification": 15.60318632,
-        "Father qualification": 15.34310781,
-        "Mother occupation": 26.41825291,
-        "Father occupation": 25.26304024,
-        "Admission grade": 14.48200082,
-        "Displaced": 0.497710853,
-        "Educational special needs": 0.106760057,
-        "Debtor": 0.31748001,
-        "Tuition fees up to date": 0.324235383,
-        "Gender": 0.477560437,
-        "Scholarship holder": 0.432144154,
-        "Age at enrollment": 7.587815615,
-        "International": 0.155729319,
-        "Curricular units 1st sem (credited)": 2.360506619,
-        "Curricular units 1st sem (enrolled)": 2.480178175,
-        "Curricular units 1st sem (evaluations)": 4.179105569,
-        "Curricular units 1st sem (approved)": 3.09423798,
-        "Curricular units 1st sem (grade)": 4.843663381,
-        "Curricular units 1st sem (without evaluations)": 0.690880184,
-        "Curricular units 2nd sem (credited)": 1.918546144,
-        "Curricular units 2nd sem (enrolled)": 2.195950751,
-        "Curricular units 2nd sem (evaluations)": 3.947950941,
-        "Curricular units 2nd sem (approved)": 3.014763902,
-        "Curricular units 2nd sem (grade)": 5.210807955,
-        "Curricular units 2nd sem (without evaluations)": 0.753774069,
-        "Unemployment rate": 2.663850484,
-        "Inflation rate": 1.382710692,
-        "GDP": 2.269935441
-    }, index=[0])
-
-    ref_prop = {
-        'prop': {'Graduate': 0.5, 'Enrolled': 0.18, 'Dropout': 0.32},
-        'std': 0.10
+    if left['target_counts'] is None or right['target_counts'] is None:
+        target_counts = left['target_counts'] if right['target_counts'] is None else right['target_counts']
+    else:
+        target_counts = left['target_counts'].add(right['target_counts'], fill_value=0)
+
+    return {
+        'columns': left['columns'],
+        'count': count,
+        'mean': mean,
+        'm2': m2,
+        'target_counts': target_counts
     }
 
+
+def describe_distribution_summary(summary):
+    """
+    Turns a summary into a table of per-column statistics.
+
+    Args:
+        summary (dict): A summary returned by ``summarize_distribution``.
+
+    Returns:
+        pd.DataFrame: The count, mean, sample variance and standard deviation of each
+                      numerical column, indexed by column name.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = np.where(summary['count'] > 1, summary['m2'] / (summary['count'] - 1), np.nan)
+
+    return pd.DataFrame({
+        'count': summary['count'],
+        'mean': summary['mean'],
+        'variance': variance,
+        'std': np.sqrt(variance)
+    }, index=summary['columns'])
+
+
+def distribution_violations(summary):
+    """
+    Lists every distribution check that fails for a summary.
+
+    Args:
+        summary (dict): A summary returned by ``summarize_distribution``.
+
+    Returns:
+        list: One message per column mean or Target proportion that is more than two
+              standard deviations away from its reference value.
+    """
+    violations = []
+
     # Check distribution for all numeric columns by checking if the mean is 2 standard deviation away from the reference mean
-    for column in df.columns:
-
-        if column == 'Target':
-            # Calculate the proportions of the categorical column
-            proportions = df[column].value_counts(normalize=True, dropna=True).to_dict()
-
-            # Check proportions
-            for cat in ref_prop['prop']:
-                expected_prop = ref_prop['prop'][cat]
-                prop = proportions.get(cat, 0)
-                std = ref_prop['std']
-                
-                if abs(prop - expected_prop) > 2*std:
-                    raise Exception(f"Proportion for category {cat} in {column} is more than 2 standard deviation away from reference proportion:"
-                                    f"Expected={expected_prop}, Calculated={prop}")
-
-        else:
-            col = df[column].dropna()
-
-            # Calculate mean and standard deviation for data
-            expected_mean = ref_mean.loc[0, column]
-            expected_std = ref_std.loc[0, column]
-            mean = col.mean()
-
-            # Check if mean is 2*std away from reference mean
-            if abs(mean - expected_mean) > 2*expected_std:
-                raise Exception(f"Column {col} mean {mean} is 2 standard deviation away from reference mean {expected_mean}.")
\ No newline at end of file
+    columns = pd.Index(summary['columns'])
+    unknown = columns.difference(REF_MEAN.index, sort=False)
+    violations += [f"Column {column} has no reference distribution." for column in unknown]
+
+    mean = pd.Series(summary['mean'], index=columns)
+    expected_mean = REF_MEAN.reindex(columns)
+    expected_std = REF_STD.reindex(columns)
+    outside = (mean - expected_mean).abs() > 2*expected_std
+    for column in columns[outside.to_numpy()]:
+        violations.append(f"Column {column} mean {mean[column]} is 2 standard deviation away from reference mean {expected_mean[column]}.")
+
+    # Check proportions of the Target categories
+    target_counts = summary['target_counts']
+    if target_counts is not None:
+        expected_prop = pd.Series(REF_PROP['prop'])
+        prop = (target_counts / target_counts.sum()).reindex(expected_prop.index, fill_value=0)
+        outside = (prop - expected_prop).abs() > 2*REF_PROP['std']
+        for cat in expected_prop.index[outside.to_numpy()]:
+            violations.append(f"Proportion for category {cat} in Target is more than 2 standard deviation away from reference proportion:"
+                              f"Expected={expected_prop[cat]}, Calculated={prop[cat]}")
+
+    return violations
+
+
+def validate_distribution_summary(summary):
+    """
+    Runs the checks of ``validate_distribution`` on a summary built with
+    ``summarize_distribution``, e.g. the running summary of a chunked file.
+
+    Args:
+        summary (dict): The summary of the data to be validated.
+
+    Raises:
+        Exception: If any column's mean or Target proportion deviates by more than
+                  two standard deviations from the reference values. The message
+                  lists every violation, one per line.
+    """
+    violations = distribution_violations(summary)
+    if violations:
+        raise Exception("\n".join(violations))
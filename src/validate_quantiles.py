@@ -0,0 +1,163 @@
+import json
+import pandas as pd
+from src.instrumentation import instrumented
+from src.quantile_sketch import KLLSketch
+
+# Quantiles of the full UCI data set (4,424 rows), taken as observed values
+REF_QUANTILES = pd.DataFrame({
+    "Previous qualification (grade)": [100.0, 110.0, 125.0, 133.1, 140.0, 157.0, 170.0],
+    "Admission grade": [99.0, 103.4, 117.9, 126.1, 134.8, 153.5, 166.6],
+    "Age at enrollment": [18.0, 18.0, 19.0, 20.0, 25.0, 41.0, 50.0],
+    "Curricular units 1st sem (grade)": [0.0, 0.0, 11.0, 12.285714, 13.4, 14.857143, 16.0],
+    "Curricular units 2nd sem (grade)": [0.0, 0.0, 10.75, 12.2, 13.333333, 14.962857, 16.0]
+}, index=[0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99])
+
+# Largest rank difference at the median, narrowed toward the tails (see ``quantile_violations``)
+REF_RANK_TOLERANCE = 0.1
+
+
+@instrumented(rows=lambda df, *args, **kwargs: len(df))
+def validate_quantiles(df, reference=None, tolerance=REF_RANK_TOLERANCE):
+    """
+    Validates the shape of numerical columns by comparing their quantiles to reference
+    quantiles, which catches shifted tails that a check of the mean misses.
+
+    Each column is summarized with a mergeable KLL quantile sketch. For every reference
+    quantile, e.g. the 95th percentile of Age at enrollment, the share of the data
+    at or below the reference value is estimated from the sketch; the check fails if
+    that share differs from the quantile's probability p by more than
+    ``tolerance * 4 * p * (1 - p)`` plus the sketch's rank error. The allowed difference
+    shrinks toward the tails like the sampling error of a quantile does, so a shift of
+    the oldest 5-10% of students is caught. Comparing ranks rather than values keeps the
+    check scale free and handles columns with many tied values, such as a grade of 0.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the data to be validated.
+        reference (pd.DataFrame, optional): Reference quantiles, one column per feature
+                                            indexed by probability. Defaults to ``REF_QUANTILES``.
+        tolerance (float, optional): Largest allowed rank difference at the median.
+                                     Default is 0.1.
+
+    Raises:
+        Exception: If any reference quantile is out of tolerance. The message lists
+                   every violation, one per line.
+    """
+    reference = REF_QUANTILES if reference is None else reference
+    columns = [column for column in reference.columns if column in df.columns]
+    validate_quantile_summary(summarize_quantiles(df, columns), reference=reference, tolerance=tolerance)
+
+
+def summarize_quantiles(df, columns=None, k=200):
+    """
+    Builds a KLL sketch of every column in one pass over the DataFrame.
+
+    Summaries of separate chunks of a file, or of shards processed by different
+    workers, can be combined with ``merge_quantile_summaries``; their memory does not
+    depend on the number of rows.
+
+    Args:
+        df (pd.DataFrame): The DataFrame (or chunk) to summarize.
+        columns (list, optional): Columns to sketch. Defaults to the columns of
+                                  ``REF_QUANTILES`` found in the DataFrame.
+        k (int, optional): Size parameter of the sketches. Default is 200.
+
+    Returns:
+        dict: A dictionary with the key ``sketches``, a ``KLLSketch`` per column.
+    """
+    if columns is None:
+        columns = [column for column in REF_QUANTILES.columns if column in df.columns]
+    return {'sketches': {column: KLLSketch(k=k).update(df[column].to_numpy(dtype=float)) for column in columns}}
+
+
+def merge_quantile_summaries(left, right):
+    """
+    Combines two summaries returned by ``summarize_quantiles``.
+
+    Raises:
+        ValueError: If the two summaries sketch different columns.
+    """
+    if list(left['sketches']) != list(right['sketches']):
+        raise ValueError('Cannot merge quantile summaries with different columns.')
+    return {'sketches': {column: sketch.merge(right['sketches'][column]) for column, sketch in left['sketches'].items()}}
+
+
+def quantile_violations(summary, reference=None, tolerance=REF_RANK_TOLERANCE):
+    """
+    Lists every quantile check that fails for a summary.
+
+    Args:
+        summary (dict): A summary returned by ``summarize_quantiles``.
+        reference (pd.DataFrame, optional): Reference quantiles. Defaults to ``REF_QUANTILES``.
+        tolerance (float, optional): Largest allowed rank difference at the median,
+                                     scaled by 4 * p * (1 - p) at probability p. Default is 0.1.
+
+    Returns:
+        list: One message per reference quantile out of tolerance.
+    """
+    reference = REF_QUANTILES if reference is None else reference
+    violations = []
+    for column, sketch in summary['sketches'].items():
+        if column not in reference.columns:
+            violations.append(f"Column {column} has no reference quantiles.")
+            continue
+        if sketch.n == 0:
+            continue
+        probabilities = reference.index.to_numpy(dtype=float)
+        values = reference[column].to_numpy(dtype=float)
+        # With ties the rank of a value is an interval: the share strictly below it
+        # up to the share at or below it
+        below = sketch.rank(values, inclusive=False)
+        at_or_below = sketch.rank(values, inclusive=True)
+        allowed = tolerance * 4 * probabilities * (1 - probabilities) + sketch.rank_error()
+        outside = (probabilities < below - allowed) | (probabilities > at_or_below + allowed)
+        for p, value, low, high in zip(probabilities[outside], values[outside], below[outside], at_or_below[outside]):
+            violations.append(f"Column {column} reference {p:g} quantile {value} has rank {low:.3f}-{high:.3f}, "
+                              f"more than {tolerance * 4 * p * (1 - p):.3f} away from {p:g}: estimated {p:g} quantile is {sketch.quantile(p)}.")
+    return violations
+
+
+def validate_quantile_summary(summary, reference=None, tolerance=REF_RANK_TOLERANCE):
+    """
+    Runs the checks of ``validate_quantiles`` on a summary built with
+    ``summarize_quantiles``, e.g. the running summary of a chunked file.
+
+    Raises:
+        Exception: If any reference quantile is out of tolerance. The message lists
+                   every violation, one per line.
+    """
+    violations = quantile_violations(summary, reference=reference, tolerance=tolerance)
+    if violations:
+        raise Exception("\n".join(violations))
+
+
+def reference_quantiles(summary, probabilities=None):
+    """
+    Turns a summary of reference data into reference quantiles, e.g. to replace
+    ``REF_QUANTILES`` with quantiles of newer data.
+
+    Args:
+        summary (dict): A summary returned by ``summarize_quantiles``.
+        probabilities (list, optional): Probabilities of the quantiles. Defaults to
+                                        the index of ``REF_QUANTILES``.
+
+    Returns:
+        pd.DataFrame: The estimated quantiles, one column per feature indexed by probability.
+    """
+    probabilities = REF_QUANTILES.index if probabilities is None else pd.Index(probabilities)
+    return pd.DataFrame({column: sketch.quantile(probabilities.to_numpy(dtype=float))
+                         for column, sketch in summary['sketches'].items()}, index=probabilities)
+
+
+def save_reference_quantiles(reference, path):
+    """Writes reference quantiles as JSON: {column: {probability: value}}."""
+    with open(path, 'w') as f:
+        json.dump({column: {str(p): float(v) for p, v in values.items()} for column, values in reference.items()}, f, indent=2)
+
+
+def load_reference_quantiles(path):
+    """Reads reference quantiles written by ``save_reference_quantiles``."""
+    with open(path) as f:
+        data = json.load(f)
+    reference = pd.DataFrame(data)
+    reference.index = reference.index.astype(float)
+    return reference.sort_index()
@@ -1,7 +1,184 @@
 import pandera as pa
 import pandas as pd
 import numpy as np
+from pandera.engines.pandas_engine import Engine
+from src.instrumentation import instrumented
+from src.row_fingerprint import row_fingerprints, duplicate_mask
 
+SCHEMA = pa.DataFrameSchema(
+    {
+        "Marital status": pa.Column(int, pa.Check.isin([1, 2, 3, 4, 5, 6]), 
+                                    nullable=True),
+        "Application mode": pa.Column(int, pa.Check.isin(
+            [1, 2, 5, 7, 10, 15, 16, 17, 18, 26, 
+            27, 39, 42, 43, 44, 51, 53, 57])),
+        "Application order": pa.Column(int, pa.Check.isin(
+            [0, 1, 2, 3, 4, 5, 6, 9])),
+        "Course": pa.Column(int, pa.Check.isin(
+            [33, 171, 8014, 9003, 9070, 9085, 9119, 9130, 9147, 9238, 
+            9254, 9500, 9556, 9670, 9773, 9853, 9991]), nullable=True), 
+        "Daytime/evening attendance": pa.Column(int, pa.Check.isin(
+            [0, 1]), nullable=True),
+        "Previous qualification": pa.Column(int, pa.Check.isin(
+            [1, 2, 3, 4, 5, 6, 9, 10, 12, 14, 15, 19, 38, 39, 40, 42, 43])),
+        "Previous qualification (grade)": pa.Column(float, pa.Check.between(
+            0, 200)),
+        "Nacionality": pa.Column(int, pa.Check.isin(
+            [1, 2, 6, 11, 13, 14, 17, 21, 22, 24, 25, 26, 32, 41, 62, 
+            100, 101, 103, 105, 108, 109]), nullable=True),
+        "Mother qualification": pa.Column(int, pa.Check.isin(
+            [1, 2, 3, 4, 5, 6, 9, 10, 11, 12, 14, 18, 19, 22, 26, 27, 29, 30, 
+            34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44]), nullable=True),
+        "Father qualification": pa.Column(int, pa.Check.isin(
+            [1, 2, 3, 4, 5, 6, 9, 10, 11, 12, 13, 14, 18, 19, 20, 22, 25, 
+            26, 27,29, 30, 31, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 
+            43, 44]), nullable=True),
+        "Mother occupation": pa.Column(int, pa.Check.isin(
+        [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 90, 99, 122, 123, 125, 131,
+         132, 134, 141, 143, 144, 151, 152, 153, 171, 173, 175, 191, 
+         192, 193, 194]), nullable=True),
+        "Father occupation": pa.Column(int, pa.Check.isin(
+            [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 90, 99, 101, 102, 103, 
+            112, 114, 121, 122, 123, 124, 131, 132, 134, 135, 141, 143, 
+            144, 151, 152, 153, 154, 161, 163, 171, 172, 174, 175, 
+            181, 182, 183, 192, 193, 194, 195]), nullable=True),
+        "Admission grade": pa.Column(float, pa.Check.between(0, 200), 
+                                    nullable=True),
+        "Displaced": pa.Column(int, pa.Check.isin([0, 1]), nullable=True), 
+        "Educational special needs": pa.Column(int, pa.Check.isin([0, 1]), 
+                                            nullable=True),
+        "Debtor": pa.Column(int, pa.Check.isin([0, 1]), nullable=True),
+        "Tuition fees up to date": pa.Column(int, pa.Check.isin([0, 1]), 
+                                            nullable=True),
+        "Gender": pa.Column(int, pa.Check.isin([0, 1]), nullable=True),
+        "Scholarship holder": pa.Column(int, pa.Check.isin([0, 1]), 
+                                        nullable=True),
+        "Age at enrollment": pa.Column(int, pa.Check.between(15, 100), 
+                                    nullable=True),
+        "International": pa.Column(int, pa.Check.isin([0, 1]), 
+                                nullable=True),
+        "Curricular units 1st sem (credited)": pa.Column(int, 
+                                                        nullable=True),
+        "Curricular units 1st sem (enrolled)": pa.Column(int, 
+                                                        nullable=True),
+        "Curricular units 1st sem (evaluations)": pa.Column(int, 
+                                                            nullable=True), 
+        "Curricular units 1st sem (approved)": pa.Column(int, 
+                                                        nullable=True),
+        "Curricular units 1st sem (grade)": pa.Column(
+            float, pa.Check.between(0, 20), nullable=True),
+        "Curricular units 1st sem (without evaluations)": pa.Column(
+            int, nullable=True),
+        "Curricular units 2nd sem (credited)": pa.Column(
+            int, nullable=True),
+        "Curricular units 2nd sem (enrolled)": pa.Column(
+            int, nullable=True),
+        "Curricular units 2nd sem (evaluations)": pa.Column(
+            int, nullable=True),
+        "Curricular units 2nd sem (approved)": pa.Column(int, nullable=True),
+        "Curricular units 2nd sem (grade)": pa.Column(
+            float, pa.Check.between(0, 20), nullable=True),
+        "Curricular units 2nd sem (without evaluations)": pa.Column(
+            int, nullable=True),
+        "Unemployment rate": pa.Column(float, nullable=True),
+        "Inflation rate": pa.Column(float, nullable=True),
+        "GDP": pa.Column(float, nullable=True),
+        "Target": pa.Column(str, pa.Check.isin(
+            ['Dropout', 'Enrolled', 'Graduate']))
+    },
+    checks=[
+        pa.Check(lambda df: pd.Series(~duplicate_mask(row_fingerprints(df, bits=128)), index=df.index),
+                error="Duplicate rows found."),
+        pa.Check(lambda df: ~(df.isna().all(axis=1)).any(), 
+                error="Empty rows found.")
+    ]
+)
+
+
+def _compile_column_checks(schema):
+    """
+    Pre-computes NumPy lookup tables for the column checks of a pandera schema.
+
+    ``isin`` domains become sorted arrays searched with ``np.searchsorted`` and
+    ``between`` checks become (min, max, include_min, include_max) tuples. Columns
+    with any other kind of check are left to pandera.
+    """
+    compiled = {}
+    for name, column in schema.columns.items():
+        domains = []
+        for check in column.checks:
+            statistics = check.statistics
+            if check.name == 'isin':
+                domains.append(('isin', np.sort(np.asarray(list(statistics['allowed_values'])))))
+            elif check.name == 'in_range':
+                domains.append(('between', statistics['min_value'], statistics['max_value'],
+                                statistics['include_min'], statistics['include_max']))
+            else:
+                domains = None
+                break
+        compiled[name] = domains
+    return compiled
+
+
+_COLUMN_CHECKS = _compile_column_checks(SCHEMA)
+
+
+def _in_domain(values, domain):
+    if domain[0] == 'isin':
+        allowed = domain[1]
+        positions = np.searchsorted(allowed, values).clip(0, len(allowed) - 1)
+        return allowed[positions] == values
+
+    _, min_value, max_value, include_min, include_max = domain
+    above = values >= min_value if include_min else values > min_value
+    below = values <= max_value if include_max else values < max_value
+    return above & below
+
+
+def check_schema_fast(df):
+    """
+    Checks a DataFrame against the schema without going through pandera.
+
+    Column presence, dtypes, nullability and the ``isin``/``between`` checks are
+    evaluated with the pre-computed lookup tables, empty rows with a vectorized
+    mask and duplicate rows with a 64-bit fingerprint of each row.
+
+    Args:
+        df (pd.DataFrame): The DataFrame whose schema is to be validated.
+
+    Returns:
+        bool: True if the DataFrame passes every check. False if it might not, in
+              which case pandera should be run to confirm and report the failures.
+    """
+    try:
+        for name, column in SCHEMA.columns.items():
+            if name not in df.columns or _COLUMN_CHECKS[name] is None:
+                return False
+
+            series = df[name]
+            dtype_ok = column.dtype.check(Engine.dtype(series.dtype), series)
+            if not (dtype_ok if isinstance(dtype_ok, bool) else dtype_ok.all()):
+                return False
+
+            present = series.notna().to_numpy()
+            if not column.nullable and not present.all():
+                return False
+
+            values = series.to_numpy()[present]
+            for domain in _COLUMN_CHECKS[name]:
+                if not _in_domain(values, domain).all():
+                    return False
+
+        # Dataframe level checks: empty rows and duplicate rows
+        if df.isna().all(axis=1).any():
+            return False
+        return not duplicate_mask(row_fingerprints(df)).any()
+    except TypeError:
+        # e.g. values that cannot be compared with the lookup table
+        return False
+
+
+@instrumented(rows=lambda df, *args, **kwargs: len(df))
 def validate_schema(df):
     """
     Validates the schema of a DataFrame by checking if it contains all the required columns.
@@ -10,6 +187,10 @@ def validate_schema(df):
     and raises an exception if any required columns are missing. It checks for exact matches 
     in column names, ensuring that all expected columns are present.
 
+    The schema is built once when the module is imported. Every call first runs
+    ``check_schema_fast``; pandera only validates the DataFrame, and produces its
+    detailed failure report, when the fast path finds a possible problem.
+
     Args:
         df (pd.DataFrame): The DataFrame whose schema is to be validated.
         required_columns (list): A list of column names that must be present in the DataFrame.
@@ -19,93 +200,5 @@ def validate_schema(df):
                   with a message specifying the missing columns.
     """
     
-    schema = pa.DataFrameSchema(
-        {
-            "Marital status": pa.Column(int, pa.Check.isin([1, 2, 3, 4, 5, 6]), 
-                                        nullable=True),
-            "Application mode": pa.Column(int, pa.Check.isin(
-                [1, 2, 5, 7, 10, 15, 16, 17, 18, 26, 
-                27, 39, 42, 43, 44, 51, 53, 57])),
-            "Application order": pa.Column(int, pa.Check.isin(
-                [0, 1, 2, 3, 4, 5, 6, 9])),
-            "Course": pa.Column(int, pa.Check.isin(
-                [33, 171, 8014, 9003, 9070, 9085, 9119, 9130, 9147, 9238, 
-                9254, 9500, 9556, 9670, 9773, 9853, 9991]), nullable=True), 
-            "Daytime/evening attendance": pa.Column(int, pa.Check.isin(
-                [0, 1]), nullable=True),
-            "Previous qualification": pa.Column(int, pa.Check.isin(
-                [1, 2, 3, 4, 5, 6, 9, 10, 12, 14, 15, 19, 38, 39, 40, 42, 43])),
-            "Previous qualification (grade)": pa.Column(float, pa.Check.between(
-                0, 200)),
-            "Nacionality": pa.Column(int, pa.Check.isin(
-                [1, 2, 6, 11, 13, 14, 17, 21, 22, 24, 25, 26, 32, 41, 62, 
-                100, 101, 103, 105, 108, 109]), nullable=True),
-            "Mother qualification": pa.Column(int, pa.Check.isin(
-                [1, 2, 3, 4, 5, 6, 9, 10, 11, 12, 14, 18, 19, 22, 26, 27, 29, 30, 
-                34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44]), nullable=True),
-            "Father qualification": pa.Column(int, pa.Check.isin(
-                [1, 2, 3, 4, 5, 6, 9, 10, 11, 12, 13, 14, 18, 19, 20, 22, 25, 
-                26, 27,29, 30, 31, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 
-                43, 44]), nullable=True),
-            "Mother occupation": pa.Column(int, pa.Check.isin(
-            [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 90, 99, 122, 123, 125, 131,
-             132, 134, 141, 143, 144, 151, 152, 153, 171, 173, 175, 191, 
-             192, 193, 194]), nullable=True),
-            "Father occupation": pa.Column(int, pa.Check.isin(
-                [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 90, 99, 101, 102, 103, 
-                112, 114, 121, 122, 123, 124, 131, 132, 134, 135, 141, 143, 
-                144, 151, 152, 153, 154, 161, 163, 171, 172, 174, 175, 
-                181, 182, 183, 192, 193, 194, 195]), nullable=True),
-            "Admission grade": pa.Column(float, pa.Check.between(0, 200), 
-                                        nullable=True),
-            "Displaced": pa.Column(int, pa.Check.isin([0, 1]), nullable=True), 
-            "Educational special needs": pa.Column(int, pa.Check.isin([0, 1]), 
-                                                nullable=True),
-            "Debtor": pa.Column(int, pa.Check.isin([0, 1]), nullable=True),
-            "Tuition fees up to date": pa.Column(int, pa.Check.isin([0, 1]), 
-                                                nullable=True),
-            "Gender": pa.Column(int, pa.Check.isin([0, 1]), nullable=True),
-            "Scholarship holder": pa.Column(int, pa.Check.isin([0, 1]), 
-                                            nullable=True),
-            "Age at enrollment": pa.Column(int, pa.Check.between(15, 100), 
-                                        nullable=True),
-            "International": pa.Column(int, pa.Check.isin([0, 1]), 
-                                    nullable=True),
-            "Curricular units 1st sem (credited)": pa.Column(int, 
-                                                            nullable=True),
-            "Curricular units 1st sem (enrolled)": pa.Column(int, 
-                                                            nullable=True),
-            "Curricular units 1st sem (evaluations)": pa.Column(int, 
-                                                                nullable=True), 
-            "Curricular units 1st sem (approved)": pa.Column(int, 
-                                                            nullable=True),
-            "Curricular units 1st sem (grade)": pa.Column(
-                float, pa.Check.between(0, 20), nullable=True),
-            "Curricular units 1st sem (without evaluations)": pa.Column(
-                int, nullable=True),
-            "Curricular units 2nd sem (credited)": pa.Column(
-                int, nullable=True),
-            "Curricular units 2nd sem (enrolled)": pa.Column(
-                int, nullable=True),
-            "Curricular units 2nd sem (evaluations)": pa.Column(
-                int, nullable=True),
-            "Curricular units 2nd sem (approved)": pa.Column(int, nullable=True),
-            "Curricular units 2nd sem (grade)": pa.Column(
-                float, pa.Check.between(0, 20), nullable=True),
-            "Curricular units 2nd sem (without evaluations)": pa.Column(
-                int, nullable=True),
-            "Unemployment rate": pa.Column(float, nullable=True),
-            "Inflation rate": pa.Column(float, nullable=True),
-            "GDP": pa.Column(float, nullable=True),
-            "Target": pa.Column(str, pa.Check.isin(
-                ['Dropout', 'Enrolled', 'Graduate']))
-        },
-        checks=[
-            pa.Check(lambda df: ~df.duplicated().any(), 
-                    error="Duplicate rows found."),
-            pa.Check(lambda df: ~(df.isna().all(axis=1)).any(), 
-                    error="Empty rows found.")
-        ]
-    )
-
-    schema.validate(df, lazy=True)
\ No newline at end of file
+    if not check_schema_fast(df):
+        SCHEMA.validate(df, lazy=True)
@@ -0,0 +1,82 @@
+import pytest
+import numpy as np
+import os
+import sys
+from sklearn.base import clone
+from sklearn.neighbors import KNeighborsClassifier
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.approximate_knn import LSHKNeighborsClassifier, benchmark_recall
+
+@pytest.fixture
+def blobs():
+    rng = np.random.default_rng(0)
+    centres = rng.normal(scale=5, size=(3, 6))
+    y = rng.integers(0, 3, size=600)
+    X = centres[y] + rng.normal(size=(600, 6))
+    return X, np.array(["Dropout", "Enrolled", "Graduate"])[y]
+
+def test_single_bucket_matches_exact_knn(blobs):
+    # With no hyperplanes every row shares one bucket, so the search is exact
+    X, y = blobs
+    lsh = LSHKNeighborsClassifier(n_neighbors=7, n_bits=0, n_tables=1).fit(X[:500], y[:500])
+    exact = KNeighborsClassifier(n_neighbors=7).fit(X[:500], y[:500])
+
+    np.testing.assert_array_equal(lsh.predict(X[500:]), exact.predict(X[500:]))
+    np.testing.assert_allclose(lsh.predict_proba(X[500:]), exact.predict_proba(X[500:]))
+
+def test_lsh_recall_and_accuracy(blobs):
+    X, y = blobs
+    lsh = LSHKNeighborsClassifier(n_neighbors=5, n_tables=8, n_bits=4, random_state=0).fit(X[:500], y[:500])
+
+    result = benchmark_recall(lsh, X[:500], X[500:])
+    assert result["recall"] > 0.8
+    assert lsh.score(X[500:], y[500:]) > 0.9
+
+def test_lsh_buckets_follow_euclidean_distance(blobs):
+    # Far from the origin every row is on the same side of a hyperplane through the
+    # origin; hyperplanes through training rows still split the data into small buckets
+    X, y = blobs
+    X = X + 100
+    lsh = LSHKNeighborsClassifier(n_neighbors=5, n_tables=8, n_bits=4, random_state=0).fit(X[:500], y[:500])
+    largest = [np.diff(starts).max() for _, starts, _ in lsh._tables]
+    assert np.mean(largest) < 250
+    assert benchmark_recall(lsh, X[:500], X[500:])["recall"] > 0.8
+
+def test_lsh_candidates_stay_bounded_as_training_set_grows():
+    # The number of bits grows with the training set, so a query's buckets keep about
+    # `n_tables * bucket_size` rows instead of a share of the training set
+    rng = np.random.default_rng(0)
+    n_bits, candidates = [], []
+    for n_samples in [2_000, 8_000, 32_000]:
+        X = rng.normal(size=(n_samples + 200, 6))
+        lsh = LSHKNeighborsClassifier(n_tables=4, bucket_size=64, random_state=0).fit(X[:-200], rng.integers(0, 3, n_samples))
+        _, lengths = lsh._bucket_slices(lsh._signatures(X[-200:].astype(np.float32)))
+        n_bits.append(lsh.n_bits_)
+        candidates.append(lengths.sum(axis=0).mean())
+    assert n_bits == sorted(n_bits) and n_bits[0] < n_bits[-1]
+    assert max(candidates) < 2 * 4 * 64
+
+def test_lsh_block_search_matches_per_query_search(blobs):
+    # Scoring the candidates of many queries together finds the nearest rows of each
+    # query's own buckets
+    X, y = blobs
+    lsh = LSHKNeighborsClassifier(n_neighbors=5, n_tables=4, n_bits=3, random_state=0).fit(X[:500], y[:500])
+    distances, indices = lsh.kneighbors(X[500:])
+    signatures = lsh._signatures(X[500:].astype(np.float32))
+    for i, query in enumerate(X[500:].astype(np.float32)):
+        candidates = lsh._candidates(signatures[:, i], 5)
+        squared = ((lsh._fit_X[candidates] - query) ** 2).sum(axis=1)
+        np.testing.assert_array_equal(indices[i], candidates[np.argsort(squared, kind="stable")[:5]])
+        np.testing.assert_allclose(distances[i], np.sqrt(np.sort(squared)[:5]), rtol=1e-5)
+    np.testing.assert_array_equal(lsh.kneighbors(X[500:], block_pairs=1, return_distance=False), indices)
+
+def test_lsh_is_sklearn_compatible(blobs):
+    X, y = blobs
+    lsh = clone(LSHKNeighborsClassifier(n_neighbors=3, random_state=1))
+    assert lsh.get_params()["n_neighbors"] == 3
+
+    distances, indices = lsh.fit(X, y).kneighbors(X[:4])
+    assert indices.shape == (4, 3)
+    # Each training row is its own nearest neighbour
+    np.testing.assert_array_equal(indices[:, 0], np.arange(4))
+    assert (np.diff(distances, axis=1) >= 0).all()
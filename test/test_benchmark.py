@@ -0,0 +1,26 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.benchmark import run_benchmark, save_results, load_results, compare_results
+
+
+def test_run_benchmark_in_memory(tmp_path):
+    records = run_benchmark(2000, str(tmp_path), stages=['validate_schema', 'eda_summary', 'predict'], model_rows=500)
+    assert [record['stage'] for record in records] == ['generate', 'load', 'validate_schema', 'eda_summary', 'predict']
+    assert all(record['status'] == 'ok' and record['n_rows'] == 2000 for record in records)
+
+def test_run_benchmark_streamed(tmp_path):
+    # Datasets larger than in_memory_rows are streamed in chunks
+    records = run_benchmark(2000, str(tmp_path), stages=['validate_distribution', 'validate_correlation'],
+                            chunksize=500, in_memory_rows=1000)
+    assert [record['stage'] for record in records] == [
+        'generate', '(streamed) load', '(streamed) validate_distribution', '(streamed) validate_correlation'
+    ]
+
+def test_save_and_compare_results(tmp_path):
+    records = [{'stage': 'load', 'n_rows': 10, 'wall_time_s': 2.0}]
+    baseline = save_results(records, str(tmp_path), env={'commit': 'abc', 'date': '2026-01-01'})
+    current = save_results([{**records[0], 'wall_time_s': 1.0}], str(tmp_path), env={'commit': 'def', 'date': '2026-01-02'})
+    assert os.path.basename(baseline) == 'abc.jsonl'
+    comparison = compare_results(load_results(baseline), load_results(current))
+    assert comparison.loc[(10, 'load'), 'ratio'] == 0.5
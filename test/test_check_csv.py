@@ -4,14 +4,14 @@ import os
 import sys
 from io import StringIO
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.check_csv import check_csv
+from src.check_csv import check_csv, sniff_csv, read_sniffed_csv
 
-def test_check_csv_valid_file():
+def test_check_csv_valid_file(tmp_path):
     # Create a mock valid CSV content
     csv_content = "name,age\nJohn,25\nAlice,30"
     
     # Use StringIO to simulate a CSV file
-    file_path = 'test_valid.csv'
+    file_path = str(tmp_path / 'test_valid.csv')
     with open(file_path, 'w') as f:
         f.write(csv_content)
 
@@ -22,12 +22,12 @@ def test_check_csv_valid_file():
     assert result == True
 
 
-def test_check_csv_invalid_file():
+def test_check_csv_invalid_file(tmp_path):
     # Create a mock invalid file (non-CSV content)
     non_csv_content = "This is not a CSV file!"
     
     # Use StringIO to simulate a non-CSV file (simulating a .txt file)
-    file_path = 'test_invalid.txt'
+    file_path = str(tmp_path / 'test_invalid.txt')
     with open(file_path, 'w') as f:
         f.write(non_csv_content)
 
@@ -35,4 +35,48 @@ def test_check_csv_invalid_file():
     result = check_csv(file_path)
     
     # Assert that the function returns False for a non-CSV file
-    assert result == False
\ No newline at end of file
+    assert result == False
+
+def test_sniff_csv_descriptor(tmp_path):
+    # Semicolon-delimited file with a BOM, as exported by spreadsheet tools
+    file_path = tmp_path / 'data.csv'
+    rows = ''.join(f"{i};{i * 0.5};grade {i}\n" for i in range(500))
+    file_path.write_bytes(("﻿id;score;label\n" + rows).encode('utf-8'))
+
+    descriptor = sniff_csv(str(file_path), sample_bytes=1024, sample_rows=50)
+
+    assert descriptor['delimiter'] == ';'
+    assert descriptor['encoding'] == 'utf-8-sig'
+    assert descriptor['has_header']
+    assert descriptor['columns'] == ['id', 'score', 'label']
+    assert descriptor['dtypes'] == {'id': 'int64', 'score': 'float64', 'label': 'object'}
+    assert descriptor['sample_rows'] <= 50
+
+    pd.testing.assert_frame_equal(read_sniffed_csv(descriptor), pd.read_csv(file_path, delimiter=';', encoding='utf-8-sig'))
+    assert [len(chunk) for chunk in read_sniffed_csv(descriptor, chunksize=200)] == [200, 200, 100]
+
+def test_read_sniffed_csv_with_null_after_sample(tmp_path):
+    # An integer column of the sample rows with a missing value later in the file
+    file_path = tmp_path / 'data.csv'
+    rows = [f"{i};{i * 0.5};grade {i}\n" for i in range(500)]
+    rows[400] = ";;\n"
+    file_path.write_text("id;score;label\n" + ''.join(rows))
+
+    descriptor = sniff_csv(str(file_path), sample_bytes=1024, sample_rows=50)
+    assert descriptor['dtypes']['id'] == 'int64'
+
+    df = read_sniffed_csv(descriptor)
+    assert df['id'].isna().sum() == 1 and df['label'].isna().sum() == 1
+    pd.testing.assert_frame_equal(df, pd.read_csv(file_path, delimiter=';'))
+    chunks = list(read_sniffed_csv(descriptor, chunksize=200))
+    assert [str(chunk['id'].dtype) for chunk in chunks] == ['int64', 'int64', 'float64']
+
+
+def test_sniff_csv_rejects_ragged_and_binary_files(tmp_path):
+    ragged = tmp_path / 'ragged.csv'
+    ragged.write_text("a,b\n1,2\n3,4,5\n")
+    binary = tmp_path / 'binary.csv'
+    binary.write_bytes(b'\x00\x01\x02' * 100)
+
+    assert sniff_csv(str(ragged)) is None
+    assert check_csv(str(binary)) == False
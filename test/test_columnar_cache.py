@@ -0,0 +1,47 @@
+import pytest
+import pandas as pd
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.columnar_cache import write_processed, convert_to_columnar, read_processed, columnar_path, is_columnar_current
+
+pytest.importorskip("pyarrow")
+
+@pytest.fixture
+def processed():
+    return pd.DataFrame({
+        "Course": [33, 171, 9254],
+        "Admission grade": [120.0, 130.5, 140.0],
+        "Target": ["Dropout", "Graduate", "Enrolled"]
+    }, index=[7, 3, 11])
+
+def test_read_processed_matches_csv(tmp_path, processed):
+    csv_path = str(tmp_path / "train_data.csv")
+    assert write_processed(processed, csv_path) == columnar_path(csv_path)
+    assert is_columnar_current(csv_path)
+
+    # The Parquet copy reads back exactly as the CSV file would
+    pd.testing.assert_frame_equal(read_processed(csv_path), pd.read_csv(csv_path))
+
+    columns = ["Target", "Course"]
+    pd.testing.assert_frame_equal(read_processed(csv_path, columns=columns),
+                                  pd.read_csv(csv_path)[columns])
+
+def test_read_processed_ignores_stale_copy(tmp_path, processed):
+    csv_path = str(tmp_path / "train_data.csv")
+    write_processed(processed, csv_path)
+
+    # Rewrite the CSV file after the Parquet copy, the copy is out of date
+    time.sleep(0.01)
+    processed.iloc[:1].to_csv(csv_path)
+    os.utime(csv_path, (time.time() + 10, time.time() + 10))
+    assert not is_columnar_current(csv_path)
+    assert len(read_processed(csv_path)) == 1
+
+def test_convert_to_columnar_in_chunks(tmp_path, processed):
+    csv_path = str(tmp_path / "clean_data.csv")
+    processed.to_csv(csv_path)
+    convert_to_columnar(csv_path, chunksize=2)
+
+    pd.testing.assert_frame_equal(pd.read_parquet(columnar_path(csv_path)), pd.read_csv(csv_path))
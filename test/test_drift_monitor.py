@@ -0,0 +1,69 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.drift_monitor import profile_spec, count_column, build_profile, save_profile, load_profile, drift_scores, DriftMonitor
+from src.synthetic_data import generate_synthetic
+from src.scoring_server import ScoringServer
+
+
+@pytest.fixture
+def reference():
+    return generate_synthetic(4000, seed=0)
+
+def test_count_column():
+    spec = {'kind': 'numeric', 'edges': [0.0, 10.0]}
+    np.testing.assert_array_equal(count_column([-1, 0, 5, 10, 11, np.nan], spec), [1, 2, 2, 1])
+    spec = profile_spec('Gender')
+    assert spec == {'kind': 'categorical', 'categories': [0, 1]}
+    np.testing.assert_array_equal(count_column([0, 1, 1, 7, None], spec), [1, 2, 1, 1])
+    assert profile_spec('Admission grade', n_bins=4)['kind'] == 'numeric'
+    assert len(profile_spec('Admission grade', n_bins=4)['edges']) == 3
+
+def test_profile_round_trip(reference, tmp_path):
+    # Chunks give the same profile as the whole frame
+    profile = build_profile([reference[:1500], reference[1500:]])
+    assert profile == build_profile(reference)
+    assert profile['n_rows'] == 4000 and 'Target' in profile['columns']
+    save_profile(profile, tmp_path / 'profile.json')
+    assert load_profile(tmp_path / 'profile.json') == profile
+
+def test_drift_scores():
+    assert drift_scores([10, 10, 0], [10, 10, 0], 'numeric') == {'psi': pytest.approx(0), 'ks': 0}
+    assert drift_scores([10, 10, 0], [0, 0, 0], 'numeric') == {'psi': None, 'ks': None}
+    scores = drift_scores([10, 10, 0], [0, 20, 0], 'numeric')
+    assert scores['psi'] > 1 and scores['ks'] == 0.5
+    assert drift_scores([5, 5, 0], [9, 1, 0], 'categorical')['ks'] is None
+
+def test_monitor_detects_shift(reference):
+    monitor = DriftMonitor(build_profile(reference), window_rows=2000)
+    monitor.update(generate_synthetic(2000, seed=1).drop(columns='Target'))
+    report = monitor.report()
+    assert not report['drift'].any()
+    assert report.loc['Target', 'count'] == 0
+
+    shifted = generate_synthetic(2000, seed=2)
+    shifted['Age at enrollment'] += 10
+    for start in range(0, 2000, 100):
+        monitor.update(shifted[start:start + 100])
+    report = monitor.report()
+    # The window has slid past the unshifted rows
+    assert monitor.window_counts()[0] == 2000
+    assert report['drift'][report['drift']].index.tolist() == ['Age at enrollment']
+    assert report.loc['Age at enrollment', 'ks'] > 0.5
+
+def test_tumbling_window(reference):
+    monitor = DriftMonitor(build_profile(reference), window_rows=100, n_buckets=1)
+    monitor.update(reference[:100])
+    monitor.update(reference[100:130])
+    assert monitor.window_counts()[0] == 30
+    assert monitor.rows_seen == 130
+
+def test_server_drift_report(reference):
+    server = ScoringServer(None, drift_monitor=DriftMonitor(build_profile(reference)))
+    server.drift_monitor.update(reference[:50])
+    report = server.drift()
+    assert report['window_rows'] == 50
+    assert {'column', 'kind', 'count', 'psi', 'ks', 'drift'} <= set(report['columns'][0])
@@ -6,6 +6,7 @@ import sys
 import tempfile
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from src.eda_plots import plot_categorical_features, plot_numerical_features
+from src.eda_summary import summarize_eda
 
 
 # Test data
@@ -35,4 +36,12 @@ def test_plot_categorical_features_invalid_input(tmp_path):
 
 def test_plot_numerical_features_invalid_input(tmp_path):
     # Test that the function raises an error with invalid input
-    assert plot_numerical_features('not a dataframe', ['B'], tmp_path) is None
\ No newline at end of file
+    assert plot_numerical_features('not a dataframe', ['B'], tmp_path) is None
+
+def test_plot_from_summary(tmp_path):
+    # The charts can be drawn from pre-aggregated counts alone
+    summary = summarize_eda(test_df, ['A', 'B'])
+    plot_categorical_features(summary, ['A'], tmp_path)
+    plot_numerical_features(summary, ['B'], tmp_path)
+    assert os.path.exists(tmp_path / "eda_categorical.png")
+    assert os.path.exists(tmp_path / "eda_numerical.png")
@@ -0,0 +1,36 @@
+import json
+import os
+import sys
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.eda_render import chart_files, eda_charts, render_charts
+from src.eda_summary import summarize_eda
+
+test_df = pd.DataFrame({
+    'A': [1, 2, 1, 2, 1, 2],
+    'B': [1, 2, 3, 4, 5, 6],
+    'Target': ['yes', 'no', 'yes', 'no', 'yes', 'no']
+})
+
+def test_render_skips_unchanged_charts(tmp_path):
+    charts = eda_charts(summarize_eda(test_df, ['A', 'B']), ['A'], ['B'])
+    assert sorted(charts) == ['eda_categorical.png', 'eda_numerical.png',
+                              'features/categorical_a.png', 'features/numerical_b.png']
+    assert list(charts) == chart_files(['A'], ['B'])
+
+    assert set(render_charts(charts, tmp_path, max_workers=1).values()) == {'rendered'}
+    for name in charts:
+        assert os.path.exists(tmp_path / name)
+    index = json.loads((tmp_path / 'eda_index.json').read_text())
+    assert sorted(index) == sorted(charts)
+
+    # Only the charts of the feature whose counts changed are rendered again
+    changed = eda_charts(summarize_eda(test_df.assign(B=test_df['B'] * 2), ['A', 'B']), ['A'], ['B'])
+    status = render_charts(changed, tmp_path, max_workers=1)
+    assert status == {'eda_numerical.png': 'rendered', 'eda_categorical.png': 'skipped',
+                      'features/numerical_b.png': 'rendered', 'features/categorical_a.png': 'skipped'}
+
+def test_render_in_process_pool(tmp_path):
+    charts = eda_charts(summarize_eda(test_df, ['A', 'B']), ['A'], ['B'])
+    assert set(render_charts(charts, tmp_path, max_workers=2).values()) == {'rendered'}
+    assert all(os.path.getsize(tmp_path / name) > 0 for name in charts)
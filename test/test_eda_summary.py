@@ -0,0 +1,58 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.eda_summary import (summarize_eda, merge_eda_summaries, save_eda_summary, load_eda_summary,
+                             categorical_counts, numerical_histogram, nice_bin_edges)
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Gender": rng.integers(0, 2, size=1000),
+        "Admission grade": rng.normal(130, 15, size=1000).round(1),
+        "Target": rng.choice(["Dropout", "Enrolled", "Graduate"], size=1000)
+    })
+
+def test_merged_chunks_match_full_summary(df):
+    features = ["Gender", "Admission grade"]
+    merged = summarize_eda(df.iloc[:300], features)
+    for start in range(300, 1000, 300):
+        merged = merge_eda_summaries(merged, summarize_eda(df.iloc[start:start + 300], features))
+    full = summarize_eda(df, features)
+
+    for feature in features:
+        pd.testing.assert_series_equal(merged["counts"][feature], full["counts"][feature])
+    with pytest.raises(ValueError):
+        merge_eda_summaries(full, summarize_eda(df, ["Gender"]))
+
+def test_counts_and_histogram(df):
+    summary = summarize_eda(df, ["Gender", "Admission grade"])
+
+    counts = categorical_counts(summary, "Gender")
+    assert counts["count"].sum() == len(df)
+    assert counts.set_index(["Gender", "Target"])["count"].to_dict() == df.groupby(["Gender", "Target"]).size().to_dict()
+
+    histogram = numerical_histogram(summary, "Admission grade", maxbins=30)
+    assert histogram["count"].sum() == len(df)
+    assert histogram["bin_start"].nunique() <= 30
+    edges = nice_bin_edges(df["Admission grade"].min(), df["Admission grade"].max())
+    expected, _ = np.histogram(df["Admission grade"], bins=edges)
+    per_bin = histogram.groupby("bin_start")["count"].sum().reindex(edges[:-1], fill_value=0)
+    np.testing.assert_array_equal(per_bin.to_numpy(), expected)
+
+def test_nice_bin_edges():
+    np.testing.assert_allclose(nice_bin_edges(0, 200), np.arange(0, 201, 10))
+    np.testing.assert_allclose(nice_bin_edges(17, 70), np.arange(16, 71, 2))
+    assert len(nice_bin_edges(3, 3)) == 2
+
+def test_save_and_load_summary(df, tmp_path):
+    summary = summarize_eda(df, ["Gender", "Admission grade"])
+    save_eda_summary(summary, tmp_path / "summary.csv")
+    loaded = load_eda_summary(tmp_path / "summary.csv")
+
+    assert loaded["target"] == "Target"
+    for feature in ["Gender", "Admission grade"]:
+        pd.testing.assert_series_equal(loaded["counts"][feature], summary["counts"][feature], check_index_type=False)
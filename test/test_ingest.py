@@ -0,0 +1,68 @@
+import os
+import sys
+import pandas as pd
+import pytest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.ingest import find_raw_files, ingest_shard, ingest_shards, partition_of, shard_outputs
+from src.synthetic_data import write_synthetic
+
+PATTERN = '(?P<institution>[a-z]+)_(?P<term>[0-9]{4}-[12])'
+
+
+@pytest.fixture
+def raw_dir(tmp_path):
+    raw = tmp_path / 'raw'
+    raw.mkdir()
+    for seed, name in enumerate(['porto_2024-1', 'porto_2024-2', 'lisbon_2024-1']):
+        write_synthetic(str(raw / f'{name}.csv'), 1_500, chunksize=500, seed=seed, raw_names=True)
+    (raw / 'notes.txt').write_text('not a raw file')
+    return raw
+
+def test_find_raw_files_and_partitions(raw_dir):
+    files = find_raw_files(str(raw_dir))
+    assert [os.path.basename(path) for path in files] == ['lisbon_2024-1.csv', 'porto_2024-1.csv', 'porto_2024-2.csv']
+    assert find_raw_files(str(raw_dir / 'porto_*.csv')) == files[1:]
+    assert partition_of(files[1]) == 'porto_2024-1'
+    assert partition_of(files[1], PATTERN) == os.path.join('institution=porto', 'term=2024-1')
+    with pytest.raises(ValueError):
+        partition_of('summary.csv', PATTERN)
+
+def test_shard_matches_whole_file(raw_dir, tmp_path):
+    path = str(raw_dir / 'porto_2024-1.csv')
+    result = ingest_shard(path, 'porto', str(tmp_path / 'out'), chunksize=400)
+    assert result['error'] is None and result['rows'] == 1_500 and len(result['fingerprints']) == 1_500
+    clean, train, test = (pd.read_csv(output + '.tmp', index_col=0) for output in shard_outputs(str(tmp_path / 'out'), 'porto', path))
+    assert len(clean) == 1_500 and len(train) + len(test) == 1_500
+    assert sorted(train.index.append(test.index)) == list(range(1_500))
+    assert result['distribution']['count'].sum() > 0
+
+def test_ingest_shards_writes_partitions(raw_dir, tmp_path):
+    out = str(tmp_path / 'out')
+    report = ingest_shards(find_raw_files(str(raw_dir)), out, workers=2, partition_pattern=PATTERN, chunksize=500)
+    assert report['passed'], report
+    assert [check['name'] for check in report['checks']] == [
+        'validate_schema', 'validate_distribution', 'validate_quantiles', 'validate_correlation', 'validate_duplicates']
+    assert [shard['rows'] for shard in report['shards']] == [1_500] * 3
+    train = pd.read_csv(os.path.join(out, 'train', 'institution=porto', 'term=2024-2', 'porto_2024-2.csv'), index_col=0)
+    assert 0.7 < len(train) / 1_500 < 0.9
+    assert os.path.exists(os.path.join(out, 'train_eda_summary.csv'))
+    assert not [name for _, _, names in os.walk(out) for name in names if name.endswith('.tmp')]
+
+def test_ingest_shards_reports_bad_and_duplicate_shards(raw_dir, tmp_path):
+    df = pd.read_csv(raw_dir / 'porto_2024-1.csv', delimiter=';')
+    df.head(10).to_csv(raw_dir / 'porto_2025-1.csv', sep=';', index=False)
+    df.assign(Course=1).to_csv(raw_dir / 'braga_2025-1.csv', sep=';', index=False)
+    out = str(tmp_path / 'out')
+    report = ingest_shards(find_raw_files(str(raw_dir)), out, workers=2, partition_pattern=PATTERN, chunksize=500)
+    assert not report['passed']
+    checks = {check['name']: check for check in report['checks']}
+    assert checks['validate_schema']['error'].count('braga_2025-1.csv') >= 1
+    assert "Row 0 of" in checks['validate_duplicates']['error'] and "porto_2025-1.csv" in checks['validate_duplicates']['error']
+    assert checks['validate_distribution']['passed']
+    assert [name for _, _, names in os.walk(out) for name in names] == []
+
+def test_ingest_shards_rejects_clashing_outputs(raw_dir, tmp_path):
+    # The CSV file and a zip file of the same extract would have the same outputs
+    path = str(raw_dir / 'porto_2024-1.csv')
+    with pytest.raises(ValueError, match="would both be written"):
+        ingest_shards([path, path.replace('.csv', '.zip')], str(tmp_path / 'out'), partition_pattern=PATTERN)
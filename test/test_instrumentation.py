@@ -0,0 +1,64 @@
+import json
+import os
+import pstats
+import sys
+import pytest
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.instrumentation import configure, stage, instrumented
+from src.validate_correlation import validate_correlation
+
+
+@pytest.fixture
+def metrics_path(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    configure(str(path))
+    yield path
+    configure()
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_stage_emits_record(metrics_path):
+    with stage('read', source='test') as record:
+        record['rows'] = 10
+    [record] = read_records(metrics_path)
+    assert record['stage'] == 'read'
+    assert record['status'] == 'ok'
+    assert record['rows'] == 10
+    assert record['source'] == 'test'
+    assert record['wall_time_s'] >= 0 and record['cpu_time_s'] >= 0
+    assert record['peak_rss_mb'] > 0
+
+def test_stage_records_errors(metrics_path):
+    with pytest.raises(ValueError):
+        with stage('fails'):
+            raise ValueError("bad data")
+    [record] = read_records(metrics_path)
+    assert record['status'] == 'error'
+    assert record['error'] == 'ValueError: bad data'
+
+def test_instrumented_validator(metrics_path):
+    # Validators are instrumented with the number of rows they check
+    df = pd.DataFrame({'a': [1, 2, 3, 4], 'b': [4, 1, 3, 2], 'Target': ['Enrolled', 'Dropout', 'Graduate', 'Dropout']})
+    validate_correlation(df)
+    [record] = read_records(metrics_path)
+    assert record['stage'] == 'validate_correlation'
+    assert record['rows'] == 4
+    assert validate_correlation.__name__ == 'validate_correlation'
+
+def test_profile_outermost_stage(tmp_path):
+    @instrumented(name='outer')
+    def outer():
+        with stage('inner'):
+            return sum(range(1000))
+
+    configure(profile_dir=str(tmp_path))
+    try:
+        assert outer() == sum(range(1000))
+    finally:
+        configure()
+    # Nested stages are part of the outer profile
+    assert os.listdir(tmp_path) == ['outer.prof']
+    assert pstats.Stats(str(tmp_path / 'outer.prof')).total_calls > 0
@@ -4,13 +4,16 @@ import pandas as pd
 import pytest
 from sklearn.compose import make_column_transformer
 from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.neighbors import KNeighborsClassifier
 from unittest.mock import patch
 from scipy.stats import randint
 
 # Add project path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.model import load_data, build_preprocessor, build_pipeline, perform_random_search, save_best_model, evaluate_model
+from src.model import load_data, build_preprocessor, build_pipeline, perform_random_search, perform_halving_search, save_best_model, evaluate_model, downcast_features, build_training_matrix
+import numpy as np
+from src.validate_schema import SCHEMA
 
 @pytest.fixture
 def data():
@@ -61,7 +64,77 @@ def test_build_pipeline():
     pipeline = build_pipeline(preprocessor)
     assert pipeline is not None
 
+def test_build_pipeline_lsh_backend():
+    pipeline = build_pipeline(build_preprocessor(), backend='lsh', n_tables=4)
+    assert pipeline.steps[-1][0] == 'lshkneighborsclassifier'
+    assert pipeline.steps[-1][1].n_tables == 4
+    # The hyperplanes are seeded so searches can be reproduced
+    assert pipeline.steps[-1][1].random_state == 42
+    assert build_pipeline(build_preprocessor(), backend='lsh', random_state=0).steps[-1][1].random_state == 0
 
+    with pytest.raises(ValueError):
+        build_pipeline(build_preprocessor(), backend='faiss')
 
+def test_load_data_compact(data):
+    train_path, test_path = data
+    X_train, y_train, X_test, y_test = load_data(train_path, test_path, compact=True)
+
+    assert "Target" not in X_train.columns
+    assert X_train["Admission grade"].dtype == np.float32
+    assert X_train["Age at enrollment"].dtype == np.int16
+
+def test_downcast_features_coded_columns():
+    X = pd.DataFrame({"Course": [33, 9991], "Gender": [0, 1], "Mother occupation": [0, 194],
+                      "Curricular units 1st sem (grade)": [12.5, 14.0]})
+    compact = downcast_features(X)
+
+    assert compact["Course"].dtype == np.int16
+    assert compact["Gender"].dtype == np.int8
+    assert compact["Mother occupation"].dtype == np.int16
+    assert compact["Curricular units 1st sem (grade)"].dtype == np.float32
+
+def test_downcast_features_out_of_range_values():
+    # Values outside int8/int16 get a wider dtype instead of wrapping around
+    X = pd.DataFrame({"Age at enrollment": [20, 40_000], "Gender": [0, 300],
+                      "Previous qualification (grade)": [120.0, 150.0]})
+    compact = downcast_features(X)
+
+    assert compact["Age at enrollment"].dtype == np.int32
+    assert compact["Gender"].dtype == np.int16
+    assert compact["Age at enrollment"].tolist() == [20, 40_000]
+    assert compact["Gender"].tolist() == [0, 300]
+
+def test_build_training_matrix(data, tmp_path):
+    train_path, test_path = data
+    X_train, y_train, _, _ = load_data(train_path, test_path, compact=True)
+    X_mm, y_mm, classes = build_training_matrix(X_train, y_train, str(tmp_path))
+
+    assert isinstance(X_mm, np.memmap) and not X_mm.flags.writeable
+    assert X_mm.dtype == np.float32
+    np.testing.assert_allclose(X_mm, X_train.to_numpy(dtype=np.float32))
+    assert (classes[y_mm] == y_train.to_numpy()).all()
+
+
+def test_build_preprocessor_by_position():
+    # Columns are selected by position when the feature names are given
+    feature_names = ["Unnamed: 0"] + list(SCHEMA.columns)[:-1]
+    preprocessor = build_preprocessor(feature_names=feature_names)
+
+    scaled = preprocessor.transformers[0][2]
+    assert scaled[0] == feature_names.index("Previous qualification (grade)")
+    assert all(isinstance(i, int) for i in scaled)
+
+def test_perform_halving_search():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"Admission grade": rng.normal(127, 14, 400), "Age at enrollment": rng.integers(17, 40, 400)})
+    y = np.where(X["Admission grade"] > 127, "Graduate", "Dropout")
+    pipeline = make_pipeline(StandardScaler(), KNeighborsClassifier())
 
+    search = perform_halving_search(X, y, pipeline, n_candidates=9, factor=3)
 
+    # Candidates are scored on growing subsamples, the last round uses every row
+    assert list(search.n_candidates_) == [9, 3, 1]
+    assert search.n_resources_[-1] <= len(X)
+    assert search.n_resources_[0] < search.n_resources_[-1]
+    assert "kneighborsclassifier__n_neighbors" in search.best_params_
+    assert search.best_estimator_.score(X, y) > 0.8
@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import make_column_transformer
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.approximate_knn import LSHKNeighborsClassifier
+from src.model_artifact import save_artifact, load_artifact
+from src.predict import load_model
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame(rng.normal(loc=50, scale=10, size=(300, 4)), columns=["Admission grade", "Age at enrollment", "GDP", "Course"])
+    y = np.where(X["Admission grade"] + 5 * rng.normal(size=300) > 50, "Graduate", "Dropout")
+    y[rng.random(300) < 0.2] = "Enrolled"
+    return X, y
+
+@pytest.mark.parametrize("weights", ["uniform", "distance"])
+def test_artifact_matches_pipeline(data, tmp_path, weights):
+    X, y = data
+    preprocessor = make_column_transformer((StandardScaler(), ["Admission grade", "Age at enrollment", "GDP"]), ("drop", ["Course"]))
+    pipeline = make_pipeline(preprocessor, KNeighborsClassifier(n_neighbors=7, weights=weights)).fit(X[:250], y[:250])
+
+    manifest = save_artifact(pipeline, str(tmp_path), cv_score=0.7, feature_dtypes=X.dtypes)
+    model = load_model(str(tmp_path))
+
+    assert model._arrays == {}
+    np.testing.assert_allclose(model.predict_proba(X[250:]), pipeline.predict_proba(X[250:]))
+    np.testing.assert_array_equal(model.predict(X[250:]), pipeline.predict(X[250:]))
+    np.testing.assert_array_equal(model.predict(X[250:].to_numpy()), pipeline.predict(X[250:]))
+    assert isinstance(model.array("fit_X"), np.memmap)
+
+    assert manifest["features"] == ["Admission grade", "Age at enrollment", "GDP"]
+    assert manifest["hyperparameters"] == {"n_neighbors": 7, "weights": weights}
+    assert manifest["feature_dtypes"]["Course"] == "float64"
+    assert manifest["cv_score"] == 0.7
+    assert manifest["data_hash"].startswith("sha256:")
+    with open(tmp_path / "manifest.json") as f:
+        assert json.load(f) == manifest
+
+def test_artifact_rejects_unsupported(data, tmp_path):
+    X, y = data
+    lsh = make_pipeline(StandardScaler(), LSHKNeighborsClassifier()).fit(X, y)
+    with pytest.raises(ValueError):
+        save_artifact(lsh, str(tmp_path))
+
+    # A scikit-learn release that no longer stores the training data in the private
+    # attributes the artifact is written from gets a clear error
+    pipeline = make_pipeline(StandardScaler(), KNeighborsClassifier()).fit(X, y)
+    fit_X = pipeline[-1]._fit_X
+    del pipeline[-1]._fit_X
+    with pytest.raises(ValueError, match="Cannot read the training data"):
+        save_artifact(pipeline, str(tmp_path))
+    pipeline[-1]._fit_X = fit_X[:, :2]
+    with pytest.raises(ValueError, match="Cannot read the training data"):
+        save_artifact(pipeline, str(tmp_path))
+    pipeline[-1]._fit_X = fit_X
+
+    save_artifact(pipeline, str(tmp_path))
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    manifest["format_version"] = 99
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+    with pytest.raises(ValueError, match="Unsupported artifact format"):
+        load_artifact(str(tmp_path))
@@ -0,0 +1,42 @@
+import pytest
+import numpy as np
+import pandas as pd
+import os
+import sys
+from sklearn.model_selection import GridSearchCV
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.neighbor_graph_search import NeighborGraphSearchCV
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame(rng.normal(size=(300, 4)), columns=["a", "b", "c", "d"])
+    y = np.where(X["a"] + 0.5 * rng.normal(size=300) > 0, "Graduate", "Dropout")
+    y[rng.random(300) < 0.2] = "Enrolled"
+    return X, y
+
+def test_scores_match_grid_search(data):
+    X, y = data
+    pipeline = make_pipeline(StandardScaler(), KNeighborsClassifier())
+    search = NeighborGraphSearchCV(pipeline, max_neighbors=15).fit(X, y)
+    grid = GridSearchCV(pipeline, {"kneighborsclassifier__n_neighbors": list(range(1, 16))}, cv=5).fit(X, y)
+
+    np.testing.assert_allclose(search.cv_results_["mean_test_score"], grid.cv_results_["mean_test_score"])
+    np.testing.assert_array_equal(search.cv_results_["rank_test_score"], grid.cv_results_["rank_test_score"])
+    assert search.best_params_ == grid.best_params_
+    assert search.best_score_ == pytest.approx(grid.best_score_)
+    assert set(search.cv_results_) == set(grid.cv_results_)
+
+def test_refit_best_estimator(data):
+    X, y = data
+    pipeline = make_pipeline(StandardScaler(), KNeighborsClassifier())
+    search = NeighborGraphSearchCV(pipeline, max_neighbors=5).fit(X, y)
+
+    assert search.best_estimator_[-1].n_neighbors == search.best_params_["kneighborsclassifier__n_neighbors"]
+    assert set(search.best_estimator_.predict(X)) <= set(y)
+
+    no_refit = NeighborGraphSearchCV(pipeline, max_neighbors=5, refit=False).fit(X.to_numpy(), y)
+    assert not hasattr(no_refit, "best_estimator_")
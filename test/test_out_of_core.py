@@ -0,0 +1,44 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import KFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.neighbor_graph_search import NeighborGraphSearchCV
+from src.out_of_core import OutOfCoreKNNSearch, evaluate_out_of_core
+
+FEATURES = ["Admission grade", "Age at enrollment", "GDP"]
+
+@pytest.fixture
+def train_file(tmp_path):
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame(rng.normal(loc=50, scale=10, size=(400, 4)), columns=FEATURES + ["Course"])
+    df["Target"] = np.where(df["Admission grade"] + 5 * rng.normal(size=400) > 50, "Graduate", "Dropout")
+    df.loc[rng.random(400) < 0.2, "Target"] = "Enrolled"
+    path = tmp_path / "train.csv"
+    df.to_csv(path)
+    return str(path), df
+
+def test_out_of_core_matches_in_memory_search(train_file, tmp_path):
+    path, df = train_file
+    # Small chunks and blocks, so every pass streams and merges several of them
+    search = OutOfCoreKNNSearch(str(tmp_path / "artifact"), features=FEATURES, chunksize=70,
+                                block_size=16, reference_block_size=50).fit(path)
+
+    # The in-memory search with the same contiguous folds
+    expected = NeighborGraphSearchCV(make_pipeline(StandardScaler(), KNeighborsClassifier()), cv=KFold(5)).fit(df[FEATURES], df["Target"])
+    np.testing.assert_allclose(search.cv_results_["mean_test_score"], expected.cv_results_["mean_test_score"])
+    assert search.best_params_ == expected.best_params_
+    assert search.n_samples_ == 400
+
+    model = search.best_estimator_
+    np.testing.assert_array_equal(model.predict(df[FEATURES]), expected.best_estimator_.predict(df[FEATURES]))
+    assert model.manifest["cv_score"] == search.best_score_
+    assert sorted(os.listdir(tmp_path / "artifact")) == [
+        "fit_X.npy", "fit_sq_norms.npy", "labels.npy", "manifest.json", "scaler_mean.npy", "scaler_scale.npy"
+    ]
+    assert evaluate_out_of_core(model, path, chunksize=64) == pytest.approx(expected.best_estimator_.score(df[FEATURES], df["Target"]))
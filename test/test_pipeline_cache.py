@@ -0,0 +1,65 @@
+import os
+import sys
+import pytest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.pipeline_cache import ArtifactStore, code_dependencies, run_pipeline, step_key
+
+def _step(tmp_path, name, source, target):
+    # A step that copies a file and counts its runs in a log file
+    script = tmp_path / "copy.py"
+    script.write_text("import sys, shutil\nshutil.copy(sys.argv[1], sys.argv[2])\nopen(sys.argv[3], 'a').write('x')\n")
+    return {
+        "name": name,
+        "command": [sys.executable, str(script), str(source), str(target), str(tmp_path / f"{name}.log")],
+        "inputs": [str(source)],
+        "code": [str(script)],
+        "outputs": [str(target)]
+    }
+
+def test_run_pipeline_skips_unchanged_steps(tmp_path):
+    (tmp_path / "raw.csv").write_text("a,b\n1,2\n")
+    steps = [_step(tmp_path, "clean", tmp_path / "raw.csv", tmp_path / "clean.csv"),
+             _step(tmp_path, "model", tmp_path / "clean.csv", tmp_path / "model.csv")]
+    store = ArtifactStore(str(tmp_path / "cache"))
+
+    assert [r["status"] for r in run_pipeline(steps, store)] == ["ran", "ran"]
+
+    # Touching an input or deleting an output does not rerun anything
+    os.utime(tmp_path / "raw.csv")
+    os.remove(tmp_path / "model.csv")
+    assert [r["status"] for r in run_pipeline(steps, store)] == ["cached", "cached"]
+    assert (tmp_path / "model.csv").read_text() == "a,b\n1,2\n"
+
+    # Rerunning a step with identical output keeps the next one cached
+    assert [r["status"] for r in run_pipeline(steps, store, force=["clean"])] == ["ran", "cached"]
+
+    (tmp_path / "raw.csv").write_text("a,b\n3,4\n")
+    assert [r["status"] for r in run_pipeline(steps, store)] == ["ran", "ran"]
+    assert (tmp_path / "clean.log").read_text() == "xxx"
+    assert (tmp_path / "model.log").read_text() == "xx"
+
+def test_step_key_covers_code_and_params(tmp_path):
+    (tmp_path / "raw.csv").write_text("a\n1\n")
+    step = _step(tmp_path, "clean", tmp_path / "raw.csv", tmp_path / "clean.csv")
+    key = step_key(step)
+
+    assert step_key({**step, "params": {"k": 1}}) != key
+    (tmp_path / "copy.py").write_text("# changed\n")
+    assert step_key(step) != key
+    root = os.path.join(os.path.dirname(__file__), '..')
+    dependencies = code_dependencies(os.path.join(root, "scripts", "eda.py"), root=root)
+    assert os.path.join(root, "src", "columnar_cache.py") in dependencies
+    assert os.path.join(root, "src", "validate_schema.py") in dependencies
+
+def test_artifact_store_evicts_least_recently_used(tmp_path):
+    store = ArtifactStore(str(tmp_path / "cache"), max_bytes=250)
+    for name in ["a", "b", "c"]:
+        (tmp_path / name).write_bytes(b"0" * 100)
+
+    store.put("a", [str(tmp_path / "a")])
+    store.put("b", [str(tmp_path / "b")])
+    store.restore("a")
+    store.put("c", [str(tmp_path / "c")])
+
+    assert sorted(store.entries()) == ["a", "c"]
+    assert store.size() == 200
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.predict import predict_batch, score_frame
+from src.scoring_server import ScoringServer
+
+@pytest.fixture
+def model():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, 3)), columns=["Admission grade", "Age at enrollment", "Curricular units 1st sem (grade)"])
+    y = np.where(X["Admission grade"] > 0, "Graduate", "Dropout")
+    return make_pipeline(StandardScaler(), KNeighborsClassifier(n_neighbors=5)).fit(X, y), X
+
+def test_predict_batch_matches_pipeline(model, tmp_path):
+    pipeline, X = model
+    input_path = tmp_path / "cohort.csv"
+    output_path = tmp_path / "scores.csv"
+    X.assign(student_id=np.arange(len(X))).to_csv(input_path, index=False)
+
+    n_rows = predict_batch(pipeline, str(input_path), str(output_path), chunksize=64, id_column="student_id")
+    scores = pd.read_csv(output_path)
+
+    assert n_rows == len(X)
+    assert list(scores.columns) == ["student_id", "prediction", "proba_Dropout", "proba_Graduate"]
+    np.testing.assert_array_equal(scores["student_id"], np.arange(len(X)))
+    np.testing.assert_array_equal(scores["prediction"], pipeline.predict(X))
+    np.testing.assert_allclose(scores[["proba_Dropout", "proba_Graduate"]], pipeline.predict_proba(X))
+
+async def _post(host, port, path, payload):
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = (await reader.readline()).decode().split(" ", 2)[1]
+    response = await reader.read()
+    writer.close()
+    return int(status), json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+def test_server_micro_batches_concurrent_requests(model):
+    pipeline, X = model
+    records = X.to_dict("records")
+
+    async def scenario():
+        server = ScoringServer(pipeline, max_batch_size=64, max_delay=0.05)
+        host, port = await server.start("127.0.0.1", 0)
+        try:
+            responses = await asyncio.gather(*[_post(host, port, "/predict", r) for r in records[:40]])
+            bad = await _post(host, port, "/predict", [{"Admission grade": 1.0}])
+            return responses, bad, server.metrics()
+        finally:
+            await server.close()
+
+    responses, bad, metrics = asyncio.run(scenario())
+    expected = score_frame(pipeline, X.iloc[:40])
+
+    assert all(status == 200 for status, _ in responses)
+    assert [body["predictions"][0]["prediction"] for _, body in responses] == list(expected["prediction"])
+    assert bad[0] == 400
+    assert metrics["requests"] == 40 and metrics["rows"] == 40 and metrics["errors"] == 1
+    assert metrics["batches"] < metrics["requests"]
+    assert metrics["latency_p99_ms"] >= metrics["latency_p50_ms"] > 0
+
+def test_bad_request_does_not_fail_its_batch(model):
+    pipeline, X = model
+    records = X.to_dict("records")
+
+    async def scenario():
+        server = ScoringServer(pipeline, max_batch_size=64, max_delay=0.2)
+        host, port = await server.start("127.0.0.1", 0)
+        try:
+            # The missing features of the bad request become NaN in the merged batch
+            responses = await asyncio.gather(_post(host, port, "/predict", records[0]),
+                                             _post(host, port, "/predict", {"Admission grade": 1.0}),
+                                             _post(host, port, "/predict", records[1:3]))
+            return responses, server.metrics()
+        finally:
+            await server.close()
+
+    (good, bad, pair), metrics = asyncio.run(scenario())
+    expected = score_frame(pipeline, X.iloc[:3])
+
+    assert good[0] == 200 and pair[0] == 200
+    assert [p["prediction"] for p in good[1]["predictions"] + pair[1]["predictions"]] == list(expected["prediction"])
+    assert bad[0] == 400
+    assert metrics["batches"] == 1 and metrics["requests"] == 2 and metrics["errors"] == 1
@@ -0,0 +1,43 @@
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.quantile_sketch import KLLSketch
+
+
+def rank_errors(sketch, values, probabilities):
+    # True rank of each estimated quantile minus its probability
+    values = np.sort(values)
+    return np.searchsorted(values, sketch.quantile(probabilities), side='right') / len(values) - probabilities
+
+def test_sketch_is_accurate_and_bounded():
+    values = np.random.default_rng(0).lognormal(size=200_000)
+    sketch = KLLSketch(k=200)
+    for chunk in np.array_split(values, 50):
+        sketch.update(chunk)
+    probabilities = np.linspace(0.01, 0.99, 99)
+    assert np.abs(rank_errors(sketch, values, probabilities)).max() <= sketch.rank_error()
+    assert len(sketch) <= 3 * sketch.k
+    assert sketch.n == len(values)
+    assert sketch.quantile(0) == values.min() and sketch.quantile(1) == values.max()
+
+def test_merge_matches_whole():
+    values = np.random.default_rng(1).normal(size=100_000)
+    shards = [KLLSketch(seed=i).update(shard) for i, shard in enumerate(np.array_split(values, 4))]
+    merged = shards[0].merge(shards[1]).merge(shards[2].merge(shards[3]))
+    assert merged.n == len(values)
+    assert np.abs(rank_errors(merged, values, np.linspace(0.05, 0.95, 19))).max() <= merged.rank_error()
+
+def test_rank_with_ties_and_missing():
+    sketch = KLLSketch().update([0, 0, 0, 1, 2, np.nan])
+    assert sketch.n == 5
+    assert sketch.rank(0, inclusive=False) == 0
+    assert sketch.rank(0) == 0.6
+    assert sketch.quantile(0.5) == 0
+    assert np.isnan(KLLSketch().quantile(0.5))
+
+def test_to_dict_round_trip():
+    sketch = KLLSketch(k=50).update(np.arange(10_000))
+    copy = KLLSketch.from_dict(sketch.to_dict())
+    np.testing.assert_array_equal(copy.quantile([0.1, 0.5, 0.9]), sketch.quantile([0.1, 0.5, 0.9]))
+    assert (copy.n, copy.min, copy.max) == (sketch.n, sketch.min, sketch.max)
@@ -1,10 +1,16 @@
+import hashlib
+import io
 import pytest
 import os
 import shutil
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
 import responses
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.read_zip import read_zip
+from src.read_zip import read_zip, read_zip_csv
 
 # Test files setup
 
@@ -101,4 +107,131 @@ def test_read_zip_error_on_nonzip_url():
 # if the  directory path provided does not exist
 def test_read_zip_error_on_missing_dir():
     with pytest.raises(ValueError, match='The directory provided does not exist.'):
-        read_zip(url_txt_csv_zip, 'test/test_zip_data3')
\ No newline at end of file
+        read_zip(url_txt_csv_zip, 'test/test_zip_data3')
+
+# Local HTTP stand-in supporting ETag, If-None-Match, Range and If-Range, which can
+# drop the connection part way through a response to simulate a failed transfer
+class ZipHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if self.path != '/data.zip':
+            self.send_response(404)
+            self.end_headers()
+            return
+        body, etag = server.body, f'"{hash(server.body)}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        start = 0
+        if self.headers.get('Range') and self.headers.get('If-Range', etag) == etag:
+            start = int(self.headers['Range'].split('=')[1].rstrip('-'))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(body) - 1}/{len(body)}')
+        else:
+            self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body) - start))
+        self.end_headers()
+
+        payload = body[start:]
+        if server.drop_after is not None:
+            payload, server.drop_after = payload[:server.drop_after], None
+        self.wfile.write(payload)
+
+@pytest.fixture
+def zip_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ZipHandler)
+    server.requests, server.drop_after = [], None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+def test_read_zip_skips_unchanged_download_and_members(zip_server, tmp_path):
+    zip_server.body = make_zip({'a.csv': 'x,y\n1,2\n', 'sub/b.txt': 'b'})
+    url = f'http://127.0.0.1:{zip_server.server_port}/data.zip'
+
+    assert sorted(read_zip(url, str(tmp_path))) == ['a.csv', 'sub/b.txt']
+    assert read_zip(url, str(tmp_path)) == []
+    assert zip_server.requests[-1]['If-None-Match'] is not None
+
+    # Only the member whose CRC changed is extracted again
+    zip_server.body = make_zip({'a.csv': 'x,y\n3,4\n', 'sub/b.txt': 'b'})
+    assert read_zip(url, str(tmp_path)) == ['a.csv']
+    assert (tmp_path / 'a.csv').read_text() == 'x,y\n3,4\n'
+
+    # A locally modified member is restored
+    (tmp_path / 'sub' / 'b.txt').write_text('changed')
+    assert read_zip(url, str(tmp_path)) == ['sub/b.txt']
+
+def test_read_zip_resumes_interrupted_transfer(zip_server, tmp_path):
+    zip_server.body = make_zip({'data.csv': 'x' * 100_000})
+    zip_server.drop_after = 30_000
+    url = f'http://127.0.0.1:{zip_server.server_port}/data.zip'
+
+    checksum = hashlib.sha256(zip_server.body).hexdigest()
+    assert read_zip(url, str(tmp_path), checksum=checksum, chunk_size=1024) == ['data.csv']
+    # The transfer resumes from the bytes already on disk
+    resumed_from = int(zip_server.requests[-1]['Range'].split('=')[1].rstrip('-'))
+    assert 0 < resumed_from <= 30_000
+    assert (tmp_path / 'data.zip').read_bytes() == zip_server.body
+    assert not (tmp_path / 'data.zip.part').exists()
+
+def test_read_zip_rejects_bad_checksum(zip_server, tmp_path):
+    zip_server.body = make_zip({'a.csv': 'a'})
+    url = f'http://127.0.0.1:{zip_server.server_port}/data.zip'
+    with pytest.raises(ValueError, match='does not match'):
+        read_zip(url, str(tmp_path), checksum='0' * 64)
+    assert not (tmp_path / 'data.zip').exists()
+
+def test_read_zip_checks_unchanged_copy_against_checksum(zip_server, tmp_path):
+    zip_server.body = make_zip({'a.csv': 'x,y\n1,2\n'})
+    url = f'http://127.0.0.1:{zip_server.server_port}/data.zip'
+    checksum = hashlib.sha256(zip_server.body).hexdigest()
+    read_zip(url, str(tmp_path), checksum=checksum)
+
+    # The server answers 304 for the corrupted local copy, which is downloaded again
+    (tmp_path / 'data.zip').write_bytes(b'corrupted')
+    assert read_zip(url, str(tmp_path), checksum=checksum) == []
+    assert zip_server.requests[-2]['If-None-Match'] is not None and 'If-None-Match' not in zip_server.requests[-1]
+    assert (tmp_path / 'data.zip').read_bytes() == zip_server.body
+
+    # A checksum that does not match the server's file either is still rejected
+    with pytest.raises(ValueError, match='does not match'):
+        read_zip(url, str(tmp_path), checksum='0' * 64)
+
+def test_read_zip_local_empty_zip_and_missing_url(zip_server, tmp_path):
+    zip_server.body = make_zip({})
+    with pytest.raises(ValueError, match='The ZIP file is empty.'):
+        read_zip(f'http://127.0.0.1:{zip_server.server_port}/data.zip', str(tmp_path))
+    with pytest.raises(ValueError, match='The URL provided does not exist.'):
+        read_zip(f'http://127.0.0.1:{zip_server.server_port}/missing.zip', str(tmp_path))
+
+# test read_zip_csv reads a CSV member in chunks without extracting it
+def test_read_zip_csv_streams_member(tmp_path):
+    path = tmp_path / 'data.zip'
+    path.write_bytes(make_zip({'notes.txt': 'x', 'data.csv': 'a;b\n' + ''.join(f'{i};{2 * i}\n' for i in range(10))}))
+
+    chunks = list(read_zip_csv(str(path), chunksize=4, delimiter=';'))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), read_zip_csv(str(path), delimiter=';'))
+    assert os.listdir(tmp_path) == ['data.zip']
+
+    path.write_bytes(make_zip({'a.csv': 'a', 'b.csv': 'b'}))
+    with pytest.raises(ValueError, match='2 CSV members'):
+        read_zip_csv(str(path))
+    assert read_zip_csv(str(path), member='b.csv', header=None).iloc[0, 0] == 'b'
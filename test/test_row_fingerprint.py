@@ -0,0 +1,72 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.row_fingerprint import (FINGERPRINT_128, BloomFilter, FingerprintIndex, duplicate_mask,
+                                 duplicate_violations, row_fingerprints, validate_duplicates)
+from src.synthetic_data import generate_synthetic
+
+
+def test_fingerprints_are_stable_and_normalized():
+    df = pd.DataFrame({'a': [1, 2, 1], 'b': ['x', None, 'x']})
+    reordered = pd.DataFrame({'b': ['x', None, 'x'], 'a': [1.0, 2.0, 1.0]}, index=[7, 8, 9])
+    fingerprints = row_fingerprints(df)
+    assert fingerprints.dtype == np.uint64
+    assert fingerprints[0] == fingerprints[2] != fingerprints[1]
+    assert (row_fingerprints(reordered) == fingerprints).all()
+    wide = row_fingerprints(df, bits=128)
+    assert wide.dtype == FINGERPRINT_128 and (wide['hi'] == fingerprints).all()
+    assert duplicate_mask(wide).tolist() == df.duplicated().tolist()
+    with pytest.raises(ValueError):
+        row_fingerprints(df, bits=32)
+
+def test_bloom_filter_has_no_false_negatives():
+    fingerprints = row_fingerprints(generate_synthetic(5_000, seed=0), bits=128)
+    bloom = BloomFilter(5_000, error_rate=0.01)
+    bloom.add(fingerprints)
+    assert bloom.contains(fingerprints).all()
+    assert fingerprints[0] in bloom
+    others = row_fingerprints(generate_synthetic(5_000, seed=1), bits=128)
+    assert bloom.contains(others).mean() < 0.03
+
+def test_index_finds_duplicates_across_batches_and_files(tmp_path):
+    df = generate_synthetic(3_000, seed=0)
+    index = FingerprintIndex(str(tmp_path), capacity=10_000)
+    for start in range(0, 2_000, 250):
+        chunk = df.iloc[start:start + 250]
+        assert index.check_and_add(row_fingerprints(chunk, bits=128), 'january.csv', chunk.index).empty
+    assert len(index) == 2_000 and len(index._state['runs']) <= 4
+    index.commit()
+
+    # A later file repeating rows of the first one, and one of its own rows
+    february = pd.concat([df.iloc[[5, 1_999]], df.iloc[2_000:], df.iloc[[2_000]]], ignore_index=True)
+    index = FingerprintIndex(str(tmp_path))
+    duplicates = index.check_and_add(row_fingerprints(february, bits=128), 'february.csv')
+    assert duplicates.to_dict('list') == {'row': [0, 1, 1_002], 'first_source': ['january.csv'] * 2 + ['february.csv'],
+                                          'first_row': [5, 1_999, 2]}
+    assert len(index) == 3_000
+    assert duplicate_violations(duplicates, 'february.csv', limit=2)[-1] == "1 more duplicate rows in february.csv."
+    with pytest.raises(Exception, match="Row 0 of february.csv duplicates row 5 of january.csv."):
+        validate_duplicates(duplicates, 'february.csv')
+
+def test_index_rollback_and_reingestion(tmp_path):
+    df = generate_synthetic(1_000, seed=0)
+    index = FingerprintIndex(str(tmp_path), capacity=10_000)
+    index.check_and_add(row_fingerprints(df, bits=128), 'january.csv')
+    index.commit()
+
+    # Rows of a failed ingestion are forgotten, on rollback or when the index is reopened
+    index.check_and_add(row_fingerprints(generate_synthetic(500, seed=1), bits=128), 'failed.csv')
+    index.rollback()
+    index.check_and_add(row_fingerprints(generate_synthetic(500, seed=2), bits=128), 'crashed.csv')
+    index = FingerprintIndex(str(tmp_path))
+    assert len(index) == 1_000
+    assert len(os.listdir(tmp_path)) == 2 + 3 * len(index._state['runs'])
+
+    # Ingesting the same file again finds no duplicates and adds nothing
+    assert index.check_and_add(row_fingerprints(df, bits=128), 'january.csv').empty
+    assert len(index) == 1_000
+    with pytest.raises(ValueError):
+        index.check_and_add(row_fingerprints(df), 'january.csv')
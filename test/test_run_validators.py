@@ -0,0 +1,36 @@
+import pytest
+import pandas as pd
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.run_validators import run_checks, run_validators, format_report
+
+def fail():
+    raise Exception("Duplicate rows found.")
+
+def test_run_checks_collects_every_result():
+    # A failing check does not stop the checks after it
+    report = run_checks({"first": fail, "second": lambda: None})
+
+    assert not report["passed"]
+    assert [c["name"] for c in report["checks"]] == ["first", "second"]
+    assert report["checks"][0]["error"] == "Exception: Duplicate rows found."
+    assert report["checks"][1]["passed"]
+    assert all(c["wall_time"] >= 0 for c in report["checks"])
+    assert "first: FAILED" in format_report(report)
+
+def test_run_checks_runs_concurrently():
+    checks = {name: (lambda: time.sleep(0.2)) for name in ["a", "b", "c"]}
+    report = run_checks(checks)
+
+    assert report["passed"]
+    assert report["wall_time"] < 0.5
+
+def test_run_validators_on_dataframe():
+    df = pd.DataFrame({"Feature1": [1, 2, 3], "Target": ["Dropout", "Graduate", "Enrolled"]})
+    seen = []
+    report = run_validators(df, validators={"shape": lambda d: seen.append(d.shape)})
+
+    assert report["passed"]
+    assert seen == [(3, 2)]
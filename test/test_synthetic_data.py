@@ -0,0 +1,33 @@
+import os
+import sys
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.synthetic_data import generate_synthetic, iter_synthetic, write_synthetic, RAW_NAMES
+from src.validate_schema import SCHEMA, check_schema_fast
+from src.validate_distribution import validate_distribution
+from src.validate_correlation import validate_correlation
+
+
+def test_generate_synthetic_is_valid():
+    df = generate_synthetic(5000, seed=1)
+    assert list(df.columns) == list(SCHEMA.columns)
+    assert check_schema_fast(df)
+    SCHEMA.validate(df)
+    validate_distribution(df)
+    validate_correlation(df)
+
+def test_generate_synthetic_is_reproducible():
+    pd.testing.assert_frame_equal(generate_synthetic(100, seed=3), generate_synthetic(100, seed=3))
+
+def test_iter_synthetic_chunks():
+    chunks = list(iter_synthetic(2500, chunksize=1000))
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    df = pd.concat(chunks)
+    assert df.index.equals(pd.RangeIndex(2500))
+    assert check_schema_fast(df)
+
+def test_write_synthetic_raw_names(tmp_path):
+    path = write_synthetic(str(tmp_path / "raw.csv"), 2500, chunksize=1000, raw_names=True)
+    df = pd.read_csv(path, delimiter=';')
+    assert len(df) == 2500
+    assert set(RAW_NAMES.values()) <= set(df.columns)
@@ -4,7 +4,7 @@ import numpy as np
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.validate_correlation import validate_correlation
+from src.validate_correlation import validate_correlation, summarize_correlation, merge_correlation_summaries, correlation_from_summary, correlation_violations, validate_correlation_summary, TARGET_MAPPING
 
 def test_correlation_exceeds_threshold():
     data = {
@@ -32,4 +32,44 @@ def test_correlation_below_threshold():
     try:
         validate_correlation(df, corr_threshold=1)
     except Exception as e:
-        pytest.fail(f"Unexpected exception raised: {e}")
\ No newline at end of file
+        pytest.fail(f"Unexpected exception raised: {e}")
+
+def test_correlation_summary_merges_chunks():
+    data = {
+        "Feature1": [1, 2, 3, 4, 5, 6],
+        "Feature2": [2, 1, 4, np.nan, 3, 7],
+        "Feature3": [5, 4, 3, 2, 1, 0],
+        "Target": ["Enrolled", "Dropout", "Graduate", "Enrolled", "Dropout", "Graduate"]
+    }
+    df = pd.DataFrame(data)
+
+    # Summaries of two chunks merged together should give the full-frame correlations
+    summary = merge_correlation_summaries(summarize_correlation(df.iloc[:3]),
+                                          summarize_correlation(df.iloc[3:]))
+    expected = df.assign(Target=df["Target"].map(TARGET_MAPPING)).corr()
+    np.testing.assert_allclose(correlation_from_summary(summary), expected)
+
+    # Feature1 and Feature3 are perfectly (negatively) correlated
+    with pytest.raises(Exception, match="Feature1"):
+        validate_correlation_summary(summary)
+
+
+def test_correlation_reports_every_pair_without_copying():
+    data = {
+        "Feature1": [1, 2, 3, 4, 5],
+        "Feature2": [2, 4, 6, 8, 10],
+        "Feature3": [5, 4, 3, 2, 1],
+        "Target": ["Enrolled", "Dropout", "Graduate", "Enrolled", "Dropout"]
+    }
+    df = pd.DataFrame(data)
+
+    with pytest.raises(Exception) as excinfo:
+        validate_correlation(df)
+
+    # Feature1, Feature2 and Feature3 are all perfectly correlated with each other
+    assert str(excinfo.value).count("Correlation exceeds threshold") == 3
+    # The Target column is encoded on the fly, the input frame is left untouched
+    assert df["Target"].tolist() == data["Target"]
+
+    pairs = correlation_violations(correlation_from_summary(summarize_correlation(df)))
+    assert [(a, b) for a, b, _ in pairs] == [("Feature1", "Feature2"), ("Feature1", "Feature3"), ("Feature2", "Feature3")]
@@ -4,7 +4,7 @@ import numpy as np
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.validate_distribution import validate_distribution
+from src.validate_distribution import validate_distribution, summarize_distribution, merge_distribution_summaries, validate_distribution_summary, describe_distribution_summary, distribution_violations
 
 def test_validate_distribution_within_range():
     # Create a DataFrame with values close to the reference values
@@ -36,4 +36,58 @@ def test_validate_distribution_outside_range():
     
     # Capture print statements or exceptions
     with pytest.raises(Exception):
-        validate_distribution(df)
\ No newline at end of file
+        validate_distribution(df)
+
+def test_validate_distribution_summary_merges_chunks():
+    # The first chunk alone is far from the reference mean, but the whole column is not
+    data = {
+        "Marital status": [5, 5, 1, 1, 1, 1, 1, 1, 1, 1],
+        "Target": ["Enrolled", "Enrolled", "Dropout", "Dropout", "Dropout",
+                   "Graduate", "Graduate", "Graduate", "Graduate", "Graduate"]
+    }
+    df = pd.DataFrame(data)
+
+    summary = merge_distribution_summaries(summarize_distribution(df.iloc[:2]),
+                                           summarize_distribution(df.iloc[2:]))
+    try:
+        validate_distribution_summary(summary)
+    except Exception as e:
+        pytest.fail(f"Unexpected exception raised: {e}")
+
+    with pytest.raises(Exception):
+        validate_distribution_summary(summarize_distribution(df.iloc[:2]))
+
+
+def test_distribution_summary_merge_matches_full_frame():
+    df = pd.DataFrame({
+        "Admission grade": [120.0, 130.5, np.nan, 140.0, 110.0, 125.0, 133.0],
+        "Age at enrollment": [18, 19, 25, 30, 22, 20, 21]
+    })
+
+    # Merge three uneven chunks, one of them with only a missing grade
+    summary = summarize_distribution(df.iloc[:2])
+    for chunk in [df.iloc[2:3], df.iloc[3:]]:
+        summary = merge_distribution_summaries(summary, summarize_distribution(chunk))
+
+    stats = describe_distribution_summary(summary)
+    np.testing.assert_allclose(stats["count"], df.count())
+    np.testing.assert_allclose(stats["mean"], df.mean())
+    np.testing.assert_allclose(stats["variance"], df.var())
+
+
+def test_validate_distribution_reports_every_violation():
+    data = {
+        "Marital status": [10, 11, 12, 13, 14],
+        "Application mode": [100, 105, 110, 120, 130],
+        "Application order": [1.7, 1.8, 1.7, 1.6, 1.8],
+        "Target": ["Enrolled", "Enrolled", "Enrolled", "Enrolled", "Graduate"]
+    }
+    df = pd.DataFrame(data)
+
+    violations = distribution_violations(summarize_distribution(df))
+    assert len(violations) == 5
+    assert any("Marital status" in v for v in violations)
+    assert any("Application mode" in v for v in violations)
+    assert any("category Enrolled" in v for v in violations)
+    assert any("category Graduate" in v for v in violations)
+    assert any("category Dropout" in v for v in violations)
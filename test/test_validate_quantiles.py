@@ -0,0 +1,52 @@
+import pytest
+import pandas as pd
+import numpy as np
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.validate_quantiles import (validate_quantiles, summarize_quantiles, merge_quantile_summaries, quantile_violations,
+                                    validate_quantile_summary, reference_quantiles, save_reference_quantiles,
+                                    load_reference_quantiles, REF_QUANTILES)
+from src.synthetic_data import generate_synthetic
+
+
+@pytest.fixture
+def df():
+    return generate_synthetic(20000, seed=4)
+
+def test_validate_quantiles_within_range(df):
+    # Data drawn from the reference quantiles passes
+    validate_quantiles(df)
+
+def test_validate_quantiles_shifted_tail(df):
+    # Only the oldest students get older: the mean barely moves but the tail does
+    df.loc[df['Age at enrollment'] > 25, 'Age at enrollment'] += 20
+    with pytest.raises(Exception, match="Age at enrollment reference 0.95 quantile"):
+        validate_quantiles(df)
+
+@pytest.mark.parametrize('share', [0.05, 0.07, 0.1])
+def test_validate_quantiles_small_shifted_tail(df, share):
+    # The oldest 5-10% of students are 20 years older, which validate_distribution misses
+    oldest = df['Age at enrollment'].rank(method='first') > len(df) * (1 - share)
+    df.loc[oldest, 'Age at enrollment'] += 20
+    with pytest.raises(Exception, match="Age at enrollment reference 0.9[59] quantile"):
+        validate_quantiles(df)
+
+def test_summaries_merge_over_chunks(df):
+    summary = summarize_quantiles(df[:5000])
+    for start in range(5000, len(df), 5000):
+        summary = merge_quantile_summaries(summary, summarize_quantiles(df[start:start + 5000]))
+    assert summary['sketches']['Admission grade'].n == len(df)
+    assert quantile_violations(summary) == []
+    validate_quantile_summary(summary)
+
+    with pytest.raises(ValueError):
+        merge_quantile_summaries(summary, summarize_quantiles(df, ['Admission grade']))
+
+def test_reference_round_trip(df, tmp_path):
+    reference = reference_quantiles(summarize_quantiles(df))
+    assert list(reference.columns) == list(REF_QUANTILES.columns)
+    np.testing.assert_allclose(reference['Admission grade'], REF_QUANTILES['Admission grade'], rtol=0.02)
+    save_reference_quantiles(reference, tmp_path / 'reference.json')
+    pd.testing.assert_frame_equal(load_reference_quantiles(tmp_path / 'reference.json'), reference, check_freq=False)
+    validate_quantiles(df, reference=reference, tolerance=0.02)
@@ -4,7 +4,7 @@ import pandas as pd
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.validate_schema import validate_schema 
+from src.validate_schema import validate_schema, check_schema_fast
 
 def test_valid_data():
     # Test case where dataframe conforms to the schema
@@ -207,4 +207,61 @@ def test_empty_row():
     with pytest.raises(Exception) as excinfo:
         validate_schema(df)
     
-    assert "Empty rows found." in str(excinfo.value)
\ No newline at end of file
+    assert "Empty rows found." in str(excinfo.value)
+
+
+def test_check_schema_fast():
+    # The fast path accepts valid data and flags invalid data for pandera to report
+    data = {
+        "Marital status": [1, 2],
+        "Application mode": [1, 2],
+        "Application order": [0, 1],
+        "Course": [33, 171],
+        "Daytime/evening attendance": [1, 0],
+        "Previous qualification": [1, 2],
+        "Previous qualification (grade)": [100.5, 180],
+        "Nacionality": [1, 2],
+        "Mother qualification": [1, 2],
+        "Father qualification": [3, 4],
+        "Mother occupation": [0, 1],
+        "Father occupation": [0, 1],
+        "Admission grade": [180.5, 190.0],
+        "Displaced": [0, 1],
+        "Educational special needs": [0, 1],
+        "Debtor": [0, 1],
+        "Tuition fees up to date": [1, 0],
+        "Gender": [0, 1],
+        "Scholarship holder": [0, 1],
+        "Age at enrollment": [20, 25],
+        "International": [0, 1],
+        "Curricular units 1st sem (credited)": [10, 12],
+        "Curricular units 1st sem (enrolled)": [10, 12],
+        "Curricular units 1st sem (evaluations)": [10, 12],
+        "Curricular units 1st sem (approved)": [8, 10],
+        "Curricular units 1st sem (grade)": [18.5, 19.0],
+        "Curricular units 1st sem (without evaluations)": [0, 0],
+        "Curricular units 2nd sem (credited)": [10, 12],
+        "Curricular units 2nd sem (enrolled)": [10, 12],
+        "Curricular units 2nd sem (evaluations)": [10, 12],
+        "Curricular units 2nd sem (approved)": [8, 10],
+        "Curricular units 2nd sem (grade)": [18.5, 19.0],
+        "Curricular units 2nd sem (without evaluations)": [0, 0],
+        "Unemployment rate": [5.5, 6.2],
+        "Inflation rate": [2.3, 2.4],
+        "GDP": [50000.3, 51000.2],
+        "Target": ["Dropout", "Graduate"]
+    }
+    
+    df = pd.DataFrame(data)
+    assert check_schema_fast(df)
+
+    # Value outside an isin domain
+    assert not check_schema_fast(df.assign(Course=[33, 34]))
+    # Value outside a between range
+    assert not check_schema_fast(df.assign(**{"Admission grade": [180.5, 250.0]}))
+    # Unexpected category
+    assert not check_schema_fast(df.assign(Target=["Dropout", "Unknown"]))
+    # Missing column
+    assert not check_schema_fast(df.drop(columns=["GDP"]))
+    # Duplicate rows
+    assert not check_schema_fast(pd.concat([df, df.iloc[[0]]], ignore_index=True))